@@ -0,0 +1,412 @@
+"""
+Write-behind buffer for assessment answers.
+
+With ``ASSESSMENT_WRITE_BEHIND['ENABLED']`` set, ``save_answer`` records the
+answer in a buffer and returns straight away; a flusher upserts buffered
+answers in batches (see ``services.upsert_answers``), so a classroom of
+users clicking at once turns into a few multi-row statements per interval
+instead of several statements per click.
+
+The buffer lives in a Django cache shared by every worker ('django', e.g.
+Redis), which keeps the answers when a worker dies and lets any worker flush
+them. A process-local store ('local', or a LocMemCache alias) would hide
+answers from the other workers, so it is only used with ``SINGLE_PROCESS``;
+otherwise write-behind stays off. Each session's pending answers are one
+cache entry keyed by question number, so a newer answer to the same question
+replaces the older one before it ever reaches the database.
+
+A flush holds a per-session flush lock, writes a snapshot of the pending
+answers and then removes only the answers that are still unchanged, so
+readers see every answer in either the buffer or the table. A session whose
+answers fail to write ``MAX_ATTEMPTS`` times is moved to a dead-letter entry.
+
+Anything that reads or synchronously writes a session's questions flushes
+that session first (``flush_sessions``), which keeps read-your-writes. A
+buffered answer has no row yet, so ``save_answer`` returns
+``question_id: null`` with ``buffered: true`` for it, and no
+``questions_answered`` count since the session's counters only change when
+the answer is written. ``complete`` refuses a session with dead-lettered
+answers rather than completing it without them.
+"""
+
+import copy
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections
+
+from .models import AssessmentQuestion, AssessmentSession
+from .services import upsert_answers
+
+DEFAULT_WRITE_BEHIND_SETTINGS = {
+    'ENABLED': False,
+    'BACKEND': 'django',
+    'ALIAS': 'default',
+    # Allow a process-local store; only safe with a single worker process
+    'SINGLE_PROCESS': False,
+    'FLUSH_INTERVAL': 1.0,
+    'BATCH_SIZE': 500,
+    'MAX_PENDING_PER_SESSION': 200,
+    'LOCK_WAIT': 0.5,
+    # Longest a flush may hold a session, and how long a synchronous flush waits for it
+    'FLUSH_LOCK_TIMEOUT': 60,
+    'FLUSH_WAIT': 5.0,
+    'MAX_ATTEMPTS': 5,
+}
+
+# Dirty-session sets are split so writers rarely wait on each other
+DIRTY_SHARDS = 16
+
+
+class AnswerBufferBusy(Exception):
+    """Raised when an answer cannot be buffered; the caller writes it directly"""
+
+
+def get_write_behind_settings():
+    return {**DEFAULT_WRITE_BEHIND_SETTINGS, **getattr(settings, 'ASSESSMENT_WRITE_BEHIND', {})}
+
+
+class LocalStore:
+    """The subset of the cache API the buffer uses, for a single process.
+
+    Like a real cache it hands out copies, so a snapshot never changes
+    under its reader.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if key in self._data:
+                return False
+            self._data[key] = value
+            return True
+
+    def get(self, key, default=None):
+        with self._lock:
+            return copy.deepcopy(self._data[key]) if key in self._data else default
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._data[key] = value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_many(self, keys):
+        with self._lock:
+            return {key: copy.deepcopy(self._data[key]) for key in keys if key in self._data}
+
+
+class AnswerBuffer:
+    prefix = 'answer-buffer'
+    # Entries outlive any sane flush interval; they are deleted when flushed
+    timeout = 7 * 24 * 3600
+
+    def __init__(self, store, max_pending=200, lock_wait=0.5):
+        self.store = store
+        self.max_pending = max_pending
+        self.lock_wait = lock_wait
+
+    def _session_key(self, session_pk):
+        return f'{self.prefix}:session:{session_pk}'
+
+    def _dirty_key(self, session_pk):
+        return f'{self.prefix}:dirty:{session_pk % DIRTY_SHARDS}'
+
+    @contextmanager
+    def _locked(self, key, wait=None, timeout=5):
+        lock_key = f'{self.prefix}:lock:{key}'
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + (self.lock_wait if wait is None else wait)
+        while not self.store.add(lock_key, token, timeout=timeout):
+            if time.monotonic() >= deadline:
+                raise AnswerBufferBusy(key)
+            time.sleep(0.005)
+        try:
+            yield
+        finally:
+            if self.store.get(lock_key) == token:
+                self.store.delete(lock_key)
+
+    def flushing(self, session_pk, wait, timeout):
+        """Lock held while a session's answers are written; raises AnswerBufferBusy"""
+        return self._locked(f'flush:{session_pk}', wait=wait, timeout=timeout)
+
+    def mark_dirty(self, session_pk):
+        key = self._dirty_key(session_pk)
+        with self._locked(key):
+            dirty = self.store.get(key) or set()
+            if session_pk not in dirty:
+                dirty.add(session_pk)
+                self.store.set(key, dirty, timeout=self.timeout)
+
+    def add(self, session_pk, question_number, answer):
+        """Buffer one answer; returns the number of answers pending for the session"""
+        key = self._session_key(session_pk)
+        with self._locked(key):
+            pending = self.store.get(key) or {}
+            if question_number not in pending and len(pending) >= self.max_pending:
+                raise AnswerBufferBusy(key)
+            pending[question_number] = answer
+            self.store.set(key, pending, timeout=self.timeout)
+        self.mark_dirty(session_pk)
+        return len(pending)
+
+    def pending(self, session_pks):
+        """``{session_pk: {question_number: answer}}`` for sessions with pending answers"""
+        keys = {self._session_key(pk): pk for pk in session_pks}
+        return {keys[key]: answers for key, answers in self.store.get_many(list(keys)).items()}
+
+    def discard(self, session_pk, written):
+        """Drop the answers in ``written`` that were not replaced since they were read"""
+        key = self._session_key(session_pk)
+        with self._locked(key):
+            pending = self.store.get(key) or {}
+            remaining = {
+                number: answer for number, answer in pending.items()
+                if written.get(number) != answer
+            }
+            if remaining:
+                if len(remaining) != len(pending):
+                    self.store.set(key, remaining, timeout=self.timeout)
+            elif pending:
+                self.store.delete(key)
+        self.store.delete(self._failures_key(session_pk))
+
+    def _failures_key(self, session_pk):
+        return f'{self.prefix}:failures:{session_pk}'
+
+    def record_failure(self, session_pk, answers, max_attempts):
+        """Count a failed write; past ``max_attempts`` move the answers to the dead letters.
+
+        Returns True when the answers were dead-lettered.
+        """
+        key = self._failures_key(session_pk)
+        with self._locked(key):
+            failures = (self.store.get(key) or 0) + 1
+            self.store.set(key, failures, timeout=self.timeout)
+        if failures < max_attempts:
+            self.mark_dirty(session_pk)
+            return False
+
+        dead_key = f'{self.prefix}:dead:{session_pk}'
+        with self._locked(dead_key):
+            dead = self.store.get(dead_key) or {}
+            self.store.set(dead_key, {**dead, **answers}, timeout=self.timeout)
+        self.discard(session_pk, answers)
+        return True
+
+    def dead_letters(self, session_pk):
+        """Answers of a session given up on after MAX_ATTEMPTS failed writes"""
+        return self.store.get(f'{self.prefix}:dead:{session_pk}') or {}
+
+    def take_dirty(self):
+        """Claim every session marked dirty since the last call"""
+        claimed = set()
+        for shard in range(DIRTY_SHARDS):
+            key = self._dirty_key(shard)
+            with self._locked(key):
+                dirty = self.store.get(key)
+                if dirty:
+                    self.store.delete(key)
+                    claimed |= dirty
+        return claimed
+
+
+def _build_questions(session_pk, answers):
+    return [
+        AssessmentQuestion(session_id=session_pk, question_number=number, **answer)
+        for number, answer in answers.items()
+    ]
+
+
+def _write(buffer, pending, max_attempts):
+    """Upsert the answers of each session in ``pending`` alone; returns (written, first error)"""
+    written, error = 0, None
+    for pk, answers in pending.items():
+        try:
+            upsert_answers(_build_questions(pk, answers))
+        except Exception as e:
+            error = error or e
+            if buffer.record_failure(pk, answers, max_attempts):
+                print(f"Gave up writing {len(answers)} buffered answer(s) of session {pk}: {e}")
+            continue
+        buffer.discard(pk, answers)
+        written += len(answers)
+    return written, error
+
+
+def _flush(buffer, session_pks, batch_size, wait=0):
+    """Write the pending answers of ``session_pks``; returns answers written.
+
+    Sessions being flushed elsewhere are waited for up to ``wait`` seconds,
+    then left marked dirty for the next pass (an error when waiting, since
+    the caller expects them written). Answers are removed from the buffer
+    only once written, and only if no newer answer replaced them. Failed
+    writes are retried on later passes, up to MAX_ATTEMPTS; the first error
+    is re-raised once everything else has been written.
+    """
+    config = get_write_behind_settings()
+    written, error = 0, None
+    with ExitStack() as stack:
+        locked = []
+        # A fixed order keeps concurrent flushes of overlapping sessions from waiting on each other
+        for pk in sorted(session_pks):
+            try:
+                stack.enter_context(buffer.flushing(pk, wait, config['FLUSH_LOCK_TIMEOUT']))
+            except AnswerBufferBusy as e:
+                buffer.mark_dirty(pk)
+                if wait:
+                    error = error or e
+                continue
+            locked.append(pk)
+
+        snapshot = buffer.pending(locked)
+
+        # Answers to sessions deleted meanwhile have nowhere to go
+        existing = set(AssessmentSession.objects.filter(pk__in=snapshot).values_list('pk', flat=True))
+        for pk in set(snapshot) - existing:
+            buffer.discard(pk, snapshot.pop(pk))
+
+        pks = list(snapshot)
+        start = 0
+        while start < len(pks):
+            batch, end = [], start
+            while end < len(pks) and len(batch) < batch_size:
+                batch.extend(_build_questions(pks[end], snapshot[pks[end]]))
+                end += 1
+            try:
+                upsert_answers(batch)
+            except Exception:
+                # Write the batch's sessions one by one so one bad session
+                # doesn't hold back the others
+                batch_written, batch_error = _write(
+                    buffer, {pk: snapshot[pk] for pk in pks[start:end]}, config['MAX_ATTEMPTS']
+                )
+                written += batch_written
+                error = error or batch_error
+            else:
+                for pk in pks[start:end]:
+                    buffer.discard(pk, snapshot[pk])
+                written += len(batch)
+            start = end
+
+    if error is not None:
+        raise error
+    return written
+
+
+_buffer = None
+_flusher = None
+_buffer_lock = threading.Lock()
+
+
+def get_answer_buffer():
+    """The process-wide buffer, or None when write-behind is disabled"""
+    global _buffer
+    config = get_write_behind_settings()
+    if not config['ENABLED']:
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                if config['BACKEND'] == 'django':
+                    store = caches[config['ALIAS']]
+                else:
+                    store = LocalStore()
+                if isinstance(store, (LocalStore, LocMemCache, DummyCache)) and not config['SINGLE_PROCESS']:
+                    print("Answer write-behind needs a cache shared by all workers; buffering is off")
+                    _buffer = False
+                else:
+                    _buffer = AnswerBuffer(
+                        store,
+                        max_pending=config['MAX_PENDING_PER_SESSION'],
+                        lock_wait=config['LOCK_WAIT'],
+                    )
+                    start_answer_flusher()
+    return _buffer or None
+
+
+def reset_answer_buffer():
+    global _buffer
+    with _buffer_lock:
+        _buffer = None
+
+
+def flush_sessions(session_pks):
+    """Write any buffered answers of these sessions now (no-op when disabled)"""
+    buffer = get_answer_buffer()
+    if buffer is None:
+        return 0
+    pending = buffer.pending(session_pks)
+    if not pending:
+        return 0
+    config = get_write_behind_settings()
+    return _flush(buffer, list(pending), config['BATCH_SIZE'], wait=config['FLUSH_WAIT'])
+
+
+def has_dead_letters(session_pk):
+    """Whether buffered answers of the session were given up on (never when disabled)"""
+    buffer = get_answer_buffer()
+    return buffer is not None and bool(buffer.dead_letters(session_pk))
+
+
+def flush_user_sessions(user):
+    """Write buffered answers of the user's in-progress sessions (no-op when disabled)"""
+    if get_answer_buffer() is None:
+        return 0
+    return flush_sessions(
+        AssessmentSession.objects.filter(user=user, status='in_progress').values_list('pk', flat=True)
+    )
+
+
+def flush_pending():
+    """Write every buffered answer (the flusher's periodic pass)"""
+    buffer = get_answer_buffer()
+    if buffer is None:
+        return 0
+    return _flush(buffer, sorted(buffer.take_dirty()), get_write_behind_settings()['BATCH_SIZE'])
+
+
+class AnswerFlusher:
+    """Daemon thread that flushes the buffer every ``interval`` seconds"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='answer-flusher', daemon=True)
+        self.flushed = 0
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            close_old_connections()
+            try:
+                self.flushed += flush_pending()
+            except Exception as e:
+                print(f"Answer buffer flush failed: {e}")
+            finally:
+                close_old_connections()
+
+
+def start_answer_flusher():
+    global _flusher
+    if _flusher is None:
+        _flusher = AnswerFlusher(get_write_behind_settings()['FLUSH_INTERVAL'])
+        _flusher.start()
+    return _flusher
@@ -0,0 +1,186 @@
+"""
+Cold storage for assessment transcripts.
+
+Questions of sessions completed more than ``AFTER_DAYS`` ago are moved out
+of the ``AssessmentQuestion`` table into immutable segment files. Each
+archival batch writes one segment: the JSONL transcript of every session in
+the batch, each compressed as its own gzip member and appended back to
+back (so the segment is also a valid multi-member gzip file). An
+``ArchivedTranscript`` row records the byte range of each session, which
+lets a single session be read back with one ranged read.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AssessmentQuestion, AssessmentSession, ArchivedTranscript
+
+DEFAULT_ARCHIVE_SETTINGS = {
+    'AFTER_DAYS': 90,
+    'BATCH_SIZE': 200,
+    'LOCATION': 'archive',
+    'STORAGE': None,
+}
+
+
+class ArchiveCorrupted(Exception):
+    """Raised when an archived transcript does not match its recorded checksum"""
+
+
+def get_archive_settings():
+    return {**DEFAULT_ARCHIVE_SETTINGS, **getattr(settings, 'ASSESSMENT_ARCHIVE', {})}
+
+
+def get_archive_storage():
+    config = get_archive_settings()
+    if config['STORAGE']:
+        return storages[config['STORAGE']]
+    return FileSystemStorage(location=config['LOCATION'])
+
+
+def _question_fields():
+    return AssessmentQuestion._meta.concrete_fields
+
+
+def _encode_value(value):
+    # Full-precision timestamps (DjangoJSONEncoder would truncate to milliseconds)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_transcript(questions):
+    """Compressed JSONL (one question per line) for one session"""
+    lines = [
+        json.dumps(
+            {field.attname: getattr(question, field.attname) for field in _question_fields()},
+            default=_encode_value
+        )
+        for question in questions
+    ]
+    return gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'), mtime=0)
+
+
+def decode_transcript(data):
+    """Unsaved AssessmentQuestion instances from ``encode_transcript`` output"""
+    questions = []
+    for line in gzip.decompress(data).decode('utf-8').splitlines():
+        if not line:
+            continue
+        values = json.loads(line)
+        questions.append(AssessmentQuestion(**{
+            field.attname: field.to_python(values[field.attname])
+            for field in _question_fields() if field.attname in values
+        }))
+    return questions
+
+
+def archive_transcripts(older_than_days=None, batch_size=None, max_batches=None):
+    """Move the questions of old completed sessions into cold storage.
+
+    Each batch writes its segment first and then, in one transaction,
+    records the locations, flags the sessions and deletes the hot rows; a
+    failure in between leaves an unreferenced segment and no lost data.
+
+    Returns ``{'sessions', 'questions', 'segments', 'bytes', 'duration_seconds'}``.
+    """
+    config = get_archive_settings()
+    older_than_days = config['AFTER_DAYS'] if older_than_days is None else older_than_days
+    batch_size = config['BATCH_SIZE'] if batch_size is None else batch_size
+    storage = get_archive_storage()
+
+    started = time.monotonic()
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    candidates = AssessmentSession.objects.filter(
+        status='completed', transcript_archived=False, completed_at__lt=cutoff
+    )
+
+    totals = {'sessions': 0, 'questions': 0, 'segments': 0, 'bytes': 0}
+    batches = last_pk = 0
+    while max_batches is None or batches < max_batches:
+        session_ids = list(
+            candidates.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not session_ids:
+            break
+        last_pk = session_ids[-1]
+
+        by_session = {}
+        for question in AssessmentQuestion.objects.filter(session_id__in=session_ids).order_by(
+            'session_id', 'question_number'
+        ):
+            by_session.setdefault(question.session_id, []).append(question)
+
+        buffer = io.BytesIO()
+        locations = []
+        for session_id, questions in by_session.items():
+            data = encode_transcript(questions)
+            locations.append(ArchivedTranscript(
+                session_id=session_id,
+                offset=buffer.tell(),
+                length=len(data),
+                question_count=len(questions),
+                sha256=hashlib.sha256(data).hexdigest(),
+            ))
+            buffer.write(data)
+
+        if locations:
+            name = f"transcripts/{timezone.now():%Y/%m/%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+            segment = storage.save(name, ContentFile(buffer.getvalue()))
+            for location in locations:
+                location.segment = segment
+            totals['segments'] += 1
+            totals['bytes'] += buffer.tell()
+
+        archived_question_ids = [q.pk for questions in by_session.values() for q in questions]
+        with transaction.atomic():
+            ArchivedTranscript.objects.bulk_create(locations)
+            # Sessions without questions are flagged too, so they are not revisited
+            AssessmentSession.objects.filter(pk__in=session_ids).update(transcript_archived=True)
+            AssessmentQuestion.objects.filter(pk__in=archived_question_ids).delete()
+
+        batches += 1
+        totals['sessions'] += len(session_ids)
+        totals['questions'] += len(archived_question_ids)
+
+    totals['duration_seconds'] = round(time.monotonic() - started, 3)
+    return totals
+
+
+def load_archived_questions(session):
+    """Read a session's archived questions back from its segment (empty if none)"""
+    location = ArchivedTranscript.objects.filter(session=session).first()
+    if location is None:
+        return []
+    with get_archive_storage().open(location.segment, 'rb') as segment:
+        segment.seek(location.offset)
+        data = segment.read(location.length)
+    if hashlib.sha256(data).hexdigest() != location.sha256:
+        raise ArchiveCorrupted(f"Archived transcript of session {session.pk} failed its checksum")
+    return decode_transcript(data)
+
+
+def session_questions(session, hot_questions=None):
+    """All questions of a session, archived ones rehydrated, in question order.
+
+    ``hot_questions`` are rows still in the table (e.g. prefetched); they
+    win over an archived question with the same number.
+    """
+    if hot_questions is None:
+        hot_questions = AssessmentQuestion.objects.filter(session=session)
+    questions = {}
+    if session.transcript_archived:
+        questions = {q.question_number: q for q in load_archived_questions(session)}
+    questions.update({q.question_number: q for q in hot_questions})
+    return [questions[number] for number in sorted(questions)]
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from assessments.archive import archive_transcripts
+
+
+class Command(BaseCommand):
+    help = 'Move the questions of old completed assessments into compressed cold-storage segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='Archive sessions completed more than this many days ago',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Sessions per segment file',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches',
+        )
+
+    def handle(self, *args, **options):
+        result = archive_transcripts(
+            older_than_days=options['older_than_days'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(
+            f"Archived {result['questions']} question(s) from {result['sessions']} session(s) "
+            f"into {result['segments']} segment(s), {result['bytes']} bytes, {result['duration_seconds']}s"
+        )
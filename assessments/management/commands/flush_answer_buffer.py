@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from assessments.answer_buffer import flush_pending, get_answer_buffer
+
+
+class Command(BaseCommand):
+    help = 'Write every answer pending in the write-behind buffer (shared cache backend)'
+
+    def handle(self, *args, **options):
+        if get_answer_buffer() is None:
+            self.stdout.write('Write-behind is disabled; nothing to flush')
+            return
+        written = flush_pending()
+        self.stdout.write(f'Flushed {written} buffered answer(s)')
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from assessments.statistics import rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user assessment statistics from the sessions and history tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of users recomputed per transaction',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild this user id (may be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        users = User.objects.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        rebuilt = 0
+        last_pk = 0
+        while True:
+            user_ids = list(users.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+            if not user_ids:
+                break
+            rebuilt += rebuild_statistics(user_ids)
+            last_pk = user_ids[-1]
+            self.stdout.write(f'Rebuilt statistics for {rebuilt} user(s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {rebuilt} user(s) rebuilt'))
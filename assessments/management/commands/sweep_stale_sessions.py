@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assessments.sweeper import get_sweeper_settings, sweep_stale_sessions
+
+
+class Command(BaseCommand):
+    help = 'Mark in-progress assessment sessions that have gone idle as abandoned'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--idle-hours',
+            type=float,
+            default=None,
+            help='Hours without activity before a session counts as abandoned',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Maximum number of sessions updated per statement',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches (the rest is left for the next run)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping every ASSESSMENT_SWEEPER INTERVAL seconds',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = sweep_stale_sessions(
+                idle_hours=options['idle_hours'],
+                batch_size=options['batch_size'],
+                max_batches=options['max_batches'],
+            )
+            self.stdout.write(
+                f"Abandoned {result['processed']} session(s) in {result['batches']} batch(es), "
+                f"{result['duration_seconds']}s"
+            )
+            if not options['loop']:
+                break
+            time.sleep(get_sweeper_settings()['INTERVAL'])
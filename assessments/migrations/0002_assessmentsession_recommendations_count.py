@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    AssessmentSession = apps.get_model('assessments', 'AssessmentSession')
+    AssessmentQuestion = apps.get_model('assessments', 'AssessmentQuestion')
+    CareerRecommendationHistory = apps.get_model('assessments', 'CareerRecommendationHistory')
+
+    def count_of(queryset):
+        return Coalesce(Subquery(
+            queryset.filter(session=OuterRef('pk')).order_by()
+            .values('session').annotate(total=Count('id')).values('total')
+        ), 0)
+
+    AssessmentSession.objects.update(
+        total_questions=count_of(AssessmentQuestion.objects.all()),
+        questions_answered=count_of(AssessmentQuestion.objects.filter(user_answer__isnull=False)),
+        recommendations_count=count_of(CareerRecommendationHistory.objects.all()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessmentsession',
+            name='recommendations_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
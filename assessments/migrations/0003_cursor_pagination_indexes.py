@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0002_assessmentsession_recommendations_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assessmentsession',
+            index=models.Index(fields=['user', 'status', '-completed_at'], name='assessments_user_id_cf671f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='careerrecommendationhistory',
+            index=models.Index(fields=['session', '-created_at'], name='assessments_session_60d1da_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0003_cursor_pagination_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentStatistics',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='assessment_statistics', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_assessments', models.IntegerField(default=0)),
+                ('in_progress_assessments', models.IntegerField(default=0)),
+                ('completed_assessments', models.IntegerField(default=0)),
+                ('abandoned_assessments', models.IntegerField(default=0)),
+                ('timed_completions', models.IntegerField(default=0)),
+                ('total_duration_seconds', models.BigIntegerField(default=0)),
+                ('total_recommendations', models.IntegerField(default=0)),
+                ('most_recent_session_key', models.CharField(blank=True, max_length=255, null=True)),
+                ('most_recent_session_type', models.CharField(blank=True, max_length=20, null=True)),
+                ('most_recent_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('most_recent_created_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('most_recent_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='assessments.assessmentsession')),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0004_assessmentstatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTranscript',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archived_transcript', serialize=False, to='assessments.assessmentsession')),
+                ('segment', models.CharField(max_length=255)),
+                ('offset', models.BigIntegerField()),
+                ('length', models.IntegerField()),
+                ('question_count', models.IntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='assessmentsession',
+            name='transcript_archived',
+            field=models.BooleanField(default=False),
+        ),
+    ]
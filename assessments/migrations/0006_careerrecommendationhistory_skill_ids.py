@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0005_archivedtranscript'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='careerrecommendationhistory',
+            name='skill_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
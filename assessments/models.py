@@ -26,6 +26,10 @@ class AssessmentSession(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     total_questions = models.IntegerField(default=0)
     questions_answered = models.IntegerField(default=0)
+    recommendations_count = models.IntegerField(default=0)
+    
+    # Questions moved to cold storage (see ArchivedTranscript)
+    transcript_archived = models.BooleanField(default=False)
     
     # Store the final recommendations
     recommendations = models.JSONField(default=list, blank=True)
@@ -45,22 +49,36 @@ class AssessmentSession(models.Model):
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['session_id']),
             models.Index(fields=['status']),
+            models.Index(fields=['user', 'status', '-completed_at']),
         ]
     
     def __str__(self):
         return f"{self.user.username} - {self.session_type} - {self.started_at.date()}"
     
-    def calculate_duration(self):
+    def calculate_duration(self, save=True):
         if self.completed_at and self.started_at:
             delta = self.completed_at - self.started_at
             self.duration_seconds = int(delta.total_seconds())
-            self.save(update_fields=['duration_seconds'])
+            if save:
+                self.save(update_fields=['duration_seconds'])
+    
+    def increment_counters(self, **deltas):
+        """Atomically add to counter columns (e.g. questions_answered=1) with F() updates"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        AssessmentSession.objects.filter(pk=self.pk).update(
+            updated_at=timezone.now(),
+            **{field: models.F(field) + delta for field, delta in deltas.items()}
+        )
+        for field, delta in deltas.items():
+            setattr(self, field, getattr(self, field) + delta)
     
     def mark_completed(self):
         self.status = 'completed'
         self.completed_at = timezone.now()
-        self.calculate_duration()
-        self.save(update_fields=['status', 'completed_at'])
+        self.calculate_duration(save=False)
+        self.save(update_fields=['status', 'completed_at', 'duration_seconds', 'updated_at'])
 
 
 class AssessmentQuestion(models.Model):
@@ -109,6 +127,22 @@ class AssessmentQuestion(models.Model):
         self.save()
 
 
+class ArchivedTranscript(models.Model):
+    """Location of a session's archived questions inside a compressed segment file"""
+    session = models.OneToOneField(
+        AssessmentSession, on_delete=models.CASCADE, primary_key=True, related_name='archived_transcript'
+    )
+    segment = models.CharField(max_length=255)
+    offset = models.BigIntegerField()
+    length = models.IntegerField()
+    question_count = models.IntegerField()
+    sha256 = models.CharField(max_length=64)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Transcript of {self.session_id} in {self.segment}"
+
+
 class AssessmentResult(models.Model):
     """Stores the analysis and results of an assessment"""
     session = models.OneToOneField(AssessmentSession, on_delete=models.CASCADE, related_name='result')
@@ -149,6 +183,7 @@ class CareerRecommendationHistory(models.Model):
     match_percentage = models.IntegerField()
     description = models.TextField()
     required_skills = models.JSONField(default=list)
+    skill_ids = models.JSONField(default=list, blank=True)  # Skill ids of required_skills
     salary_range = models.CharField(max_length=100, null=True, blank=True)
     growth_potential = models.CharField(max_length=100, null=True, blank=True)
     
@@ -169,6 +204,9 @@ class CareerRecommendationHistory(models.Model):
     
     class Meta:
         ordering = ['-match_percentage', 'career_title']
+        indexes = [
+            models.Index(fields=['session', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.career_title} - {self.match_percentage}% match"
@@ -197,3 +235,41 @@ class AssessmentFeedback(models.Model):
     
     def __str__(self):
         return f"Feedback from {self.user.username} - Rating: {self.overall_rating}/5"
+
+
+class AssessmentStatistics(models.Model):
+    """Per-user assessment totals, kept up to date as sessions change (see statistics.py)"""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='assessment_statistics'
+    )
+    
+    total_assessments = models.IntegerField(default=0)
+    in_progress_assessments = models.IntegerField(default=0)
+    completed_assessments = models.IntegerField(default=0)
+    abandoned_assessments = models.IntegerField(default=0)
+    
+    # Average duration = total_duration_seconds / timed_completions
+    timed_completions = models.IntegerField(default=0)
+    total_duration_seconds = models.BigIntegerField(default=0)
+    
+    total_recommendations = models.IntegerField(default=0)
+    
+    # Snapshot of the most recently started session
+    most_recent_session = models.ForeignKey(
+        AssessmentSession, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    most_recent_session_key = models.CharField(max_length=255, null=True, blank=True)
+    most_recent_session_type = models.CharField(max_length=20, null=True, blank=True)
+    most_recent_status = models.CharField(max_length=20, null=True, blank=True)
+    most_recent_created_at = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Assessment statistics for {self.user.username}"
+    
+    @property
+    def average_duration(self):
+        if not self.timed_completions:
+            return None
+        return self.total_duration_seconds / self.timed_completions
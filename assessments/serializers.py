@@ -5,8 +5,11 @@ from .models import (
 )
 from django.contrib.auth.models import User
 
+from backend.fieldsets import SparseFieldsetMixin
+from .archive import session_questions
 
-class AssessmentQuestionSerializer(serializers.ModelSerializer):
+
+class AssessmentQuestionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = AssessmentQuestion
         fields = [
@@ -18,12 +21,12 @@ class AssessmentQuestionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'presented_at', 'response_time_seconds']
 
 
-class CareerRecommendationHistorySerializer(serializers.ModelSerializer):
+class CareerRecommendationHistorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = CareerRecommendationHistory
         fields = [
             'id', 'career_title', 'match_percentage', 'description',
-            'required_skills', 'salary_range', 'growth_potential',
+            'required_skills', 'skill_ids', 'salary_range', 'growth_potential',
             'viewed', 'clicked_roadmap', 'saved_by_user',
             'user_rating', 'user_notes', 'industry',
             'experience_level', 'education_requirements'
@@ -42,7 +45,7 @@ class AssessmentResultSerializer(serializers.ModelSerializer):
         ]
 
 
-class AssessmentSessionSerializer(serializers.ModelSerializer):
+class AssessmentSessionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     questions = AssessmentQuestionSerializer(many=True, read_only=True)
     career_recommendations = CareerRecommendationHistorySerializer(many=True, read_only=True)
     result = AssessmentResultSerializer(read_only=True)
@@ -53,21 +56,47 @@ class AssessmentSessionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'session_id', 'username', 'session_type', 'status',
             'started_at', 'completed_at', 'total_questions',
-            'questions_answered', 'recommendations', 'ai_confidence_score',
-            'duration_seconds', 'created_at', 'updated_at',
-            'questions', 'career_recommendations', 'result'
+            'questions_answered', 'recommendations_count', 'recommendations',
+            'ai_confidence_score', 'duration_seconds', 'created_at', 'updated_at',
+            'transcript_archived', 'questions', 'career_recommendations', 'result'
         ]
+        expandable_fields = ['questions', 'career_recommendations', 'result']
         read_only_fields = [
             'id', 'created_at', 'updated_at', 'duration_seconds',
-            'username'
+            'username', 'transcript_archived'
+        ]
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Archived questions are read back from cold storage
+        if 'questions' in self.fields and instance.transcript_archived:
+            data['questions'] = self.fields['questions'].to_representation(
+                session_questions(instance, instance.questions.all())
+            )
+        return data
+
+
+class AssessmentSessionDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Session detail without transcripts; questions and recommendations are paged separately"""
+    result = AssessmentResultSerializer(read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+    
+    class Meta:
+        model = AssessmentSession
+        fields = [
+            'id', 'session_id', 'username', 'session_type', 'status',
+            'started_at', 'completed_at', 'total_questions',
+            'questions_answered', 'recommendations_count', 'ai_confidence_score',
+            'duration_seconds', 'created_at', 'updated_at', 'result'
         ]
+        expandable_fields = ['result']
 
 
-class AssessmentSessionListSerializer(serializers.ModelSerializer):
+class AssessmentSessionListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for listing sessions"""
     username = serializers.CharField(source='user.username', read_only=True)
     recommendation_count = serializers.IntegerField(
-        source='career_recommendations.count',
+        source='recommendations_count',
         read_only=True
     )
     
@@ -92,9 +121,8 @@ class StartAssessmentSerializer(serializers.Serializer):
     include_interests = serializers.BooleanField(default=True)
 
 
-class SaveQuestionAnswerSerializer(serializers.Serializer):
-    """Serializer for saving a question answer"""
-    session_id = serializers.CharField()
+class QuestionAnswerSerializer(serializers.Serializer):
+    """A single answered question, without the session it belongs to"""
     question_number = serializers.IntegerField()
     question_text = serializers.CharField()
     question_type = serializers.CharField(default='multiple_choice')
@@ -107,6 +135,26 @@ class SaveQuestionAnswerSerializer(serializers.Serializer):
     answer_metadata = serializers.JSONField(required=False, default=dict)
 
 
+class SaveQuestionAnswerSerializer(QuestionAnswerSerializer):
+    """Serializer for saving a question answer"""
+    session_id = serializers.CharField()
+
+
+class SaveQuestionAnswersSerializer(serializers.Serializer):
+    """Serializer for saving a batch of answers to one session"""
+    session_id = serializers.CharField()
+    answers = serializers.ListField(
+        child=QuestionAnswerSerializer(),
+        min_length=1,
+        max_length=100
+    )
+    
+    def validate_answers(self, answers):
+        # A question can only be upserted once per statement; the last answer wins
+        by_number = {answer['question_number']: answer for answer in answers}
+        return list(by_number.values())
+
+
 class CompleteAssessmentSerializer(serializers.Serializer):
     """Serializer for completing an assessment"""
     session_id = serializers.CharField()
@@ -0,0 +1,157 @@
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from recommendations.skills import get_skill_taxonomy
+
+from .models import (
+    AssessmentSession, AssessmentQuestion, AssessmentResult, CareerRecommendationHistory
+)
+from .statistics import record_status_change
+
+
+def build_recommendation_history(session, rec, taxonomy=None):
+    """Unsaved CareerRecommendationHistory row for one client recommendation"""
+    taxonomy = taxonomy or get_skill_taxonomy()
+    return CareerRecommendationHistory(
+        session=session,
+        career_title=rec.get('title', ''),
+        match_percentage=rec.get('match_percentage', 0),
+        description=rec.get('description', ''),
+        required_skills=rec.get('required_skills', []),
+        skill_ids=taxonomy.resolve(rec.get('required_skills', [])),
+        salary_range=rec.get('salary_range', ''),
+        growth_potential=rec.get('growth_potential', '')
+    )
+
+
+ANSWER_UPDATE_FIELDS = [
+    'question_text', 'question_type', 'options',
+    'user_answer', 'answer_metadata', 'answered_at'
+]
+
+
+def _upsert_options(unique_fields, update_fields):
+    """``bulk_create`` options for an upsert on ``unique_fields`` that every backend accepts.
+
+    MySQL's ON DUPLICATE KEY UPDATE takes no conflict target and rejects
+    ``unique_fields``; it applies to any unique key of the table instead.
+    """
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = unique_fields
+    return options
+
+
+def upsert_answers(questions):
+    """Insert or update answers for any number of sessions with a fixed number of statements.
+
+    ``questions`` are unsaved AssessmentQuestion rows with ``session_id`` set,
+    at most one per (session, question_number). Locks the rows being
+    replaced, upserts everything in one INSERT and bumps each session's
+    counters in one UPDATE. Returns ``{session_pk: {counter: delta}}``.
+    """
+    if not questions:
+        return {}
+    keys = {(q.session_id, q.question_number) for q in questions}
+    
+    with transaction.atomic():
+        # Lock the rows being replaced to see which answers are new
+        previous = {
+            (session_id, number): answer
+            for session_id, number, answer in AssessmentQuestion.objects.select_for_update().filter(
+                session_id__in={q.session_id for q in questions},
+                question_number__in={q.question_number for q in questions}
+            ).values_list('session_id', 'question_number', 'user_answer')
+            if (session_id, number) in keys
+        }
+        
+        deltas = {}
+        for question in questions:
+            key = (question.session_id, question.question_number)
+            counters = deltas.setdefault(question.session_id, {'total_questions': 0, 'questions_answered': 0})
+            if key not in previous:
+                counters['total_questions'] += 1
+            if previous.get(key) is None:
+                counters['questions_answered'] += 1
+        
+        # One upsert on the (session, question_number) unique constraint
+        AssessmentQuestion.objects.bulk_create(
+            questions, **_upsert_options(['session', 'question_number'], ANSWER_UPDATE_FIELDS)
+        )
+        
+        updates = {
+            field: F(field) + Case(
+                *[When(pk=pk, then=Value(counters[field])) for pk, counters in deltas.items()],
+                default=Value(0),
+                output_field=IntegerField()
+            )
+            for field in ('total_questions', 'questions_answered')
+        }
+        AssessmentSession.objects.filter(pk__in=deltas).update(updated_at=timezone.now(), **updates)
+    
+    return deltas
+
+
+def complete_assessment(session, recommendations=None, ai_confidence_score=None):
+    """Complete a session in one transaction with a fixed number of statements.
+
+    Inserts the recommendation history in one bulk INSERT, writes the
+    session (status, timing, results and counters) in one UPDATE and
+    creates the result summary if there is none yet, however many
+    recommendations are sent.
+    The user's statistics row is updated in the same transaction.
+    """
+    completed_at = timezone.now()
+    session.status = 'completed'
+    session.completed_at = completed_at
+    session.duration_seconds = int((completed_at - session.started_at).total_seconds())
+    
+    updates = {
+        'status': session.status,
+        'completed_at': completed_at,
+        'duration_seconds': session.duration_seconds,
+        'updated_at': completed_at,
+    }
+    if recommendations:
+        session.recommendations = recommendations
+        updates['recommendations'] = recommendations
+        updates['recommendations_count'] = F('recommendations_count') + len(recommendations)
+    if ai_confidence_score is not None:
+        session.ai_confidence_score = ai_confidence_score
+        updates['ai_confidence_score'] = ai_confidence_score
+    
+    with transaction.atomic():
+        # Lock the row so concurrent completions are counted once each
+        previous_status, previous_duration = AssessmentSession.objects.select_for_update().filter(
+            pk=session.pk
+        ).values_list('status', 'duration_seconds').get()
+        
+        if recommendations:
+            taxonomy = get_skill_taxonomy()
+            CareerRecommendationHistory.objects.bulk_create(
+                [build_recommendation_history(session, rec, taxonomy) for rec in recommendations]
+            )
+        AssessmentSession.objects.filter(pk=session.pk).update(**updates)
+        
+        # Create the result summary; an existing one is never overwritten
+        AssessmentResult.objects.get_or_create(
+            session=session,
+            defaults={
+                'top_career_matches': (session.recommendations or [])[:3],
+                'confidence_score': (
+                    session.ai_confidence_score if session.ai_confidence_score is not None else 0.8
+                ),
+            }
+        )
+        
+        record_status_change(
+            session,
+            previous_status,
+            previous_duration=previous_duration,
+            recommendations=len(recommendations or [])
+        )
+    
+    if recommendations:
+        session.recommendations_count += len(recommendations)
+    return session
@@ -0,0 +1,153 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from .models import AssessmentSession, AssessmentStatistics, CareerRecommendationHistory
+
+STATUS_COUNTERS = {
+    'in_progress': 'in_progress_assessments',
+    'completed': 'completed_assessments',
+    'abandoned': 'abandoned_assessments',
+}
+
+
+def adjust_statistics(user_id, deltas, **values):
+    """Add ``deltas`` to a user's counters (and set ``values``) in one UPDATE.
+
+    A user without a statistics row yet gets one rebuilt from the sessions
+    table, which already includes the change being recorded.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    updates.update(values)
+    if not updates:
+        return
+    updated = AssessmentStatistics.objects.filter(user_id=user_id).update(
+        updated_at=timezone.now(), **updates
+    )
+    if not updated:
+        rebuild_statistics([user_id])
+
+
+def record_session_started(session):
+    adjust_statistics(
+        session.user_id,
+        {'total_assessments': 1, STATUS_COUNTERS[session.status]: 1},
+        most_recent_session=session,
+        most_recent_session_key=session.session_id,
+        most_recent_session_type=session.session_type,
+        most_recent_status=session.status,
+        most_recent_created_at=session.created_at,
+    )
+
+
+def record_status_change(session, previous_status, previous_duration=None, recommendations=0):
+    """Record that ``session`` moved from ``previous_status`` to its current status"""
+    deltas = {'total_recommendations': recommendations}
+    if previous_status != session.status:
+        deltas[STATUS_COUNTERS[previous_status]] = -1
+        deltas[STATUS_COUNTERS[session.status]] = 1
+
+    # Completed sessions contribute their duration to the average
+    if previous_status == 'completed' and previous_duration is not None:
+        deltas['timed_completions'] = -1
+        deltas['total_duration_seconds'] = -previous_duration
+    if session.status == 'completed' and session.duration_seconds is not None:
+        deltas['timed_completions'] = deltas.get('timed_completions', 0) + 1
+        deltas['total_duration_seconds'] = deltas.get('total_duration_seconds', 0) + session.duration_seconds
+
+    values = {}
+    if previous_status != session.status:
+        values['most_recent_status'] = Case(
+            When(most_recent_session=session, then=Value(session.status)),
+            default=F('most_recent_status')
+        )
+    adjust_statistics(session.user_id, deltas, **values)
+
+
+def rebuild_statistics(user_ids):
+    """Recompute the statistics rows of ``user_ids`` from the sessions and history tables.
+
+    The rows are created if missing and locked before the recount, so an
+    ``adjust_statistics`` delta committed meanwhile waits and is applied on
+    top of the rebuilt values instead of being overwritten.
+    """
+    with transaction.atomic():
+        user_ids = list(User.objects.filter(pk__in=user_ids).order_by('pk').values_list('pk', flat=True))
+        if not user_ids:
+            return 0
+        AssessmentStatistics.objects.bulk_create(
+            [AssessmentStatistics(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+        )
+        list(
+            AssessmentStatistics.objects.select_for_update().filter(user_id__in=user_ids)
+            .order_by('user_id').values_list('pk', flat=True)
+        )
+
+        latest = AssessmentSession.objects.filter(user=OuterRef('pk')).order_by('-created_at', '-id')
+        users = dict(
+            User.objects.filter(pk__in=user_ids)
+            .annotate(latest_session=Subquery(latest.values('pk')[:1]))
+            .values_list('pk', 'latest_session')
+        )
+        totals = {
+            row['user_id']: row
+            for row in AssessmentSession.objects.filter(user_id__in=users).order_by()
+            .values('user_id').annotate(
+                total_assessments=Count('id'),
+                in_progress_assessments=Count('id', filter=Q(status='in_progress')),
+                completed_assessments=Count('id', filter=Q(status='completed')),
+                abandoned_assessments=Count('id', filter=Q(status='abandoned')),
+                timed_completions=Count(
+                    'id', filter=Q(status='completed', duration_seconds__isnull=False)
+                ),
+                total_duration_seconds=Sum(
+                    'duration_seconds', filter=Q(status='completed'), default=0
+                ),
+            )
+        }
+        recommendations = dict(
+            CareerRecommendationHistory.objects.filter(session__user_id__in=users).order_by()
+            .values('session__user_id').annotate(total=Count('id'))
+            .values_list('session__user_id', 'total')
+        )
+        sessions = AssessmentSession.objects.in_bulk(
+            [pk for pk in users.values() if pk is not None]
+        )
+
+        rows = []
+        for user_id, latest_id in users.items():
+            counts = totals.get(user_id, {})
+            recent = sessions.get(latest_id)
+            rows.append(AssessmentStatistics(
+                user_id=user_id,
+                total_assessments=counts.get('total_assessments', 0),
+                in_progress_assessments=counts.get('in_progress_assessments', 0),
+                completed_assessments=counts.get('completed_assessments', 0),
+                abandoned_assessments=counts.get('abandoned_assessments', 0),
+                timed_completions=counts.get('timed_completions', 0),
+                total_duration_seconds=counts.get('total_duration_seconds', 0),
+                total_recommendations=recommendations.get(user_id, 0),
+                most_recent_session=recent,
+                most_recent_session_key=recent.session_id if recent else None,
+                most_recent_session_type=recent.session_type if recent else None,
+                most_recent_status=recent.status if recent else None,
+                most_recent_created_at=recent.created_at if recent else None,
+                updated_at=timezone.now(),
+            ))
+
+        update_fields = [
+            field.name for field in AssessmentStatistics._meta.concrete_fields
+            if field.name != 'user'
+        ]
+        AssessmentStatistics.objects.bulk_update(rows, update_fields)
+    return len(rows)
+
+
+def get_statistics(user):
+    """The user's statistics row, built on first use"""
+    stats = AssessmentStatistics.objects.filter(user=user).first()
+    if stats is None:
+        rebuild_statistics([user.pk])
+        stats = AssessmentStatistics.objects.get(user=user)
+    return stats
@@ -0,0 +1,120 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import AssessmentSession
+from .statistics import rebuild_statistics
+
+DEFAULT_SWEEPER_SETTINGS = {
+    'IDLE_HOURS': 24,
+    'BATCH_SIZE': 500,
+    'INTERVAL': 3600,
+}
+
+
+def get_sweeper_settings():
+    return {**DEFAULT_SWEEPER_SETTINGS, **getattr(settings, 'ASSESSMENT_SWEEPER', {})}
+
+
+def sweep_stale_sessions(idle_hours=None, batch_size=None, max_batches=None):
+    """Mark in-progress sessions idle for ``idle_hours`` as abandoned.
+
+    Works through the candidates in primary-key order, ``batch_size`` rows
+    per transaction, so no statement holds locks on more than one batch.
+    Rows locked by a request in flight are skipped and picked up next time.
+    The owners' statistics are recounted after each batch.
+
+    Returns ``{'processed', 'batches', 'duration_seconds'}``.
+    """
+    config = get_sweeper_settings()
+    idle_hours = config['IDLE_HOURS'] if idle_hours is None else idle_hours
+    batch_size = config['BATCH_SIZE'] if batch_size is None else batch_size
+
+    started = time.monotonic()
+    cutoff = timezone.now() - timedelta(hours=idle_hours)
+    stale = AssessmentSession.objects.filter(status='in_progress', updated_at__lt=cutoff)
+
+    processed = batches = 0
+    last_pk = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            rows = list(
+                stale.filter(pk__gt=last_pk).order_by('pk')
+                .select_for_update(skip_locked=True)
+                .values_list('pk', 'user_id')[:batch_size]
+            )
+            if not rows:
+                break
+            processed += stale.filter(pk__in=[pk for pk, _ in rows]).update(
+                status='abandoned', updated_at=timezone.now()
+            )
+            rebuild_statistics({user_id for _, user_id in rows})
+        batches += 1
+        last_pk = rows[-1][0]
+
+    return {
+        'processed': processed,
+        'batches': batches,
+        'duration_seconds': round(time.monotonic() - started, 3),
+    }
+
+
+class SweeperScheduler:
+    """Daemon thread that runs the sweep every ``interval`` seconds.
+
+    With a shared cache only one worker sweeps per interval; with the
+    default local-memory cache every worker sweeps, which is safe because
+    each batch skips rows another sweeper has locked.
+    """
+    lock_key = 'assessment-sweeper:lock'
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_result = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='assessment-sweeper', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not cache.add(self.lock_key, 1, timeout=self.interval):
+                continue
+            close_old_connections()
+            try:
+                self.last_result = sweep_stale_sessions()
+                if self.last_result['processed']:
+                    print(f"Abandoned {self.last_result['processed']} stale assessment sessions "
+                          f"in {self.last_result['duration_seconds']}s")
+            except Exception as e:
+                print(f"Assessment sweep failed: {e}")
+            finally:
+                close_old_connections()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_sweeper_scheduler():
+    """Start the process-wide sweeper thread (idempotent)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = SweeperScheduler(get_sweeper_settings()['INTERVAL'])
+                _scheduler.start()
+    return _scheduler
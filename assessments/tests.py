@@ -0,0 +1,421 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .answer_buffer import AnswerBuffer, LocalStore, _flush, get_answer_buffer, reset_answer_buffer
+from .archive import ArchiveCorrupted, archive_transcripts, session_questions
+from .models import ArchivedTranscript, AssessmentQuestion, AssessmentResult, AssessmentSession, AssessmentStatistics
+from .services import complete_assessment, upsert_answers
+from .statistics import record_session_started, rebuild_statistics
+from .sweeper import sweep_stale_sessions
+
+
+def backend_feature(name, value):
+    """Pretend the database backend does (or doesn't) support a feature, e.g. like MySQL"""
+    return mock.patch.object(
+        type(connection.features), name, new_callable=mock.PropertyMock, return_value=value
+    )
+
+
+def make_session(username='alice', **fields):
+    user = User.objects.filter(username=username).first() or User.objects.create_user(
+        username, f'{username}@example.com', 'pw-123456'
+    )
+    return AssessmentSession.objects.create(user=user, **fields)
+
+
+def answer(session, number, text='yes'):
+    return AssessmentQuestion(
+        session_id=session.pk, question_number=number,
+        question_text=f'Question {number}', user_answer=text
+    )
+
+
+class UpsertAnswersTests(TestCase):
+    def setUp(self):
+        self.session = make_session()
+
+    def test_inserts_new_answers_and_replaces_existing_ones(self):
+        upsert_answers([answer(self.session, 1), answer(self.session, 2)])
+        deltas = upsert_answers([answer(self.session, 2, 'no'), answer(self.session, 3)])
+
+        self.assertEqual(deltas, {self.session.pk: {'total_questions': 1, 'questions_answered': 1}})
+        self.assertEqual(
+            list(self.session.questions.values_list('question_number', 'user_answer')),
+            [(1, 'yes'), (2, 'no'), (3, 'yes')]
+        )
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.total_questions, self.session.questions_answered), (3, 3))
+
+    def test_upsert_names_no_conflict_target_on_mysql(self):
+        with backend_feature('supports_update_conflicts_with_target', False):
+            with mock.patch.object(AssessmentQuestion.objects, 'bulk_create') as bulk_create:
+                upsert_answers([answer(self.session, 1)])
+
+        _, options = bulk_create.call_args
+        self.assertTrue(options['update_conflicts'])
+        self.assertNotIn('unique_fields', options)
+
+
+class SaveAnswerTests(TestCase):
+    url = '/api/assessments/sessions/save_answer/'
+
+    def setUp(self):
+        self.session = make_session(session_id='s-1')
+        self.client = APIClient()
+        self.client.force_authenticate(self.session.user)
+
+    def post_answer(self, number=1, text='yes'):
+        return self.client.post(self.url, {
+            'session_id': 's-1', 'question_number': number,
+            'question_text': f'Question {number}', 'user_answer': text,
+        }, format='json')
+
+    def test_second_save_updates_the_answer(self):
+        first = self.post_answer(text='yes')
+        second = self.post_answer(text='no')
+
+        self.assertEqual(first.data['question_id'], second.data['question_id'])
+        self.assertEqual(self.session.questions.get().user_answer, 'no')
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.total_questions, self.session.questions_answered), (1, 1))
+
+    def test_concurrent_first_save_updates_the_winning_row(self):
+        winner = AssessmentQuestion.objects.create(
+            session=self.session, question_number=1, question_text='Question 1'
+        )
+        select_for_update = AssessmentQuestion.objects.select_for_update
+        lookups = []
+
+        def row_not_yet_visible():
+            lookups.append(1)
+            queryset = select_for_update()
+            return queryset.none() if len(lookups) == 1 else queryset
+
+        with mock.patch.object(AssessmentQuestion.objects, 'select_for_update', side_effect=row_not_yet_visible):
+            response = self.post_answer(text='mine')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['question_id'], winner.pk)
+        winner.refresh_from_db()
+        self.assertEqual(winner.user_answer, 'mine')
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.total_questions, self.session.questions_answered), (0, 1))
+
+
+class CompleteAssessmentTests(TestCase):
+    def setUp(self):
+        self.session = make_session()
+        rebuild_statistics([self.session.user_id])
+
+    def test_completes_session_history_and_result_on_mysql(self):
+        recommendations = [{'title': f'Career {i}', 'match_percentage': 90 - i} for i in range(4)]
+        with backend_feature('supports_update_conflicts_with_target', False):
+            complete_assessment(self.session, recommendations=recommendations, ai_confidence_score=0.9)
+
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.status, self.session.recommendations_count), ('completed', 4))
+        self.assertEqual(self.session.career_recommendations.count(), 4)
+        result = AssessmentResult.objects.get(session=self.session)
+        self.assertEqual([match['title'] for match in result.top_career_matches], ['Career 0', 'Career 1', 'Career 2'])
+        self.assertEqual(result.confidence_score, 0.9)
+
+    def test_existing_result_is_not_overwritten(self):
+        AssessmentResult.objects.create(session=self.session, top_career_matches=[{'title': 'Kept'}], confidence_score=0.5)
+
+        complete_assessment(self.session, recommendations=[{'title': 'New'}], ai_confidence_score=0.9)
+
+        result = AssessmentResult.objects.get(session=self.session)
+        self.assertEqual((result.top_career_matches, result.confidence_score), ([{'title': 'Kept'}], 0.5))
+
+
+class AssessmentHistoryTests(TestCase):
+    def setUp(self):
+        self.session = make_session(session_id='s-1')
+        complete_assessment(self.session, recommendations=[
+            {'title': f'Career {i}', 'match_percentage': 50 + i} for i in range(3)
+        ])
+        upsert_answers([answer(self.session, number) for number in range(1, 4)])
+        self.client = APIClient()
+        self.client.force_authenticate(self.session.user)
+        self.url = f'/api/assessments/history/{self.session.pk}/'
+
+    def test_list_returns_summaries(self):
+        page = self.client.get('/api/assessments/history/').data
+
+        self.assertEqual([item['id'] for item in page['results']], [self.session.pk])
+        self.assertNotIn('questions', page['results'][0])
+        self.assertEqual(page['results'][0]['recommendation_count'], 3)
+
+    def test_questions_are_paged(self):
+        first = self.client.get(self.url + 'questions/?page_size=2').data
+        second = self.client.get(first['next']).data
+
+        numbers = [q['question_number'] for q in first['results'] + second['results']]
+        self.assertEqual(numbers, [1, 2, 3])
+        self.assertIsNone(second['next'])
+
+    def test_recommendations_are_paged_best_match_first(self):
+        page = self.client.get(self.url + 'recommendations/').data
+
+        self.assertEqual([r['match_percentage'] for r in page['results']], [52, 51, 50])
+
+    def test_deleting_a_recommendation_updates_the_session_counter(self):
+        recommendation = self.session.career_recommendations.first()
+
+        response = self.client.delete(f'/api/assessments/recommendations/{recommendation.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.recommendations_count, 2)
+        self.assertEqual(self.client.get('/api/assessments/history/').data['results'][0]['recommendation_count'], 2)
+
+
+class StatisticsTests(TestCase):
+    def setUp(self):
+        self.session = make_session(session_id='s-1')
+
+    def test_first_session_builds_the_row_on_mysql(self):
+        with backend_feature('supports_update_conflicts_with_target', False):
+            record_session_started(self.session)
+
+        stats = AssessmentStatistics.objects.get(user=self.session.user)
+        self.assertEqual((stats.total_assessments, stats.in_progress_assessments), (1, 1))
+        self.assertEqual(stats.most_recent_session_key, 's-1')
+
+    def test_rebuild_overwrites_drifted_counters(self):
+        rebuild_statistics([self.session.user_id])
+        AssessmentStatistics.objects.update(total_assessments=42, most_recent_status='abandoned')
+        complete_assessment(self.session)
+
+        self.assertEqual(rebuild_statistics([self.session.user_id]), 1)
+        stats = AssessmentStatistics.objects.get(user=self.session.user)
+        self.assertEqual((stats.total_assessments, stats.completed_assessments), (1, 1))
+        self.assertEqual(stats.most_recent_status, 'completed')
+
+    def test_rebuild_locks_the_rows_before_recounting(self):
+        calls = []
+        real = QuerySet.select_for_update
+
+        def select_for_update(queryset, *args, **kwargs):
+            calls.append((queryset.model, AssessmentStatistics.objects.filter(user=self.session.user).exists()))
+            return real(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=select_for_update):
+            rebuild_statistics([self.session.user_id])
+
+        # The missing row was created first, so it could be locked
+        self.assertEqual(calls, [(AssessmentStatistics, True)])
+        self.assertEqual(AssessmentStatistics.objects.get(user=self.session.user).total_assessments, 1)
+
+    def test_statistics_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.session.user)
+
+        with backend_feature('supports_update_conflicts_with_target', False):
+            response = client.get('/api/assessments/sessions/statistics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_assessments'], 1)
+
+
+class SweeperTests(TestCase):
+    def test_abandons_idle_sessions_of_a_user_without_statistics(self):
+        idle = make_session(session_id='idle')
+        active = make_session(session_id='active')
+        AssessmentSession.objects.filter(pk=idle.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertFalse(AssessmentStatistics.objects.exists())
+
+        with backend_feature('supports_update_conflicts_with_target', False):
+            result = sweep_stale_sessions(idle_hours=24, batch_size=1)
+
+        self.assertEqual((result['processed'], result['batches']), (1, 1))
+        idle.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual((idle.status, active.status), ('abandoned', 'in_progress'))
+        stats = AssessmentStatistics.objects.get(user=idle.user)
+        self.assertEqual((stats.abandoned_assessments, stats.in_progress_assessments), (1, 1))
+
+
+class TranscriptArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(ASSESSMENT_ARCHIVE={'LOCATION': directory.name})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.old = make_session(session_id='old')
+        self.recent = make_session(session_id='recent')
+        for session in (self.old, self.recent):
+            upsert_answers([answer(session, number, f'answer {number}') for number in (1, 2)])
+            complete_assessment(session)
+        AssessmentSession.objects.filter(pk=self.old.pk).update(completed_at=timezone.now() - timedelta(days=120))
+
+    def test_moves_old_transcripts_to_a_segment(self):
+        totals = archive_transcripts(older_than_days=90)
+
+        self.assertEqual((totals['sessions'], totals['questions'], totals['segments']), (1, 2, 1))
+        self.assertFalse(self.old.questions.exists())
+        self.assertEqual(self.recent.questions.count(), 2)
+        self.old.refresh_from_db()
+        self.assertTrue(self.old.transcript_archived)
+
+        questions = session_questions(self.old)
+        self.assertEqual([(q.question_number, q.user_answer) for q in questions], [(1, 'answer 1'), (2, 'answer 2')])
+
+    def test_hot_rows_win_over_archived_ones(self):
+        archive_transcripts(older_than_days=90)
+        self.old.refresh_from_db()
+        upsert_answers([answer(self.old, 2, 'edited')])
+
+        questions = session_questions(self.old)
+        self.assertEqual([q.user_answer for q in questions], ['answer 1', 'edited'])
+
+    def test_checksum_mismatch_is_reported(self):
+        archive_transcripts(older_than_days=90)
+        self.old.refresh_from_db()
+        ArchivedTranscript.objects.filter(session=self.old).update(sha256='0' * 64)
+
+        with self.assertRaises(ArchiveCorrupted):
+            session_questions(self.old)
+
+
+def answer_data(text):
+    return {'question_text': 'Question', 'user_answer': text, 'answered_at': timezone.now()}
+
+
+class AnswerBufferFlushTests(TestCase):
+    def setUp(self):
+        self.session = make_session()
+        self.buffer = AnswerBuffer(LocalStore())
+
+    def stored_answers(self):
+        return dict(self.session.questions.values_list('question_number', 'user_answer'))
+
+    def test_answers_stay_buffered_until_written(self):
+        self.buffer.add(self.session.pk, 1, answer_data('yes'))
+        seen_during_write = []
+
+        def write(questions):
+            seen_during_write.append(self.buffer.pending([self.session.pk]))
+            return upsert_answers(questions)
+
+        with mock.patch('assessments.answer_buffer.upsert_answers', side_effect=write):
+            self.assertEqual(_flush(self.buffer, [self.session.pk], batch_size=10), 1)
+
+        self.assertIn(1, seen_during_write[0][self.session.pk])
+        self.assertEqual(self.buffer.pending([self.session.pk]), {})
+        self.assertEqual(self.stored_answers(), {1: 'yes'})
+
+    def test_answer_replaced_during_a_flush_is_kept(self):
+        self.buffer.add(self.session.pk, 1, answer_data('old'))
+
+        def write(questions):
+            self.buffer.add(self.session.pk, 1, answer_data('new'))
+            return upsert_answers(questions)
+
+        with mock.patch('assessments.answer_buffer.upsert_answers', side_effect=write):
+            _flush(self.buffer, [self.session.pk], batch_size=10)
+        self.assertEqual(self.buffer.pending([self.session.pk])[self.session.pk][1]['user_answer'], 'new')
+
+        _flush(self.buffer, [self.session.pk], batch_size=10)
+        self.assertEqual(self.stored_answers(), {1: 'new'})
+
+    def test_session_being_flushed_elsewhere_is_left_for_the_next_pass(self):
+        self.buffer.add(self.session.pk, 1, answer_data('yes'))
+        self.buffer.take_dirty()
+
+        with self.buffer.flushing(self.session.pk, wait=0, timeout=60):
+            self.assertEqual(_flush(self.buffer, [self.session.pk], batch_size=10), 0)
+
+        self.assertEqual(self.buffer.take_dirty(), {self.session.pk})
+        self.assertEqual(self.stored_answers(), {})
+
+    @override_settings(ASSESSMENT_WRITE_BEHIND={'MAX_ATTEMPTS': 2})
+    def test_failing_session_is_dead_lettered_after_max_attempts(self):
+        healthy = make_session('bob')
+        self.buffer.add(self.session.pk, 1, answer_data('poison'))
+        self.buffer.add(healthy.pk, 1, answer_data('fine'))
+
+        def write(questions):
+            if any(q.session_id == self.session.pk for q in questions):
+                raise ValueError('cannot write')
+            return upsert_answers(questions)
+
+        with mock.patch('assessments.answer_buffer.upsert_answers', side_effect=write):
+            for _ in range(2):
+                with self.assertRaises(ValueError):
+                    _flush(self.buffer, [self.session.pk, healthy.pk], batch_size=10)
+
+        self.assertEqual(healthy.questions.get().user_answer, 'fine')
+        self.assertEqual(self.buffer.pending([self.session.pk, healthy.pk]), {})
+        self.assertEqual(self.buffer.dead_letters(self.session.pk)[1]['user_answer'], 'poison')
+
+
+@mock.patch('assessments.answer_buffer.start_answer_flusher')
+class WriteBehindTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_answer_buffer()
+        self.addCleanup(reset_answer_buffer)
+
+    @override_settings(ASSESSMENT_WRITE_BEHIND={'ENABLED': True})
+    def test_stays_off_without_a_shared_cache(self, start_flusher):
+        self.assertIsNone(get_answer_buffer())
+        start_flusher.assert_not_called()
+
+    @override_settings(ASSESSMENT_WRITE_BEHIND={'ENABLED': True, 'SINGLE_PROCESS': True})
+    def test_buffered_answer_is_visible_to_readers(self, start_flusher):
+        session = make_session(session_id='s-1')
+        client = APIClient()
+        client.force_authenticate(session.user)
+
+        saved = client.post('/api/assessments/sessions/save_answer/', {
+            'session_id': 's-1', 'question_number': 1, 'question_text': 'Question 1', 'user_answer': 'yes',
+        }, format='json').data
+        self.assertEqual((saved['question_id'], saved['buffered']), (None, True))
+        self.assertNotIn('questions_answered', saved)
+
+        detail = client.get(f'/api/assessments/sessions/{session.pk}/').data
+        self.assertEqual([q['user_answer'] for q in detail['questions']], ['yes'])
+
+    @override_settings(ASSESSMENT_WRITE_BEHIND={'ENABLED': True, 'SINGLE_PROCESS': True, 'MAX_ATTEMPTS': 1})
+    def test_complete_refuses_a_session_with_dead_lettered_answers(self, start_flusher):
+        session = make_session(session_id='s-1')
+        client = APIClient()
+        client.force_authenticate(session.user)
+        client.post('/api/assessments/sessions/save_answer/', {
+            'session_id': 's-1', 'question_number': 1, 'question_text': 'Question 1', 'user_answer': 'yes',
+        }, format='json')
+
+        with mock.patch('assessments.answer_buffer.upsert_answers', side_effect=ValueError('cannot write')):
+            response = client.post('/api/assessments/sessions/complete/', {'session_id': 's-1'}, format='json')
+
+        self.assertEqual(response.status_code, 409)
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'in_progress')
+
+    @override_settings(ASSESSMENT_WRITE_BEHIND={'ENABLED': True, 'SINGLE_PROCESS': True})
+    def test_complete_asks_for_a_retry_while_answers_fail_to_write(self, start_flusher):
+        session = make_session(session_id='s-1')
+        client = APIClient()
+        client.force_authenticate(session.user)
+        client.post('/api/assessments/sessions/save_answer/', {
+            'session_id': 's-1', 'question_number': 1, 'question_text': 'Question 1', 'user_answer': 'yes',
+        }, format='json')
+
+        with mock.patch('assessments.answer_buffer.upsert_answers', side_effect=ValueError('cannot write')):
+            response = client.post('/api/assessments/sessions/complete/', {'session_id': 's-1'}, format='json')
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '1'))
+
+        response = client.post('/api/assessments/sessions/complete/', {'session_id': 's-1'}, format='json')
+        self.assertEqual((response.status_code, response.data['total_questions']), (200, 1))
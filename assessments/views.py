@@ -4,30 +4,49 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Count, Avg, Q
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 import uuid
 
+from backend.fieldsets import SparseFieldsetViewMixin
+from backend.pagination import KeysetCursorPagination, paginated_response
+from recommendations.matching import match_careers
+from users.models import UserProfile
+
 from .models import (
     AssessmentSession, AssessmentQuestion, AssessmentResult,
     CareerRecommendationHistory, AssessmentFeedback
 )
 from .serializers import (
     AssessmentSessionSerializer, AssessmentSessionListSerializer,
+    AssessmentSessionDetailSerializer,
     AssessmentQuestionSerializer, AssessmentResultSerializer,
     CareerRecommendationHistorySerializer, AssessmentFeedbackSerializer,
     StartAssessmentSerializer, SaveQuestionAnswerSerializer,
-    CompleteAssessmentSerializer
+    SaveQuestionAnswersSerializer, CompleteAssessmentSerializer
+)
+from .answer_buffer import (
+    AnswerBufferBusy, flush_sessions, flush_user_sessions, get_answer_buffer, has_dead_letters
+)
+from .archive import session_questions
+from .services import complete_assessment, upsert_answers
+from .statistics import (
+    adjust_statistics, get_statistics, rebuild_statistics, record_session_started
 )
 
 
-class AssessmentSessionViewSet(viewsets.ModelViewSet):
+class AssessmentSessionViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing assessment sessions
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
-        queryset = AssessmentSession.objects.filter(user=self.request.user)
+        queryset = AssessmentSession.objects.filter(
+            user=self.request.user
+        ).select_related('user')
         
         # Filter by status if provided
         status_filter = self.request.query_params.get('status', None)
@@ -39,19 +58,32 @@ class AssessmentSessionViewSet(viewsets.ModelViewSet):
         if type_filter:
             queryset = queryset.filter(session_type=type_filter)
         
-        # Add counts for optimization
-        queryset = queryset.annotate(
-            question_count=Count('questions'),
-            recommendation_count=Count('career_recommendations')
-        )
-        
         return queryset
     
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Read-your-writes: buffered answers are written before anything is read
+        if request.method == 'GET' and get_answer_buffer() is not None:
+            pk = kwargs.get('pk')
+            if pk is None:
+                flush_user_sessions(request.user)
+            elif str(pk).isdigit():
+                flush_sessions([int(pk)])
+    
     def get_serializer_class(self):
         if self.action == 'list':
             return AssessmentSessionListSerializer
         return AssessmentSessionSerializer
     
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # Direct edits may change status or timing; recount rather than guess
+        rebuild_statistics([self.request.user.pk])
+    
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        rebuild_statistics([self.request.user.pk])
+    
     @action(detail=False, methods=['post'])
     def start(self, request):
         """Start a new assessment session"""
@@ -66,6 +98,7 @@ class AssessmentSessionViewSet(viewsets.ModelViewSet):
             ip_address=self.get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', '')
         )
+        record_session_started(session)
         
         return Response({
             'success': True,
@@ -89,26 +122,67 @@ class AssessmentSessionViewSet(viewsets.ModelViewSet):
             user=request.user
         )
         
-        # Create or update question
-        question, created = AssessmentQuestion.objects.update_or_create(
-            session=session,
-            question_number=data['question_number'],
-            defaults={
-                'question_text': data['question_text'],
-                'question_type': data.get('question_type', 'multiple_choice'),
-                'options': data.get('options', []),
-                'user_answer': data['user_answer'],
-                'answer_metadata': data.get('answer_metadata', {}),
-                'answered_at': timezone.now()
-            }
-        )
+        defaults = {
+            'question_text': data['question_text'],
+            'question_type': data.get('question_type', 'multiple_choice'),
+            'options': data.get('options', []),
+            'user_answer': data['user_answer'],
+            'answer_metadata': data.get('answer_metadata', {}),
+            'answered_at': timezone.now()
+        }
         
-        # Update session progress
-        session.questions_answered = AssessmentQuestion.objects.filter(
-            session=session,
-            user_answer__isnull=False
-        ).count()
-        session.save(update_fields=['questions_answered'])
+        # Write-behind: buffer the answer and let the flusher write it
+        buffer = get_answer_buffer()
+        if buffer is not None:
+            try:
+                pending = buffer.add(session.pk, data['question_number'], defaults)
+                # The row is written by the flusher, so there is no question id yet
+                return Response({
+                    'success': True,
+                    'message': 'Answer saved successfully',
+                    'question_id': None,
+                    'buffered': True,
+                    'pending_answers': pending
+                })
+            except AnswerBufferBusy:
+                pass
+        # Earlier buffered answers must not land after this one
+        if flush_sessions([session.pk]):
+            session.refresh_from_db(fields=['total_questions', 'questions_answered'])
+        
+        with transaction.atomic():
+            # Create or update question, noting whether it was answered before
+            question = AssessmentQuestion.objects.select_for_update().filter(
+                session=session,
+                question_number=data['question_number']
+            ).first()
+            created = question is None
+            if created:
+                try:
+                    with transaction.atomic():
+                        question = AssessmentQuestion.objects.create(
+                            session=session,
+                            question_number=data['question_number'],
+                            **defaults
+                        )
+                except IntegrityError:
+                    # A concurrent first save inserted the row; update that one
+                    question = AssessmentQuestion.objects.select_for_update().get(
+                        session=session,
+                        question_number=data['question_number']
+                    )
+                    created = False
+            newly_answered = created or question.user_answer is None
+            if not created:
+                for field, value in defaults.items():
+                    setattr(question, field, value)
+                question.save(update_fields=list(defaults))
+            
+            # Update session progress
+            session.increment_counters(
+                total_questions=int(created),
+                questions_answered=int(newly_answered)
+            )
         
         return Response({
             'success': True,
@@ -117,6 +191,49 @@ class AssessmentSessionViewSet(viewsets.ModelViewSet):
             'questions_answered': session.questions_answered
         })
     
+    @action(detail=False, methods=['post'])
+    def save_answers(self, request):
+        """Save a batch of answers in one request"""
+        serializer = SaveQuestionAnswersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        data = serializer.validated_data
+        
+        session = get_object_or_404(
+            AssessmentSession,
+            session_id=data['session_id'],
+            user=request.user
+        )
+        
+        if flush_sessions([session.pk]):
+            session.refresh_from_db(fields=['total_questions', 'questions_answered'])
+        
+        answered_at = timezone.now()
+        questions = [
+            AssessmentQuestion(
+                session=session,
+                question_number=answer['question_number'],
+                question_text=answer['question_text'],
+                question_type=answer.get('question_type', 'multiple_choice'),
+                options=answer.get('options', []),
+                user_answer=answer['user_answer'],
+                answer_metadata=answer.get('answer_metadata', {}),
+                answered_at=answered_at
+            )
+            for answer in data['answers']
+        ]
+        
+        counters = upsert_answers(questions).get(session.pk, {})
+        for field, delta in counters.items():
+            setattr(session, field, getattr(session, field) + delta)
+        
+        return Response({
+            'success': True,
+            'message': f'{len(questions)} answers saved successfully',
+            'answers_saved': len(questions),
+            'questions_answered': session.questions_answered
+        })
+    
     @action(detail=False, methods=['post'])
     def complete(self, request):
         """Complete an assessment session"""
@@ -132,36 +249,35 @@ class AssessmentSessionViewSet(viewsets.ModelViewSet):
             user=request.user
         )
         
-        # Save recommendations if provided
-        if 'recommendations' in data and data['recommendations']:
-            session.recommendations = data['recommendations']
-            
-            # Also save to CareerRecommendationHistory
-            for rec in data['recommendations']:
-                CareerRecommendationHistory.objects.create(
-                    session=session,
-                    career_title=rec.get('title', ''),
-                    match_percentage=rec.get('match_percentage', 0),
-                    description=rec.get('description', ''),
-                    required_skills=rec.get('required_skills', []),
-                    salary_range=rec.get('salary_range', ''),
-                    growth_potential=rec.get('growth_potential', '')
-                )
-        
-        # Update confidence score if provided
-        if 'ai_confidence_score' in data:
-            session.ai_confidence_score = data['ai_confidence_score']
-        
-        # Mark as completed
-        session.mark_completed()
-        
-        # Create result summary
-        result, created = AssessmentResult.objects.get_or_create(
-            session=session,
-            defaults={
-                'top_career_matches': data.get('recommendations', [])[:3],
-                'confidence_score': data.get('ai_confidence_score', 0.8)
-            }
+        # Buffered answers are part of the completed session
+        flush_error = None
+        try:
+            if flush_sessions([session.pk]):
+                session.refresh_from_db(fields=['total_questions', 'questions_answered'])
+        except Exception as e:
+            print(f"Flushing buffered answers of session {session.pk} failed: {e}")
+            flush_error = e
+        if has_dead_letters(session.pk):
+            return Response(
+                {'error': 'Some answers of this assessment could not be saved'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if flush_error is not None:
+            return Response(
+                {'error': 'Answers are still being saved; please try again'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
+        
+        # Quick sessions without client-side results are matched locally (no AI call)
+        if session.session_type == 'quick' and not data.get('recommendations'):
+            data['recommendations'] = self.get_local_recommendations(request.user)
+        
+        # Save history, session and result summary in one transaction
+        complete_assessment(
+            session,
+            recommendations=data.get('recommendations'),
+            ai_confidence_score=data.get('ai_confidence_score')
         )
         
         return Response({
@@ -169,8 +285,8 @@ class AssessmentSessionViewSet(viewsets.ModelViewSet):
             'message': 'Assessment completed successfully',
             'session_id': session.session_id,
             'duration_seconds': session.duration_seconds,
-            'total_questions': session.questions.count(),
-            'recommendations_count': session.career_recommendations.count()
+            'total_questions': session.total_questions,
+            'recommendations_count': session.recommendations_count
         })
     
     @action(detail=True, methods=['get'])
@@ -183,34 +299,46 @@ class AssessmentSessionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get user's assessment statistics"""
-        sessions = AssessmentSession.objects.filter(user=request.user)
-        
-        stats = {
-            'total_assessments': sessions.count(),
-            'completed_assessments': sessions.filter(status='completed').count(),
-            'in_progress_assessments': sessions.filter(status='in_progress').count(),
-            'average_duration': sessions.filter(
-                status='completed',
-                duration_seconds__isnull=False
-            ).aggregate(Avg('duration_seconds'))['duration_seconds__avg'],
-            'total_recommendations': CareerRecommendationHistory.objects.filter(
-                session__user=request.user
-            ).count(),
-            'most_recent_assessment': None
-        }
+        stats = get_statistics(request.user)
         
-        # Get most recent assessment
-        recent = sessions.order_by('-created_at').first()
-        if recent:
-            stats['most_recent_assessment'] = {
-                'id': recent.id,
-                'session_id': recent.session_id,
-                'date': recent.created_at,
-                'status': recent.status,
-                'type': recent.session_type
+        most_recent = None
+        if stats.most_recent_session_id:
+            most_recent = {
+                'id': stats.most_recent_session_id,
+                'session_id': stats.most_recent_session_key,
+                'date': stats.most_recent_created_at,
+                'status': stats.most_recent_status,
+                'type': stats.most_recent_session_type
             }
         
-        return Response(stats)
+        return Response({
+            'total_assessments': stats.total_assessments,
+            'completed_assessments': stats.completed_assessments,
+            'in_progress_assessments': stats.in_progress_assessments,
+            'average_duration': stats.average_duration,
+            'total_recommendations': stats.total_recommendations,
+            'most_recent_assessment': most_recent
+        })
+    
+    def get_local_recommendations(self, user):
+        """Career matches from the local engine, shaped like client recommendations"""
+        profile = UserProfile.objects.filter(user=user).first()
+        if profile is None:
+            return []
+        
+        recommendations = []
+        for match in match_careers(profile, limit=5):
+            description = f"{match['name']} ({match['industry']})"
+            if match['suggested_stage']:
+                description += f", starting as {match['suggested_stage']}"
+            recommendations.append({
+                'title': match['name'],
+                'match_percentage': match['match_percentage'],
+                'description': description,
+                'required_skills': match['missing_skills'] + match['matched_skills'],
+                'growth_potential': match['growth_outlook'],
+            })
+        return recommendations
     
     def get_client_ip(self, request):
         """Get client IP address from request"""
@@ -222,32 +350,58 @@ class AssessmentSessionViewSet(viewsets.ModelViewSet):
         return ip
 
 
-class AssessmentHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class AssessmentHistoryViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing assessment history
     """
-    serializer_class = AssessmentSessionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ('-completed_at', '-id')
     
     def get_queryset(self):
-        return AssessmentSession.objects.filter(
+        queryset = AssessmentSession.objects.filter(
             user=self.request.user,
             status='completed'
-        ).prefetch_related(
-            'questions',
-            'career_recommendations',
-            'result'
         ).order_by('-completed_at')
+        
+        if self.action in self.fieldset_actions:
+            # Columns and joins follow the serializer (see filter_queryset)
+            return queryset
+        # Sub-resources only need the session to exist
+        return queryset.only('id', 'transcript_archived')
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return AssessmentSessionListSerializer
+        return AssessmentSessionDetailSerializer
+    
+    @action(detail=True, methods=['get'])
+    def questions(self, request, pk=None):
+        """Get the questions and answers of a specific assessment, one page at a time"""
+        session = self.get_object()
+        if session.transcript_archived:
+            # Archived transcripts are read back whole, so return them in one page
+            serializer = AssessmentQuestionSerializer(
+                session_questions(session), many=True, context={'request': request}
+            )
+            return Response({'next': None, 'previous': None, 'results': serializer.data})
+        return paginated_response(
+            request,
+            AssessmentQuestion.objects.filter(session=session),
+            AssessmentQuestionSerializer,
+            ordering=('question_number', 'id')
+        )
     
     @action(detail=True, methods=['get'])
     def recommendations(self, request, pk=None):
-        """Get recommendations from a specific assessment"""
+        """Get recommendations from a specific assessment, one page at a time"""
         session = self.get_object()
-        recommendations = session.career_recommendations.all()
-        serializer = CareerRecommendationHistorySerializer(
-            recommendations, many=True
+        return paginated_response(
+            request,
+            CareerRecommendationHistory.objects.filter(session=session),
+            CareerRecommendationHistorySerializer,
+            ordering=('-match_percentage', 'id')
         )
-        return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
     def feedback(self, request, pk=None):
@@ -276,18 +430,26 @@ class AssessmentHistoryViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
-class CareerRecommendationViewSet(viewsets.ModelViewSet):
+class CareerRecommendationViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing career recommendations from assessments
     """
     serializer_class = CareerRecommendationHistorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         return CareerRecommendationHistory.objects.filter(
             session__user=self.request.user
         ).select_related('session')
     
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+            instance.session.increment_counters(recommendations_count=-1)
+            adjust_statistics(self.request.user.pk, {'total_recommendations': -1})
+    
     @action(detail=True, methods=['post'])
     def mark_viewed(self, request, pk=None):
         """Mark a recommendation as viewed"""
@@ -0,0 +1,190 @@
+"""
+Sparse fieldsets for API responses.
+
+``?fields=id,status,career_path.name`` limits a response to the named
+fields; a dotted name selects fields of a nested object and implies its
+expansion. ``?expand=questions,result`` names the nested objects to render
+(serializers list them in ``Meta.expandable_fields``): when ``expand`` is
+present, nested objects that are not named are dropped, or collapsed to
+their primary key for forward relations. Without either parameter a
+serializer renders its usual shape.
+
+Views using ``SparseFieldsetViewMixin`` also shape the queryset to the
+requested response: only the columns behind the rendered fields are loaded
+and only the rendered relations are joined or prefetched.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def parse_fields(value):
+    """'id,career_path.name' -> {'id': {}, 'career_path': {'name': {}}}"""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def requested_shape(request):
+    """Return ``(fields, expand)`` from the query string; None means not given"""
+    params = request.query_params
+    fields = parse_fields(params['fields']) if 'fields' in params else None
+    expand = set(parse_fields(params['expand'])) if 'expand' in params else None
+    return fields or None, expand
+
+
+def _nested(field):
+    field = getattr(field, 'child', field)
+    return field if isinstance(field, serializers.BaseSerializer) else None
+
+
+def apply_fieldset(serializer, fields=None, expand=None):
+    """Drop the fields of ``serializer`` (and its nested serializers) not requested"""
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+
+    if expand is not None:
+        for name in getattr(serializer.Meta, 'expandable_fields', ()):
+            if name in expand or (fields and name in fields) or name not in serializer.fields:
+                continue
+            source = serializer.fields[name].source
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is not None and model_field.concrete and model_field.is_relation:
+                options = {'source': source} if source != name else {}
+                serializer.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, **options
+                )
+            else:
+                serializer.fields.pop(name)
+
+    if fields:
+        for name in list(serializer.fields):
+            if name not in fields:
+                serializer.fields.pop(name)
+        for name, subfields in fields.items():
+            nested = _nested(serializer.fields[name]) if name in serializer.fields else None
+            if subfields and nested is not None:
+                apply_fieldset(nested, subfields)
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin that honours ``?fields=`` and ``?expand=`` on GET requests"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        fields, expand = requested_shape(request)
+        if fields is not None or expand is not None:
+            apply_fieldset(self, fields, expand)
+
+
+def plan_query(serializer, model, prefix=''):
+    """Work out what a queryset must load to render ``serializer``.
+
+    Returns ``(only, select_related, prefetch)``; ``only`` is None when some
+    field reads something other than a model column (a property or method),
+    in which case no columns can safely be deferred.
+    """
+    only, select, prefetch = {prefix + model._meta.pk.name}, set(), []
+    deferrable = True
+
+    for field in serializer.fields.values():
+        if isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            deferrable = False
+            continue
+
+        current, path = model, prefix
+        attrs = field.source_attrs
+        for position, attr in enumerate(attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                deferrable = False
+                break
+
+            last = position == len(attrs) - 1
+            nested = _nested(field) if last else None
+            if not model_field.is_relation:
+                only.add(path + attr)
+                break
+            if model_field.many_to_many or model_field.one_to_many:
+                if nested is None:
+                    deferrable = False
+                    break
+                related = model_field.related_model
+                child_only, child_select, child_prefetch = plan_query(nested, related)
+                if child_only is not None and model_field.one_to_many:
+                    child_only.add(model_field.field.name)
+                queryset = related.objects.all()
+                if child_select:
+                    queryset = queryset.select_related(*child_select)
+                if child_prefetch:
+                    queryset = queryset.prefetch_related(*child_prefetch)
+                if child_only is not None:
+                    queryset = queryset.only(*child_only)
+                prefetch.append(Prefetch(path + attr, queryset=queryset))
+                break
+            if last and nested is None:
+                # Rendered as a primary key; the foreign key column is enough
+                if model_field.concrete:
+                    only.add(path + attr)
+                else:
+                    deferrable = False
+                break
+
+            select.add(path + attr)
+            if model_field.concrete:
+                only.add(path + attr)
+            if nested is not None:
+                child_only, child_select, child_prefetch = plan_query(
+                    nested, model_field.related_model, prefix=f'{path}{attr}__'
+                )
+                if child_only is None:
+                    deferrable = False
+                else:
+                    only |= child_only
+                select |= child_select
+                prefetch.extend(child_prefetch)
+                break
+            current = model_field.related_model
+            path = f'{path}{attr}__'
+            only.add(path + current._meta.pk.name)
+
+    return (only if deferrable else None), select, prefetch
+
+
+class SparseFieldsetViewMixin:
+    """View mixin that loads only what the (sparse) serializer will render.
+
+    Applies to the ``list`` and ``retrieve`` actions; other actions get the
+    view's queryset unchanged.
+    """
+    fieldset_actions = ('list', 'retrieve')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.fieldset_actions:
+            return queryset
+
+        only, select, prefetch = plan_query(_nested(self.get_serializer()), queryset.model)
+        # The plan replaces whatever the view joined for its default shape
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if only is not None:
+            # Pagination reads the ordering columns back from the last row
+            ordering = getattr(self, 'cursor_ordering', None) or ()
+            only |= {name.lstrip('-') for name in ordering}
+            queryset = queryset.only(*only)
+        return queryset
@@ -0,0 +1,136 @@
+"""
+Idempotency-Key support for unsafe API requests.
+
+A client that sends ``Idempotency-Key: <unique value>`` with a POST, PUT,
+PATCH or DELETE gets the stored response of the first request with that key
+(per user) for ``TTL`` seconds instead of running the view again, headers
+and cookies included. Reusing a key with a different request body is
+rejected with 422.
+
+A duplicate that arrives while the first request is still running is not
+replayed: it gets 409 with ``Retry-After`` straight away, deliberately, so
+it doesn't tie up a worker polling for the result. Retrying after that
+gets the stored response.
+
+Responses are kept in a Django cache (``ALIAS``); use a shared backend such
+as Redis so that retries landing on another worker are recognised. Only
+successful (2xx) and redirect (3xx) responses are stored; after a 4xx or
+5xx the client can fix the request or retry it under the same key. Streaming
+responses are generated after the view returns, outside the key's lock, so
+a key sent to a streaming endpoint is refused with 400 before the stream
+starts.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+DEFAULT_IDEMPOTENCY_SETTINGS = {
+    'ALIAS': 'default',
+    'TTL': 24 * 3600,
+    'LOCK_TIMEOUT': 120,
+    'PATH_PREFIX': '/api/',
+}
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def get_idempotency_settings():
+    return {**DEFAULT_IDEMPOTENCY_SETTINGS, **getattr(settings, 'IDEMPOTENCY', {})}
+
+
+def _authenticated_user_id(request):
+    """The API user behind the request, using the DRF authenticators (e.g. JWT)"""
+    if getattr(request, 'user', None) is not None and request.user.is_authenticated:
+        return request.user.pk
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        user = drf_request.user
+    except Exception:
+        return None
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+class IdempotencyMiddleware:
+    prefix = 'idempotency'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = request.META.get(HEADER)
+        config = get_idempotency_settings()
+        if (not key or request.method not in UNSAFE_METHODS
+                or not request.path.startswith(config['PATH_PREFIX'])):
+            return self.get_response(request)
+
+        user_id = _authenticated_user_id(request)
+        if user_id is None:
+            return self.get_response(request)
+
+        scope = hashlib.sha256(
+            f'{user_id}:{request.method}:{request.path}:{key}'.encode('utf-8')
+        ).hexdigest()
+        result_key = f'{self.prefix}:result:{scope}'
+        lock_key = f'{self.prefix}:lock:{scope}'
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        cache = caches[config['ALIAS']]
+
+        stored = cache.get(result_key)
+        if stored is not None:
+            return self._replay(stored, fingerprint)
+        token = uuid.uuid4().hex
+        if not cache.add(lock_key, token, timeout=config['LOCK_TIMEOUT']):
+            # The first request may have finished since we looked
+            stored = cache.get(result_key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+            return JsonResponse(
+                {'error': 'A request with this Idempotency-Key is still being processed.'},
+                status=409,
+                headers={'Retry-After': '1'}
+            )
+
+        try:
+            response = self.get_response(request)
+            if response.streaming:
+                # The body would be produced after the lock is released
+                response.close()
+                return JsonResponse(
+                    {'error': 'Idempotency-Key is not supported for streaming responses.'},
+                    status=400
+                )
+            if 200 <= response.status_code < 400:
+                cache.set(result_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'content': response.content,
+                    'headers': list(response.items()),
+                    'cookies': response.cookies,
+                }, timeout=config['TTL'])
+            return response
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    def _replay(self, stored, fingerprint):
+        if stored['fingerprint'] != fingerprint:
+            return JsonResponse(
+                {'error': 'This Idempotency-Key was already used with a different request body.'},
+                status=422
+            )
+        response = HttpResponse(stored['content'], status=stored['status'])
+        for header, value in stored['headers']:
+            response[header] = value
+        response.cookies = stored['cookies']
+        response['Idempotent-Replayed'] = 'true'
+        return response
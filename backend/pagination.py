@@ -0,0 +1,34 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Opaque cursor pagination that walks an indexed ordering.
+
+    Views choose the ordering with a ``cursor_ordering`` attribute (the
+    leading field should match an index that starts with the user column);
+    ``?page_size=`` is honoured up to ``max_page_size``. The cursor keys on
+    the leading field only: rows tied on it are skipped with an offset, so
+    end the ordering with a unique field (``-id``) to keep ties in a stable
+    order between pages.
+    """
+    page_size = getattr(settings, 'API_PAGE_SIZE', 25)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering is None:
+            return super().get_ordering(request, queryset, view)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+
+def paginated_response(request, queryset, serializer_class, ordering):
+    """Cursor-paginated response for a queryset outside the view's own list"""
+    paginator = KeysetCursorPagination()
+    paginator.ordering = ordering
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(
+        serializer_class(page, many=True, context={'request': request}).data
+    )
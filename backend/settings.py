@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 # Use PyMySQL as MySQLdb replacement for better compatibility
 try:
@@ -83,6 +84,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'backend.idempotency.IdempotencyMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -189,6 +191,114 @@ REST_FRAMEWORK = {
     )
 }
 
+# Cursor pagination for per-user list endpoints (see backend.pagination)
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '25'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))
+
+# Gemini recommendation cache, keyed by a hash of the prompt-relevant profile fields.
+# BACKEND is 'local' (per-process LRU) or 'django' (the CACHES alias named by ALIAS).
+AI_RECOMMENDATION_CACHE = {
+    'BACKEND': os.getenv('AI_CACHE_BACKEND', 'local'),
+    'ALIAS': os.getenv('AI_CACHE_ALIAS', 'default'),
+    'TTL': int(os.getenv('AI_CACHE_TTL', '86400')),
+    'MAX_ENTRIES': int(os.getenv('AI_CACHE_MAX_ENTRIES', '1024')),
+}
+
+# Circuit breaker around Gemini calls. Calls slower than LATENCY_BUDGET seconds count as
+# failures; while open, requests get the fallback recommendations immediately. Streamed
+# calls are timed to their first chunk and may run for STREAM_TIMEOUT seconds in total.
+AI_CIRCUIT_BREAKER = {
+    'LATENCY_BUDGET': float(os.getenv('AI_LATENCY_BUDGET', '8')),
+    'FAILURE_RATE': float(os.getenv('AI_BREAKER_FAILURE_RATE', '0.5')),
+    'MIN_CALLS': int(os.getenv('AI_BREAKER_MIN_CALLS', '5')),
+    'WINDOW': int(os.getenv('AI_BREAKER_WINDOW', '20')),
+    'OPEN_SECONDS': int(os.getenv('AI_BREAKER_OPEN_SECONDS', '30')),
+    'STREAM_TIMEOUT': float(os.getenv('AI_STREAM_TIMEOUT', '120')),
+}
+
+# Concurrent generations for the same user and profile share one Gemini call. Across
+# workers this uses a lock in the shared cache (when the recommendation cache is 'django').
+AI_SINGLE_FLIGHT = {
+    'LOCK_TIMEOUT': int(os.getenv('AI_FLIGHT_LOCK_TIMEOUT', '120')),
+    'WAIT_TIMEOUT': int(os.getenv('AI_FLIGHT_WAIT_TIMEOUT', '90')),
+}
+
+# Asynchronous recommendation generation (POST /api/generate-recommendations/?async=true).
+# EXECUTOR is 'thread' (bounded pool inside each web worker) or 'db' (jobs are run by
+# `manage.py process_recommendation_jobs --loop`). Run that command with either executor to
+# requeue jobs still 'running' STALE_AFTER seconds after a worker claimed them.
+AI_GENERATION_JOBS = {
+    'ASYNC_DEFAULT': os.getenv('AI_ASYNC_DEFAULT', 'False').lower() == 'true',
+    'EXECUTOR': os.getenv('AI_JOB_EXECUTOR', 'thread'),
+    'MAX_WORKERS': int(os.getenv('AI_JOB_MAX_WORKERS', '2')),
+    'MAX_PENDING': int(os.getenv('AI_JOB_MAX_PENDING', '32')),
+    'STALE_AFTER': int(os.getenv('AI_JOB_STALE_AFTER', '600')),
+    'MAX_ATTEMPTS': int(os.getenv('AI_JOB_MAX_ATTEMPTS', '3')),
+}
+
+# Idempotency-Key handling for unsafe /api/ requests (backend.idempotency): the first
+# response per user and key is stored in the ALIAS cache for TTL seconds and replayed;
+# duplicates arriving while it runs get 409.
+IDEMPOTENCY = {
+    'ALIAS': os.getenv('IDEMPOTENCY_CACHE_ALIAS', 'default'),
+    'TTL': int(os.getenv('IDEMPOTENCY_TTL', '86400')),
+}
+
+# Career catalog snapshot served by /api/career-paths/: each worker checks the catalog version
+# at most every CHECK_INTERVAL seconds and re-renders the snapshot only when it changed.
+CAREER_CATALOG = {
+    'CHECK_INTERVAL': float(os.getenv('CAREER_CATALOG_CHECK_INTERVAL', '30')),
+}
+
+# In-process BM25 search index behind /api/career-paths/search/ and autocomplete/, re-synced
+# with the catalog (only changed rows) at most every CHECK_INTERVAL seconds.
+CAREER_SEARCH = {
+    'CHECK_INTERVAL': float(os.getenv('CAREER_SEARCH_CHECK_INTERVAL', '30')),
+}
+
+# Cached dashboard insights (/api/insights/), kept per user in the CACHES alias named by
+# ALIAS for TTL seconds and dropped whenever recommendations, progress or the profile change.
+# The alias must be shared by every worker (Redis); a LocMem cache is only used when
+# INSIGHTS_SINGLE_PROCESS=true, otherwise insights are read from the database each time.
+USER_INSIGHTS = {
+    'ALIAS': os.getenv('INSIGHTS_CACHE_ALIAS', 'default'),
+    'TTL': int(os.getenv('INSIGHTS_CACHE_TTL', '300')),
+    'SINGLE_PROCESS': os.getenv('INSIGHTS_SINGLE_PROCESS', 'False').lower() == 'true',
+}
+
+# Stale assessment sweeper: in-progress sessions idle for IDLE_HOURS are marked abandoned,
+# BATCH_SIZE rows per UPDATE. Run `manage.py sweep_stale_sessions` from cron, or set
+# ASSESSMENT_SWEEPER_IN_PROCESS=true to sweep every INTERVAL seconds inside gunicorn workers.
+ASSESSMENT_SWEEPER = {
+    'IDLE_HOURS': float(os.getenv('ASSESSMENT_IDLE_HOURS', '24')),
+    'BATCH_SIZE': int(os.getenv('ASSESSMENT_SWEEP_BATCH_SIZE', '500')),
+    'INTERVAL': int(os.getenv('ASSESSMENT_SWEEP_INTERVAL', '3600')),
+}
+
+# Cold storage for old assessment transcripts (`manage.py archive_assessment_transcripts`).
+# Segments go to LOCATION on local disk, or to the STORAGES alias named by STORAGE
+# (e.g. an S3 backend from django-storages) when it is set.
+ASSESSMENT_ARCHIVE = {
+    'AFTER_DAYS': int(os.getenv('ASSESSMENT_ARCHIVE_AFTER_DAYS', '90')),
+    'BATCH_SIZE': int(os.getenv('ASSESSMENT_ARCHIVE_BATCH_SIZE', '200')),
+    'LOCATION': os.getenv('ASSESSMENT_ARCHIVE_DIR', str(BASE_DIR / 'archive')),
+    'STORAGE': os.getenv('ASSESSMENT_ARCHIVE_STORAGE'),
+}
+
+# Write-behind for POST /api/assessments/sessions/save_answer/: answers are buffered and
+# upserted in batches every FLUSH_INTERVAL seconds. BACKEND is 'django' (the CACHES alias named
+# by ALIAS, which must be shared by all workers, e.g. Redis) or 'local'. A per-process store
+# ('local' or a LocMemCache alias) keeps write-behind off unless SINGLE_PROCESS is set.
+ASSESSMENT_WRITE_BEHIND = {
+    'ENABLED': os.getenv('ASSESSMENT_WRITE_BEHIND', 'False').lower() == 'true',
+    'BACKEND': os.getenv('ASSESSMENT_WRITE_BEHIND_BACKEND', 'django'),
+    'ALIAS': os.getenv('ASSESSMENT_WRITE_BEHIND_ALIAS', 'default'),
+    'SINGLE_PROCESS': os.getenv('ASSESSMENT_WRITE_BEHIND_SINGLE_PROCESS', 'False').lower() == 'true',
+    'FLUSH_INTERVAL': float(os.getenv('ASSESSMENT_FLUSH_INTERVAL', '1.0')),
+    'BATCH_SIZE': int(os.getenv('ASSESSMENT_FLUSH_BATCH_SIZE', '500')),
+    'MAX_ATTEMPTS': int(os.getenv('ASSESSMENT_FLUSH_MAX_ATTEMPTS', '5')),
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # For development only
 CORS_ALLOWED_ORIGINS = [
@@ -202,6 +312,8 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Django Sites Framework
 SITE_ID = 1
@@ -139,6 +139,10 @@ if os.getenv('REDIS_URL'):
             }
         }
     }
+    # Share cached AI recommendations across workers
+    AI_RECOMMENDATION_CACHE['BACKEND'] = os.getenv('AI_CACHE_BACKEND', 'django')
+    # Buffered answers survive a worker restart and can be flushed by any worker
+    ASSESSMENT_WRITE_BEHIND['BACKEND'] = os.getenv('ASSESSMENT_WRITE_BEHIND_BACKEND', 'django')
 
 # AI Service Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+
+from .idempotency import IdempotencyMiddleware
+
+
+class IdempotencyMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw-123456')
+        self.factory = RequestFactory()
+
+    def post(self, body='{"a": 1}', key='key-1'):
+        request = self.factory.post(
+            '/api/things/', body, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key
+        )
+        request.user = self.user
+        return request
+
+    def created(self, request):
+        response = HttpResponse('{"id": 7}', status=201, content_type='application/json')
+        response['Location'] = '/api/things/7/'
+        response.set_cookie('seen', 'yes')
+        return response
+
+    def test_replays_status_body_headers_and_cookies(self):
+        view = mock.Mock(side_effect=self.created)
+        middleware = IdempotencyMiddleware(view)
+        middleware(self.post())
+
+        replay = middleware(self.post())
+
+        view.assert_called_once()
+        self.assertEqual((replay.status_code, replay.content), (201, b'{"id": 7}'))
+        self.assertEqual(replay['Location'], '/api/things/7/')
+        self.assertEqual(replay['Content-Type'], 'application/json')
+        self.assertEqual(replay.cookies['seen'].value, 'yes')
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+
+    def test_different_body_is_rejected(self):
+        middleware = IdempotencyMiddleware(self.created)
+        middleware(self.post())
+
+        self.assertEqual(middleware(self.post(body='{"a": 2}')).status_code, 422)
+
+    def test_duplicate_in_flight_gets_409_without_waiting(self):
+        def view(request):
+            duplicate = middleware(self.post())
+            self.assertEqual(duplicate.status_code, 409)
+            self.assertEqual(duplicate['Retry-After'], '1')
+            return self.created(request)
+
+        middleware = IdempotencyMiddleware(view)
+        with mock.patch('time.sleep') as sleep:
+            self.assertEqual(middleware(self.post()).status_code, 201)
+        sleep.assert_not_called()
+
+    def test_streaming_response_is_refused_before_it_starts(self):
+        produced = []
+
+        def events():
+            produced.append(1)
+            yield b'data: 1\n\n'
+
+        middleware = IdempotencyMiddleware(lambda request: StreamingHttpResponse(events()))
+        response = middleware(self.post())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(produced, [])
+        # Nothing was stored, so the key can be retried
+        self.assertEqual(middleware(self.post()).status_code, 400)
+
+    def test_server_errors_are_not_stored(self):
+        view = mock.Mock(return_value=HttpResponse(status=503))
+        middleware = IdempotencyMiddleware(view)
+        middleware(self.post())
+        middleware(self.post())
+
+        self.assertEqual(view.call_count, 2)
+
+    def test_client_errors_are_not_stored(self):
+        def view(request):
+            if request.body == b'{"a": 1}':
+                return JsonResponse({'a': ['invalid']}, status=400)
+            return self.created(request)
+
+        middleware = IdempotencyMiddleware(view)
+        self.assertEqual(middleware(self.post()).status_code, 400)
+
+        # The corrected body under the same key runs the view
+        self.assertEqual(middleware(self.post(body='{"a": 2}')).status_code, 201)
@@ -10,7 +10,8 @@ from users.social_auth_views import (
 )
 from recommendations.views import (
     RecommendationViewSet, CareerPathViewSet, UserCareerProgressViewSet,
-    generate_ai_recommendations, get_user_insights
+    generate_ai_recommendations, stream_ai_recommendations, recommendation_job_status,
+    get_user_insights, ai_service_health, record_interaction_events
 )
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -48,6 +49,7 @@ urlpatterns = [
     path('api/assessments/', include('assessments.urls')),
     path('api/health/', health_check, name='health_check'),
     path('api/db-health/', db_health_check, name='db_health_check'),
+    path('api/health/ai/', ai_service_health, name='ai_service_health'),
 ]
 
 
@@ -69,7 +71,10 @@ urlpatterns += [
     
     # AI recommendations and insights
     path('api/generate-recommendations/', generate_ai_recommendations, name='generate_recommendations'),
+    path('api/generate-recommendations/stream/', stream_ai_recommendations, name='stream_recommendations'),
+    path('api/generate-recommendations/jobs/<uuid:job_id>/', recommendation_job_status, name='recommendation_job_status'),
     path('api/insights/', get_user_insights, name='user_insights'),
+    path('api/events/', record_interaction_events, name='interaction_events'),
     
     # Django Allauth URLs (for traditional web authentication)
     path('accounts/', include('allauth.urls')),
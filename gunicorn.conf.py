@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration for PathFinder AI Career Advisor.
+
+Picked up automatically when gunicorn is started from the project root.
+"""
+
+import os
+
+
+def post_fork(server, worker):
+    # Open the Gemini connection once per worker, after the fork so that no
+    # gRPC channel is shared with the master process.
+    if os.getenv('GEMINI_WARM_ON_BOOT', 'False').lower() != 'true':
+        return
+    from recommendations.gemini_client import registry
+    if registry.warm_up():
+        server.log.info("Worker %s: Gemini client warmed up", worker.pid)
+
+
+def post_worker_init(worker):
+    # Django is loaded by now, so the stale-session sweeper can start here.
+    if os.getenv('ASSESSMENT_SWEEPER_IN_PROCESS', 'False').lower() != 'true':
+        return
+    from assessments.sweeper import start_sweeper_scheduler
+    start_sweeper_scheduler()
+    worker.log.info("Worker %s: assessment sweeper started", worker.pid)
+
+
+def worker_exit(server, worker):
+    # Write any answers still buffered in this worker (write-behind mode).
+    try:
+        from assessments.answer_buffer import flush_pending
+        flush_pending()
+    except Exception as e:
+        server.log.warning("Worker %s: answer buffer flush failed: %s", worker.pid, e)
@@ -64,7 +64,7 @@ export default function AssessmentHistory() {
 
       if (response.ok) {
         const data = await response.json();
-        setAssessments(data);
+        setAssessments(data.results);
       }
     } catch (error) {
       console.error('Error fetching assessments:', error);
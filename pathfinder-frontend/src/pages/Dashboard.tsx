@@ -116,7 +116,8 @@ export default function Dashboard() {
   const fetchRecommendations = async () => {
     try {
       const res = await client.get("recommendations/");
-      setRecommendations(res.data);
+      // Cursor-paginated: the first page holds the newest recommendations
+      setRecommendations(res.data.results);
     } catch (err) {
       console.error('Error fetching recommendations:', err);
     }
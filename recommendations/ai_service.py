@@ -1,16 +1,78 @@
-import os
 import json
-import google.generativeai as genai
+import time
 from django.conf import settings
 from users.models import UserProfile
+from .cache import get_recommendation_cache, profile_fingerprint
+from .circuit_breaker import CircuitOpenError, get_breaker_settings, get_gemini_breaker
+from .gemini_client import get_gemini_model
 
-# Configure Gemini AI
+# Configure Gemini AI (configured once per process and shared between requests)
 def configure_gemini():
-    api_key = os.getenv('GEMINI_API_KEY')
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY environment variable is not set")
-    genai.configure(api_key=api_key)
-    return genai.GenerativeModel('gemini-1.5-flash')
+    return get_gemini_model()
+
+class IncompleteResponseError(Exception):
+    """Raised after a streamed response that was cut off or held malformed objects"""
+
+
+class IncrementalRecommendationParser:
+    """Pull complete recommendation objects out of a streamed JSON response.
+
+    Objects are emitted as soon as their closing brace arrives, for both
+    ``{"recommendations": [...]}`` and bare ``[...]`` responses. Braces inside
+    strings are ignored. Objects that are not valid JSON are counted in
+    ``malformed``.
+    """
+    
+    def __init__(self):
+        self.text = ''
+        self.malformed = 0
+        self._pos = 0
+        self._containers = []
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+        self._item_depth = None
+    
+    def feed(self, chunk: str):
+        self.text += chunk
+        items = []
+        text = self.text
+        
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if char == '{' and self._item_start is None and self._containers[-1:] == ['[']:
+                    self._item_start = i
+                    self._item_depth = len(self._containers)
+                self._containers.append(char)
+            elif char in '}]' and self._containers:
+                self._containers.pop()
+                if self._item_start is not None and len(self._containers) == self._item_depth:
+                    try:
+                        items.append(json.loads(text[self._item_start:i + 1]))
+                    except json.JSONDecodeError:
+                        self.malformed += 1
+                    self._item_start = None
+        
+        self._pos = len(text)
+        return items
+    
+    @property
+    def complete(self):
+        """True once every opened object and array has been closed"""
+        return not self._containers and not self._in_string
+
 
 class CareerAdvisorAI:
     def __init__(self):
@@ -19,20 +81,101 @@ class CareerAdvisorAI:
     def generate_career_recommendations(self, user_profile: UserProfile):
         """Generate comprehensive career recommendations using Gemini AI"""
         
+        # Serve repeat requests for an unchanged profile from the cache
+        cache = get_recommendation_cache()
+        fingerprint = profile_fingerprint(user_profile)
+        cached = cache.get(fingerprint)
+        if cached is not None:
+            return cached
+        
         # Build detailed prompt based on user profile
         prompt = self._build_career_prompt(user_profile)
         
+        # Skip the upstream call entirely while Gemini is failing. Nothing
+        # may raise between allow() and record(), or a half-open trial
+        # would never be recorded.
+        breaker = get_gemini_breaker()
+        if not breaker.allow():
+            return self._generate_fallback_recommendations(user_profile)
+        
+        started = time.monotonic()
         try:
-            response = self.model.generate_content(prompt)
+            response = self.model.generate_content(
+                prompt, request_options={'timeout': breaker.latency_budget}
+            )
             recommendations_text = response.text
-            
-            # Parse AI response and structure recommendations
-            return self._parse_recommendations(recommendations_text, user_profile)
-            
         except Exception as e:
+            breaker.record(False)
             print(f"Error generating AI recommendations: {e}")
             # Fallback to structured recommendations if AI fails
             return self._generate_fallback_recommendations(user_profile)
+        breaker.record(True, latency=time.monotonic() - started)
+        
+        # Parse AI response and structure recommendations
+        recommendations = self._parse_recommendations(recommendations_text, user_profile)
+        if recommendations:
+            cache.set(fingerprint, recommendations)
+        return recommendations
+    
+    def stream_career_recommendations(self, user_profile: UserProfile):
+        """Yield recommendations one at a time while Gemini streams its response.
+
+        Errors propagate to the caller, which decides how to fall back. A
+        response that yielded recommendations but was cut off or held
+        malformed objects raises ``IncompleteResponseError`` at the end.
+        """
+        cache = get_recommendation_cache()
+        fingerprint = profile_fingerprint(user_profile)
+        cached = cache.get(fingerprint)
+        if cached is not None:
+            yield from cached
+            return
+        
+        prompt = self._build_career_prompt(user_profile)
+        parser = IncrementalRecommendationParser()
+        recommendations = []
+        
+        breaker = get_gemini_breaker()
+        if not breaker.allow():
+            raise CircuitOpenError("Gemini circuit is open")
+        
+        # The latency budget applies to the first chunk; a long answer that
+        # keeps streaming is healthy
+        started = time.monotonic()
+        first_chunk_latency = None
+        try:
+            stream = self.model.generate_content(
+                prompt, stream=True,
+                request_options={'timeout': get_breaker_settings()['STREAM_TIMEOUT']}
+            )
+            for chunk in stream:
+                if first_chunk_latency is None:
+                    first_chunk_latency = time.monotonic() - started
+                for recommendation in parser.feed(chunk.text):
+                    recommendations.append(recommendation)
+                    yield recommendation
+        except GeneratorExit:
+            # Client went away mid-stream; Gemini itself was responding
+            breaker.record(True, latency=first_chunk_latency)
+            raise
+        except Exception:
+            breaker.record(False)
+            raise
+        if first_chunk_latency is None:
+            first_chunk_latency = time.monotonic() - started
+        breaker.record(True, latency=first_chunk_latency)
+        
+        # Response wasn't JSON after all - fall back to the text heuristics
+        if not recommendations:
+            recommendations = self._parse_recommendations(parser.text, user_profile)
+            yield from recommendations
+        elif parser.malformed or not parser.complete:
+            raise IncompleteResponseError(
+                f"AI response was cut off or malformed ({parser.malformed} unreadable recommendation(s))"
+            )
+        
+        if recommendations:
+            cache.set(fingerprint, recommendations)
     
     def _build_career_prompt(self, profile: UserProfile):
         """Build comprehensive prompt for Gemini AI"""
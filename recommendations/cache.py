@@ -0,0 +1,178 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Bump when the prompt template or the parsed output shape changes so stale
+# entries are never served for a different prompt.
+PROMPT_VERSION = 1
+
+# Every profile attribute that _build_career_prompt reads
+FINGERPRINT_FIELDS = [
+    'primary_career_field', 'career_stage', 'education_level', 'field_of_study',
+    'experience_level', 'current_role', 'skills', 'interests', 'goals',
+    'preferred_work_style', 'salary_expectation',
+    'technical_skills_score', 'communication_score', 'leadership_score',
+    'problem_solving_score', 'creativity_score', 'adaptability_score',
+    'teamwork_score', 'customer_service_score', 'sales_marketing_score',
+    'analytical_thinking_score',
+]
+
+DEFAULT_CACHE_SETTINGS = {
+    'BACKEND': 'local',
+    'ALIAS': 'default',
+    'TTL': 24 * 60 * 60,
+    'MAX_ENTRIES': 1024,
+}
+
+
+def profile_fingerprint(profile):
+    """Stable hash of the profile fields that feed the Gemini prompt"""
+    payload = {field: getattr(profile, field, None) for field in FINGERPRINT_FIELDS}
+    payload['_version'] = PROMPT_VERSION
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class LocalRecommendationCache:
+    """In-process LRU cache with per-entry TTL"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        # Hand out copies so callers can't mutate the cached recommendations
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'local',
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': _hit_rate(self.hits, self.misses),
+            }
+
+
+class DjangoRecommendationCache:
+    """Shared cache backed by a Django CACHES alias (e.g. Redis in production).
+
+    Eviction is left to the cache server; counters are per process.
+    """
+
+    key_prefix = 'ai-recs'
+
+    def __init__(self, alias, ttl):
+        self.alias = alias
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _key(self, key):
+        return f'{self.key_prefix}:{key}'
+
+    def get(self, key):
+        value = self.backend.get(self._key(key))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(self._key(key), value, timeout=self.ttl)
+
+    def delete(self, key):
+        self.backend.delete(self._key(key))
+
+    def clear(self):
+        # Never flush a shared cache; entries expire through their TTL
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': f'django:{self.alias}',
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': _hit_rate(self.hits, self.misses),
+            }
+
+
+def _hit_rate(hits, misses):
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_recommendation_cache():
+    """Return the process-wide recommendation cache configured in settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = {**DEFAULT_CACHE_SETTINGS, **getattr(settings, 'AI_RECOMMENDATION_CACHE', {})}
+                if config['BACKEND'] == 'django':
+                    _cache = DjangoRecommendationCache(config['ALIAS'], config['TTL'])
+                else:
+                    _cache = LocalRecommendationCache(config['TTL'], config['MAX_ENTRIES'])
+    return _cache
+
+
+def reset_recommendation_cache():
+    """Drop the configured cache instance (used after settings changes)"""
+    global _cache
+    with _cache_lock:
+        _cache = None
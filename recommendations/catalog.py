@@ -0,0 +1,127 @@
+"""
+In-process snapshot of the career catalog.
+
+The catalog only changes when ``populate_career_paths`` runs, so each
+worker keeps an immutable ``CatalogSnapshot``: the full list, the list for
+each industry and every career path already rendered to JSON, gzipped, and
+tagged with a strong ETag. Serving a request is a dictionary lookup; the
+database is asked for the catalog version (see ``matching.catalog_version``)
+at most once every ``CHECK_INTERVAL`` seconds and the snapshot is rebuilt
+only when that version changed.
+"""
+
+import gzip
+import hashlib
+import re
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from .matching import catalog_version
+from .models import CareerPath
+from .serializers import CareerPathSerializer
+
+DEFAULT_CATALOG_SETTINGS = {
+    'CHECK_INTERVAL': 30,
+}
+
+# Same test as django.middleware.gzip.GZipMiddleware
+accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def get_catalog_settings():
+    return {**DEFAULT_CATALOG_SETTINGS, **getattr(settings, 'CAREER_CATALOG', {})}
+
+
+class Representation:
+    """One pre-rendered response body in plain and gzipped form"""
+
+    __slots__ = ('body', 'gzipped', 'digest')
+
+    def __init__(self, data):
+        self.body = JSONRenderer().render(data)
+        self.gzipped = gzip.compress(self.body, mtime=0)
+        self.digest = hashlib.sha256(self.body).hexdigest()[:32]
+
+    def etag(self, compressed):
+        # Each content-coding is a different representation with its own strong tag
+        return f'"{self.digest}-gzip"' if compressed else f'"{self.digest}"'
+
+
+class CatalogSnapshot:
+    """Every CareerPath response of one catalog version, rendered up front"""
+
+    def __init__(self, careers, version=None):
+        self.version = version
+        data = CareerPathSerializer(careers, many=True).data
+
+        by_industry = {}
+        for item in data:
+            by_industry.setdefault(item['industry'], []).append(item)
+
+        self.all = Representation(data)
+        self.empty = Representation([])
+        self.industries = MappingProxyType({
+            industry: Representation(items) for industry, items in by_industry.items()
+        })
+        self.details = MappingProxyType({item['id']: Representation(item) for item in data})
+
+    def for_industry(self, industry):
+        return self.industries.get(industry, self.empty)
+
+
+_snapshot = None
+_checked_at = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog_snapshot():
+    """Process-wide snapshot, revalidated against the catalog version every CHECK_INTERVAL"""
+    global _snapshot, _checked_at
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _checked_at < get_catalog_settings()['CHECK_INTERVAL']:
+        return snapshot
+
+    version = catalog_version()
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = CatalogSnapshot(CareerPath.objects.order_by('id'), version=version)
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def reset_catalog_snapshot():
+    """Drop this process's snapshot so the next request rebuilds it"""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def catalog_response(request, representation):
+    """200 with the (gzipped when accepted) body, or 304 when the client's ETag matches"""
+    compressed = bool(accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+    etag = representation.etag(compressed)
+
+    # If-None-Match uses the weak comparison
+    if_none_match = [tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+    if '*' in if_none_match or etag in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            representation.gzipped if compressed else representation.body,
+            content_type='application/json'
+        )
+        if compressed:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Length'] = str(len(response.content))
+
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
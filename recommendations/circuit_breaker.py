@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+DEFAULT_BREAKER_SETTINGS = {
+    'LATENCY_BUDGET': 8.0,
+    'FAILURE_RATE': 0.5,
+    'MIN_CALLS': 5,
+    'WINDOW': 20,
+    'OPEN_SECONDS': 30,
+    # Deadline for a whole streamed response; its first chunk must still
+    # arrive within LATENCY_BUDGET
+    'STREAM_TIMEOUT': 120.0,
+}
+
+
+def get_breaker_settings():
+    return {**DEFAULT_BREAKER_SETTINGS, **getattr(settings, 'AI_CIRCUIT_BREAKER', {})}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a rolling window of recent calls.
+
+    The circuit opens once at least ``min_calls`` outcomes are recorded and
+    the failure rate reaches ``failure_rate``. After ``open_seconds`` a
+    single trial call is let through (half-open); its outcome closes or
+    re-opens the circuit. Calls slower than ``latency_budget`` count as
+    failures.
+    """
+
+    def __init__(self, name, latency_budget, failure_rate, min_calls, window, open_seconds):
+        self.name = name
+        self.latency_budget = latency_budget
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.slow_calls = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == 'open' and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = 'half_open'
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self):
+        """Return True if a call may go through right now"""
+        with self._lock:
+            state = self._current_state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success, latency=None):
+        """Record the outcome of a call that ``allow()`` let through"""
+        slow = success and latency is not None and latency > self.latency_budget
+        with self._lock:
+            if slow:
+                success = False
+                self.slow_calls += 1
+            state = self._current_state()
+            if state == 'half_open':
+                self._trial_in_flight = False
+                if success:
+                    self._state = 'closed'
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (state == 'closed' and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._open()
+
+    def _open(self):
+        self._state = 'open'
+        self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            state = self._current_state()
+            failures = self._outcomes.count(False)
+            return {
+                'name': self.name,
+                'state': state,
+                'latency_budget_seconds': self.latency_budget,
+                'recent_calls': len(self._outcomes),
+                'recent_failures': failures,
+                'failure_rate': round(failures / len(self._outcomes), 4) if self._outcomes else None,
+                'slow_calls': self.slow_calls,
+                'rejected_calls': self.rejected,
+                'retry_in_seconds': (
+                    max(0.0, round(self._opened_at + self.open_seconds - time.monotonic(), 1))
+                    if state == 'open' else None
+                ),
+            }
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_gemini_breaker():
+    """Return the process-wide breaker guarding Gemini calls"""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                config = get_breaker_settings()
+                _breaker = CircuitBreaker(
+                    'gemini',
+                    latency_budget=config['LATENCY_BUDGET'],
+                    failure_rate=config['FAILURE_RATE'],
+                    min_calls=config['MIN_CALLS'],
+                    window=config['WINDOW'],
+                    open_seconds=config['OPEN_SECONDS'],
+                )
+    return _breaker
+
+
+def reset_gemini_breaker():
+    """Drop the process-wide breaker so the next call builds a fresh one"""
+    global _breaker
+    with _breaker_lock:
+        _breaker = None
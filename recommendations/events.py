@@ -0,0 +1,123 @@
+"""
+Batched engagement events for recommendations.
+
+A client sends every interaction from a page view in one request::
+
+    {"events": [
+        {"target": "career_recommendation", "id": 12, "type": "viewed"},
+        {"target": "career_recommendation", "id": 12, "type": "saved", "value": true},
+        {"target": "recommendation", "id": 7, "type": "rated", "value": 4}
+    ]}
+
+Events are checked against the user's own rows with one query per target
+model, then collapsed so the last event per row and field wins, and written
+with one UPDATE per field (a single-value ``update()`` or a CASE
+``bulk_update()`` when rows get different values).
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from assessments.models import CareerRecommendationHistory
+from .insights import invalidate_user_insights
+from .models import Recommendation
+
+
+def _flag(value):
+    return True
+
+
+def _boolean(value):
+    if not isinstance(value, bool):
+        raise ValueError('value must be true or false')
+    return value
+
+
+def _rating(value):
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 5:
+        raise ValueError('value must be an integer between 1 and 5')
+    return value
+
+
+def _text(value):
+    if not isinstance(value, str):
+        raise ValueError('value must be a string')
+    return value
+
+
+# target -> (model, owner lookup, {event type: (field, value parser)})
+EVENT_TARGETS = {
+    'career_recommendation': (CareerRecommendationHistory, 'session__user', {
+        'viewed': ('viewed', _flag),
+        'roadmap_clicked': ('clicked_roadmap', _flag),
+        'saved': ('saved_by_user', _boolean),
+        'rated': ('user_rating', _rating),
+        'notes': ('user_notes', _text),
+    }),
+    'recommendation': (Recommendation, 'user', {
+        'read': ('is_read', _flag),
+        'bookmarked': ('is_bookmarked', _boolean),
+        'rated': ('feedback_rating', _rating),
+    }),
+}
+
+
+def apply_interaction_events(user, events):
+    """Apply validated events for ``user``; returns ``(applied, rejected)``.
+
+    ``rejected`` lists ``{'index', 'error'}`` for events that could not be
+    applied; the others are written regardless.
+    """
+    rejected = []
+    # (target, field) -> {pk: value}, later events overwrite earlier ones
+    changes = {}
+    wanted = {target: set() for target in EVENT_TARGETS}
+    parsed = []
+
+    for index, event in enumerate(events):
+        model, owner, types = EVENT_TARGETS[event['target']]
+        if event['type'] not in types:
+            rejected.append({'index': index, 'error': f"Unknown event type '{event['type']}' for {event['target']}"})
+            continue
+        field, parse = types[event['type']]
+        try:
+            value = parse(event.get('value'))
+        except ValueError as e:
+            rejected.append({'index': index, 'error': str(e)})
+            continue
+        wanted[event['target']].add(event['id'])
+        parsed.append((index, event['target'], event['id'], field, value))
+
+    owned = {}
+    for target, ids in wanted.items():
+        if ids:
+            model, owner, _ = EVENT_TARGETS[target]
+            owned[target] = set(
+                model.objects.filter(pk__in=ids, **{owner: user}).values_list('pk', flat=True)
+            )
+
+    applied = 0
+    for index, target, pk, field, value in parsed:
+        if pk not in owned.get(target, ()):
+            rejected.append({'index': index, 'error': 'Not found'})
+            continue
+        changes.setdefault((target, field), {})[pk] = value
+        applied += 1
+
+    now = timezone.now()
+    with transaction.atomic():
+        for (target, field), values in changes.items():
+            model = EVENT_TARGETS[target][0]
+            distinct = set(values.values())
+            if len(distinct) == 1:
+                model.objects.filter(pk__in=values).update(**{field: distinct.pop(), 'updated_at': now})
+            else:
+                model.objects.bulk_update(
+                    [model(pk=pk, **{field: value, 'updated_at': now}) for pk, value in values.items()],
+                    [field, 'updated_at']
+                )
+        if ('recommendation', 'is_read') in changes:
+            invalidate_user_insights(user.pk)
+
+    rejected.sort(key=lambda item: item['index'])
+    return applied, rejected
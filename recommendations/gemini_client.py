@@ -0,0 +1,100 @@
+"""
+Process-wide Gemini client registry.
+
+``genai.configure`` throws away the cached service clients (and their open
+gRPC channels), so it must run once per process rather than once per request.
+The registry configures the SDK on first use and hands every caller the same
+thread-safe ``GenerativeModel``, which keeps the underlying connection alive
+between requests. Only the environment is read here, so the registry can be
+warmed from a gunicorn ``post_fork`` hook before Django is loaded.
+"""
+
+import os
+import threading
+import time
+
+import google.generativeai as genai
+
+DEFAULT_MODEL_NAME = 'gemini-1.5-flash'
+
+
+class GeminiClientRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configured = False
+        self._models = {}
+        self.configure_count = 0
+        self.models_created = 0
+        self.calls = 0
+        self.reused_calls = 0
+        self.warmed_at = None
+        self.warm_up_error = None
+
+    def _configure(self):
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable is not set")
+        options = {'api_key': api_key}
+        transport = os.getenv('GEMINI_TRANSPORT')
+        if transport:
+            options['transport'] = transport
+        genai.configure(**options)
+        self._configured = True
+        self.configure_count += 1
+
+    def get_model(self, model_name=DEFAULT_MODEL_NAME):
+        """Return the shared model for ``model_name``, configuring the SDK once"""
+        with self._lock:
+            if not self._configured:
+                self._configure()
+            model = self._models.get(model_name)
+            self.calls += 1
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+                self.models_created += 1
+            else:
+                self.reused_calls += 1
+            return model
+
+    def warm_up(self, model_name=DEFAULT_MODEL_NAME):
+        """Open the connection ahead of the first request.
+
+        ``count_tokens`` goes through the same generative service channel as
+        ``generate_content`` but does not consume generation quota.
+        """
+        try:
+            self.get_model(model_name).count_tokens('ping')
+        except Exception as e:
+            self.warm_up_error = str(e)
+            print(f"Gemini warm-up failed: {e}")
+            return False
+        self.warmed_at = time.time()
+        self.warm_up_error = None
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._configured = False
+            self._models.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'configured': self._configured,
+                'models': sorted(self._models),
+                'configure_count': self.configure_count,
+                'models_created': self.models_created,
+                'calls': self.calls,
+                'reused_calls': self.reused_calls,
+                'reuse_rate': round(self.reused_calls / self.calls, 4) if self.calls else None,
+                'warmed_at': self.warmed_at,
+                'warm_up_error': self.warm_up_error,
+            }
+
+
+registry = GeminiClientRegistry()
+
+
+def get_gemini_model(model_name=DEFAULT_MODEL_NAME):
+    return registry.get_model(model_name)
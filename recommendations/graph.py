@@ -0,0 +1,284 @@
+"""
+Career transition graph.
+
+Every stage of every CareerPath is a node. A node links to the next stage
+of its own path (a promotion) and to its cheapest stages of other paths at
+the same or a lower level (a switch). Edge weights are estimated years:
+the experience gap between the stages, ``SKILL_YEARS`` for each skill the
+target stage needs that the current one lacks, and ``SWITCH_YEARS`` for
+changing path. Roadmaps are the cheapest routes found with A*; the
+experience gap to the target never overestimates the remaining cost, so
+the heuristic is admissible.
+
+The adjacency lists are stored compactly (CSR: ``offsets``, ``targets``
+and ``weights`` arrays) and the graph is rebuilt only when the catalog
+version changes, like ``matching.CareerMatrix``.
+"""
+
+import heapq
+import math
+import threading
+from array import array
+from collections import Counter
+
+from .matching import EXPERIENCE_YEARS, _parse_experience, catalog_version, tokenize_skills
+from .models import CareerPath
+
+SKILL_YEARS = 0.5
+SWITCH_YEARS = 0.5
+# Cheapest switches kept per node, which bounds the edge count
+MAX_SWITCHES = 8
+# Switch targets scored per node: the stages sharing the most skills with it
+MAX_CANDIDATES = 4 * MAX_SWITCHES
+# Share of the words of a stage title that must match current_role to start there
+ROLE_MATCH = 0.5
+
+
+class RoadmapError(Exception):
+    """Raised when a roadmap cannot be computed; the message is safe to show"""
+
+
+def _skill_phrases(skills):
+    phrases = []
+    for skill in skills or []:
+        tokens = frozenset(tokenize_skills(str(skill)))
+        if tokens:
+            phrases.append((str(skill), tokens))
+    return phrases
+
+
+def _missing(tokens, phrases):
+    """Skill phrases of a stage not (fully) covered by ``tokens``, as a fractional count"""
+    return sum(1 - len(phrase & tokens) / len(phrase) for _, phrase in phrases)
+
+
+class CareerGraph:
+    """Stages of every career path and the transitions between them"""
+
+    def __init__(self, careers, version=None):
+        self.version = version
+        self.careers = {}
+        self.path = array('i')     # node -> career path id
+        self.stage = array('i')    # node -> stage index within its path
+        self.lower = array('d')    # node -> years of experience the stage starts at
+        self.titles = []           # node -> stage title
+        self.phrases = []          # node -> [(skill, tokens)] the stage needs
+        self.tokens = []           # node -> every skill token acquired by this stage
+        self.entries = []          # first stage of each path
+
+        for career in careers:
+            self.careers[career.pk] = career
+            stages = [s for s in career.career_stages or [] if isinstance(s, dict)]
+            acquired = frozenset()
+            required = _skill_phrases(career.required_skills)
+            for k, stage in enumerate(stages):
+                node = len(self.titles)
+                phrases = _skill_phrases(stage.get('skills')) + (required if k == 0 else [])
+                for _, tokens in phrases:
+                    acquired |= tokens
+                self.path.append(career.pk)
+                self.stage.append(k)
+                lower, _ = _parse_experience(stage.get('experience'))
+                self.lower.append(lower)
+                self.titles.append(stage.get('stage') or f'{career.name} stage {k + 1}')
+                self.phrases.append(phrases)
+                self.tokens.append(acquired)
+                if k == 0:
+                    self.entries.append(node)
+
+        count = len(self.titles)
+        # Skill token -> stages that need it, to find related stages without scanning them all
+        self.needed_by = {}
+        for node, phrases in enumerate(self.phrases):
+            for token in frozenset().union(*(tokens for _, tokens in phrases)):
+                self.needed_by.setdefault(token, []).append(node)
+        # Stages of each level, cheapest to enter without any of their skills first
+        self.by_stage = {}
+        entry_cost = [self.lower[node] + SKILL_YEARS * len(self.phrases[node]) for node in range(count)]
+        for node in sorted(range(count), key=lambda node: (entry_cost[node], node)):
+            self.by_stage.setdefault(self.stage[node], []).append(node)
+
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.weights = array('d')
+        for node in range(count):
+            edges = {}
+            if node + 1 < count and self.path[node + 1] == self.path[node]:
+                edges[node + 1] = self._cost(node, node + 1)
+            switches = [
+                (self._cost(node, other) + SWITCH_YEARS, other) for other in self._switch_candidates(node)
+            ]
+            for weight, other in heapq.nsmallest(MAX_SWITCHES, switches):
+                edges[other] = weight
+            for other in sorted(edges):
+                self.targets.append(other)
+                self.weights.append(edges[other])
+            self.offsets.append(len(self.targets))
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _cost(self, source, target):
+        """Years from ``source`` to ``target``, switching penalty excluded"""
+        gap = max(0.0, self.lower[target] - self.lower[source])
+        return gap + SKILL_YEARS * _missing(self.tokens[source], self.phrases[target])
+
+    def _switch_candidates(self, node):
+        """Stages of other paths at the same or a lower level worth scoring as switches.
+
+        Up to MAX_CANDIDATES stages sharing the most skill tokens with
+        ``node``, plus the MAX_SWITCHES cheapest-to-enter stages of each
+        level, so a rebuild scores O(N) edges instead of O(N^2).
+        """
+        def allowed(other):
+            return self.path[other] != self.path[node] and self.stage[other] <= self.stage[node]
+
+        shared = Counter()
+        for token in self.tokens[node]:
+            shared.update(self.needed_by.get(token, ()))
+        candidates = set(heapq.nsmallest(
+            MAX_CANDIDATES, (other for other in shared if allowed(other)),
+            key=lambda other: (-shared[other], other)
+        ))
+        for stage in range(self.stage[node] + 1):
+            fresh = 0
+            for other in self.by_stage.get(stage, ()):
+                if fresh == MAX_SWITCHES:
+                    break
+                if allowed(other):
+                    candidates.add(other)
+                    fresh += 1
+        return candidates
+
+    def neighbours(self, node):
+        for i in range(self.offsets[node], self.offsets[node + 1]):
+            yield self.targets[i], self.weights[i]
+
+    def find_nodes(self, text):
+        """Nodes whose stage title best matches ``text`` (share of its words), with that share"""
+        words = tokenize_skills(text or '')
+        best, nodes = 0.0, []
+        if not words:
+            return nodes, best
+        for node, title in enumerate(self.titles):
+            title_words = tokenize_skills(title)
+            if not title_words:
+                continue
+            share = len(words & title_words) / len(words | title_words)
+            if share > best:
+                best, nodes = share, [node]
+            elif share == best and share > 0:
+                nodes.append(node)
+        return nodes, best
+
+    def resolve_target(self, text=None, career_path_id=None, stage=None):
+        """The node for a stage index of a path, else the best title match of ``text``,
+        else the first stage of a path whose name matches ``text``"""
+        if career_path_id is not None:
+            for node in range(len(self)):
+                if self.path[node] == career_path_id and self.stage[node] == (stage or 0):
+                    return node
+            raise RoadmapError('Target stage not found in the catalog')
+
+        nodes, share = self.find_nodes(text)
+        if nodes and share >= ROLE_MATCH:
+            return nodes[0]
+        words = tokenize_skills(text or '')
+        for node in self.entries:
+            if words and words <= tokenize_skills(self.careers[self.path[node]].name):
+                return node
+        if nodes:
+            return nodes[0]
+        raise RoadmapError('Target role not found in the catalog')
+
+    def starting_points(self, current_role, skills, years):
+        """``{node: cost}`` of where the user can stand today.
+
+        Stages matching ``current_role`` are free. Any path can also be
+        entered at its first stage by learning its missing skills.
+        """
+        tokens = frozenset(tokenize_skills(skills or ''))
+        starts = {}
+        for node in self.entries:
+            gap = max(0.0, self.lower[node] - years)
+            starts[node] = gap + SKILL_YEARS * _missing(tokens, self.phrases[node])
+        nodes, share = self.find_nodes(current_role)
+        if share >= ROLE_MATCH:
+            for node in nodes:
+                starts[node] = 0.0
+        return starts
+
+    def shortest_path(self, starts, target):
+        """A* from the weighted ``starts`` to ``target``; returns ``(cost, nodes)`` or None"""
+        goal = self.lower[target]
+        best = dict(starts)
+        previous = {}
+        heap = [(cost + max(0.0, goal - self.lower[node]), cost, node) for node, cost in starts.items()]
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            if node == target:
+                route = [node]
+                while route[-1] in previous:
+                    route.append(previous[route[-1]])
+                return cost, route[::-1]
+            done.add(node)
+            for other, weight in self.neighbours(node):
+                candidate = cost + weight
+                if candidate < best.get(other, math.inf):
+                    best[other] = candidate
+                    previous[other] = node
+                    heapq.heappush(heap, (candidate + max(0.0, goal - self.lower[other]), candidate, other))
+        return None
+
+    def roadmap(self, profile, target):
+        """Steps from the user's current position to ``target``"""
+        years = EXPERIENCE_YEARS.get(profile.experience_level, 0.0)
+        starts = self.starting_points(profile.current_role, profile.skills, years)
+        found = self.shortest_path(starts, target)
+        if found is None:
+            raise RoadmapError('No route to the target role')
+        cost, route = found
+
+        user_tokens = frozenset(tokenize_skills(profile.skills or ''))
+        steps = []
+        for i, node in enumerate(route):
+            career = self.careers[self.path[node]]
+            if i == 0:
+                transition, known, years_needed = 'start', user_tokens, starts[node]
+            else:
+                source = route[i - 1]
+                transition = 'promotion' if self.path[source] == self.path[node] else 'switch'
+                known = self.tokens[source]
+                years_needed = dict(self.neighbours(source))[node]
+            steps.append({
+                'career_path_id': career.pk,
+                'career_path': career.name,
+                'industry': career.industry,
+                'stage_index': self.stage[node],
+                'stage': self.titles[node],
+                'transition': transition,
+                'new_skills': [skill for skill, tokens in self.phrases[node] if not tokens <= known],
+                'estimated_years': round(years_needed, 2),
+            })
+        return {'estimated_years': round(cost, 2), 'steps': steps}
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_career_graph():
+    """Process-wide CareerGraph, rebuilt only when the catalog changes"""
+    global _graph
+    version = catalog_version()
+    graph = _graph
+    if graph is None or graph.version != version:
+        with _graph_lock:
+            if _graph is None or _graph.version != version:
+                _graph = CareerGraph(CareerPath.objects.order_by('id'), version=version)
+            graph = _graph
+    return graph
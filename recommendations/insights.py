@@ -0,0 +1,154 @@
+"""
+Dashboard insights for a user.
+
+Everything the dashboard shows is read with one statement: the profile row
+joined to the user's career progress rows, with the recommendation totals
+as correlated subqueries using conditional aggregation. The result is kept
+per user in a Django cache (``ALIAS``) for ``TTL`` seconds, so the common
+case is a single cache read. Writes that change what is shown (new,
+updated or deleted recommendations, read flags, progress and profile
+changes) call ``invalidate_user_insights`` once their transaction commits.
+
+Invalidation bumps a per-user generation that is part of the cache key, so
+a reader that computed its insights before the write can't store them
+where later readers look. A per-process cache (LocMem) would only be
+invalidated in the worker that handled the write, so insights are not
+cached there unless ``SINGLE_PROCESS`` is set.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import UserProfile
+from .models import Recommendation
+
+DEFAULT_INSIGHTS_SETTINGS = {
+    'ALIAS': 'default',
+    'TTL': 300,
+    # Allow a process-local cache; only safe with a single worker process
+    'SINGLE_PROCESS': False,
+}
+
+# Bump when the cached payload changes shape
+INSIGHTS_VERSION = 1
+
+PROGRESS_PREFIX = 'user__usercareerprogress__'
+
+_warned = False
+
+
+def get_insights_settings():
+    return {**DEFAULT_INSIGHTS_SETTINGS, **getattr(settings, 'USER_INSIGHTS', {})}
+
+
+def _cache():
+    """The insights cache, or None when it isn't shared by every worker"""
+    global _warned
+    config = get_insights_settings()
+    cache = caches[config['ALIAS']]
+    if isinstance(cache, (LocMemCache, DummyCache)) and not config['SINGLE_PROCESS']:
+        if not _warned:
+            print("Insights caching needs a cache shared by all workers; caching is off")
+            _warned = True
+        return None
+    return cache
+
+
+def _generation_key(user_id):
+    return f'insights:v{INSIGHTS_VERSION}:generation:{user_id}'
+
+
+def _cache_key(user_id, generation):
+    return f'insights:v{INSIGHTS_VERSION}:{user_id}:{generation}'
+
+
+def _recommendation_total(**filters):
+    totals = (
+        Recommendation.objects.filter(user=OuterRef('user'))
+        .order_by()
+        .values('user')
+        .annotate(total=Count('id', filter=Q(**filters) if filters else None))
+        .values('total')
+    )
+    return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+
+
+def compute_user_insights(user):
+    """Insights read straight from the database, or None without a profile"""
+    rows = list(
+        UserProfile.objects.filter(user=user)
+        .annotate(
+            recommendations_count=_recommendation_total(),
+            unread_recommendations=_recommendation_total(is_read=False),
+        )
+        .order_by(f'{PROGRESS_PREFIX}id')
+        .values(
+            'profile_completion', 'technical_skills_score', 'communication_score',
+            'leadership_score', 'problem_solving_score', 'last_assessment_date',
+            'recommendations_count', 'unread_recommendations',
+            f'{PROGRESS_PREFIX}career_path__name', f'{PROGRESS_PREFIX}progress_percentage',
+        )
+    )
+    if not rows:
+        return None
+
+    # One row per progress entry (or a single row with NULLs when there is none)
+    first = rows[0]
+    return {
+        'profile_completion': first['profile_completion'],
+        'skill_scores': {
+            'technical': first['technical_skills_score'],
+            'communication': first['communication_score'],
+            'leadership': first['leadership_score'],
+            'problem_solving': first['problem_solving_score'],
+        },
+        'recommendations_count': first['recommendations_count'],
+        'unread_recommendations': first['unread_recommendations'],
+        'career_progress': [
+            {
+                'career_path__name': row[f'{PROGRESS_PREFIX}career_path__name'],
+                'progress_percentage': row[f'{PROGRESS_PREFIX}progress_percentage'],
+            }
+            for row in rows if row[f'{PROGRESS_PREFIX}career_path__name'] is not None
+        ],
+        'last_activity': first['last_assessment_date'],
+    }
+
+
+def get_user_insights_data(user):
+    """The user's insights from the cache, computed and stored on a miss"""
+    cache = _cache()
+    if cache is None:
+        return compute_user_insights(user)
+    # Read the generation first: an invalidation after this point moves
+    # readers to a new key, so what we store below is never served stale
+    key = _cache_key(user.pk, cache.get(_generation_key(user.pk), 0))
+    insights = cache.get(key)
+    if insights is None:
+        insights = compute_user_insights(user)
+        if insights is not None:
+            cache.set(key, insights, timeout=get_insights_settings()['TTL'])
+    return insights
+
+
+def _bump_generation(user_id):
+    cache = _cache()
+    if cache is None:
+        return
+    key = _generation_key(user_id)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr
+            cache.add(key, 1, timeout=None)
+
+
+def invalidate_user_insights(user_id):
+    """Drop the cached insights once the current transaction (if any) commits"""
+    transaction.on_commit(lambda: _bump_generation(user_id))
@@ -0,0 +1,173 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import UserProfile
+from .models import RecommendationJob
+from .services import generate_recommendations_for_user
+
+DEFAULT_JOB_SETTINGS = {
+    'ASYNC_DEFAULT': False,
+    'EXECUTOR': 'thread',
+    'MAX_WORKERS': 2,
+    'MAX_PENDING': 32,
+    # A job still running this many seconds after it was claimed is presumed
+    # lost with its worker and is queued again (up to MAX_ATTEMPTS claims)
+    'STALE_AFTER': 600,
+    'MAX_ATTEMPTS': 3,
+}
+
+
+class JobQueueFull(Exception):
+    """Raised when the local worker pool has no free slots"""
+
+
+def get_job_settings():
+    return {**DEFAULT_JOB_SETTINGS, **getattr(settings, 'AI_GENERATION_JOBS', {})}
+
+
+def run_recommendation_job(job_id):
+    """Claim a queued job and run the generation for its user.
+
+    Returns False if another worker already claimed the job.
+    """
+    claimed = RecommendationJob.objects.filter(id=job_id, status='queued').update(
+        status='running', started_at=timezone.now(), attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return False
+
+    job = RecommendationJob.objects.select_related('user').get(id=job_id)
+    try:
+        user_profile = UserProfile.objects.get(user=job.user)
+        recommendations, ai_powered = generate_recommendations_for_user(job.user, user_profile)
+    except Exception as e:
+        print(f"Recommendation job {job_id} failed: {e}")
+        RecommendationJob.objects.filter(id=job_id).update(
+            status='failed', error=str(e), completed_at=timezone.now()
+        )
+        return True
+
+    RecommendationJob.objects.filter(id=job_id).update(
+        status='completed',
+        ai_powered=ai_powered,
+        recommendation_ids=[rec.id for rec in recommendations],
+        completed_at=timezone.now()
+    )
+    return True
+
+
+def reclaim_stale_jobs(stale_after=None, max_attempts=None):
+    """Requeue jobs whose worker died mid-run, or fail them after ``max_attempts`` claims.
+
+    Returns ``(requeued, failed)``.
+    """
+    config = get_job_settings()
+    stale_after = config['STALE_AFTER'] if stale_after is None else stale_after
+    max_attempts = config['MAX_ATTEMPTS'] if max_attempts is None else max_attempts
+    stale = RecommendationJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - timedelta(seconds=stale_after)
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status='failed', error='Recommendation job timed out', completed_at=timezone.now()
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(status='queued', started_at=None)
+    return requeued, failed
+
+
+def claim_next_jobs(limit, queued_before=None):
+    """Run up to ``limit`` queued jobs in FIFO order (database-backed queue).
+
+    ``queued_before`` limits the pass to jobs created before that time, so
+    jobs that a web worker's pool is about to run are left alone.
+    """
+    processed = 0
+    queued = RecommendationJob.objects.filter(status='queued')
+    if queued_before is not None:
+        queued = queued.filter(created_at__lt=queued_before)
+    job_ids = queued.order_by('created_at').values_list('id', flat=True)[:limit]
+    for job_id in list(job_ids):
+        if run_recommendation_job(job_id):
+            processed += 1
+    return processed
+
+
+class LocalJobRunner:
+    """Bounded thread pool that runs jobs inside the web worker process"""
+
+    def __init__(self, max_workers, max_pending):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='recommendation-job'
+        )
+        self.capacity = max_workers + max_pending
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    def has_capacity(self):
+        with self._lock:
+            return self._in_use < self.capacity
+
+    def submit(self, job_id):
+        with self._lock:
+            if self._in_use >= self.capacity:
+                raise JobQueueFull()
+            self._in_use += 1
+        future = self._executor.submit(self._run, job_id)
+        future.add_done_callback(lambda _: self._release())
+
+    def _release(self):
+        with self._lock:
+            self._in_use -= 1
+
+    def _run(self, job_id):
+        close_old_connections()
+        try:
+            run_recommendation_job(job_id)
+        finally:
+            close_old_connections()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def _get_runner():
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                config = get_job_settings()
+                _runner = LocalJobRunner(config['MAX_WORKERS'], config['MAX_PENDING'])
+    return _runner
+
+
+def _submit_after_commit(runner, job_id):
+    try:
+        runner.submit(job_id)
+    except JobQueueFull:
+        # The pool filled up while the request's transaction was open
+        RecommendationJob.objects.filter(id=job_id, status='queued').update(
+            status='failed',
+            error='Recommendation service is busy. Please try again shortly.',
+            completed_at=timezone.now()
+        )
+
+
+def enqueue_recommendation_job(job):
+    """Hand a job to the configured executor once its row is committed.
+
+    With the 'db' executor the row itself is the queue entry and the
+    ``process_recommendation_jobs`` command picks it up. Raises
+    ``JobQueueFull`` when the local pool has no free slot.
+    """
+    if get_job_settings()['EXECUTOR'] == 'db':
+        return
+    runner = _get_runner()
+    if not runner.has_capacity():
+        raise JobQueueFull()
+    transaction.on_commit(lambda: _submit_after_commit(runner, job.id))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from recommendations.models import CareerPath
+from recommendations.skills import sync_skill_taxonomy
 
 class Command(BaseCommand):
     help = 'Populate database with comprehensive career paths for all industries'
@@ -145,3 +146,8 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS(f'Successfully created {created_count} new career paths')
         )
+        
+        totals = sync_skill_taxonomy()
+        self.stdout.write(
+            f"Skill taxonomy: {totals['created']} new skill(s), {totals['careers']} career path(s) updated"
+        )
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recommendations.jobs import claim_next_jobs, get_job_settings, reclaim_stale_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued recommendation generation jobs (for the database-backed executor) '
+        'and requeue jobs whose worker died'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Maximum number of jobs to run per pass',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep between polls when the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            config = get_job_settings()
+            requeued, failed = reclaim_stale_jobs()
+            if requeued or failed:
+                self.stdout.write(f'Requeued {requeued} and failed {failed} stale recommendation job(s)')
+
+            # Jobs of the thread executor belong to a web worker's pool until they go stale
+            queued_before = None
+            if config['EXECUTOR'] != 'db':
+                queued_before = timezone.now() - timedelta(seconds=config['STALE_AFTER'])
+            processed = claim_next_jobs(options['batch_size'], queued_before=queued_before)
+            if processed:
+                self.stdout.write(f'Processed {processed} recommendation job(s)')
+            if not options['loop']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
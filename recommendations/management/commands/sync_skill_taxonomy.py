@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from recommendations.skills import sync_skill_taxonomy
+
+
+class Command(BaseCommand):
+    help = 'Register the catalog skills and refresh the skill ids of careers, profiles and recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of rows refreshed per UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        totals = sync_skill_taxonomy(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {totals['created']} new skill(s); refreshed {totals['careers']} career path(s), "
+            f"{totals['profiles']} profile(s) and {totals['recommendations']} recommendation(s)"
+        ))
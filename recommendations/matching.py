@@ -0,0 +1,249 @@
+import re
+import threading
+
+import numpy as np
+from django.db.models import Count, Max
+
+from .models import CareerPath
+from .skills import get_skill_taxonomy, profile_skill_ids
+
+SCORE_FIELDS = [
+    'technical_skills_score', 'communication_score', 'leadership_score',
+    'problem_solving_score', 'creativity_score', 'adaptability_score',
+    'teamwork_score', 'customer_service_score', 'sales_marketing_score',
+    'analytical_thinking_score',
+]
+
+# Skill keywords that signal demand for each assessment dimension
+DIMENSION_KEYWORDS = {
+    'technical_skills_score': ['programming', 'software', 'system', 'technical', 'version control',
+                               'excel', 'modeling', 'medical', 'legal', 'seo', 'tools', 'architecture'],
+    'communication_score': ['communication', 'writing', 'drafting', 'presentation'],
+    'leadership_score': ['leadership', 'management', 'lead', 'supervis', 'administrative'],
+    'problem_solving_score': ['problem', 'critical', 'strategy', 'strategic', 'case'],
+    'creativity_score': ['creativ', 'design', 'color', 'typography', 'content', 'visual'],
+    'adaptability_score': ['adapt', 'patience', 'differentiation', 'operations'],
+    'teamwork_score': ['team', 'classroom', 'staff', 'collaborat'],
+    'customer_service_score': ['customer', 'client', 'patient', 'empathy', 'care'],
+    'sales_marketing_score': ['sales', 'marketing', 'social media', 'seo', 'business development', 'campaign'],
+    'analytical_thinking_score': ['analy', 'data', 'research', 'financial', 'budget'],
+}
+
+# UserProfile.primary_career_field -> CareerPath.industry (lowercase)
+FIELD_INDUSTRIES = {
+    'technology': 'technology', 'engineering': 'technology', 'data_science': 'technology',
+    'cybersecurity': 'technology',
+    'graphic_design': 'creative arts', 'web_design': 'creative arts', 'photography': 'creative arts',
+    'music': 'creative arts', 'film': 'creative arts', 'fashion': 'creative arts',
+    'architecture': 'creative arts',
+    'healthcare': 'healthcare', 'nursing': 'healthcare', 'pharmacy': 'healthcare',
+    'psychology': 'healthcare', 'physical_therapy': 'healthcare',
+    'finance': 'finance', 'accounting': 'finance',
+    'education': 'education', 'training': 'education', 'research': 'education',
+    'marketing': 'marketing', 'digital_marketing': 'marketing', 'content_creation': 'marketing',
+    'sales': 'marketing',
+    'hospitality': 'hospitality', 'food_service': 'hospitality',
+    'law': 'law',
+}
+
+EXPERIENCE_YEARS = {'entry': 1.0, 'junior': 3.5, 'mid': 6.5, 'senior': 10.0, 'lead': 13.0}
+
+# Relative weight of each signal in the final match score
+WEIGHTS = {'scores': 0.4, 'skills': 0.3, 'field': 0.2, 'experience': 0.1}
+
+STOP_WORDS = {'and', 'of', 'the', 'basic', 'advanced', 'skills', 'knowledge', '&'}
+
+
+def tokenize_skills(text):
+    """Lowercase word tokens from a skill phrase or comma-separated skill list"""
+    return {token for token in re.findall(r'[a-z0-9+#/]+', text.lower()) if token not in STOP_WORDS}
+
+
+def _parse_experience(experience):
+    """'0-2 years' -> (0, 2); '5+ years' -> (5, inf)"""
+    numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', experience or '')]
+    if not numbers:
+        return 0.0, np.inf
+    if '+' in experience or len(numbers) == 1:
+        return numbers[0], np.inf
+    return numbers[0], numbers[1]
+
+
+class CareerMatrix:
+    """Precomputed feature matrices for every CareerPath in the catalog"""
+
+    def __init__(self, careers, version=None):
+        self.version = version
+        self.careers = list(careers)
+        n = len(self.careers)
+
+        # Demand for each assessment dimension, rows normalised to sum to 1
+        self.demand = np.zeros((n, len(SCORE_FIELDS)))
+        vocabulary = {}
+        skill_rows = []
+        skill_names = get_skill_taxonomy().names
+        max_stages = max((len(c.career_stages or []) for c in self.careers), default=0)
+        self.stage_lower = np.full((n, max(max_stages, 1)), np.inf)
+        self.stage_upper = np.full((n, max(max_stages, 1)), -np.inf)
+
+        for i, career in enumerate(self.careers):
+            phrases = list(career.required_skills or [])
+            for stage in career.career_stages or []:
+                phrases.extend(stage.get('skills', []))
+            text = ' '.join(phrases).lower()
+            for j, field in enumerate(SCORE_FIELDS):
+                self.demand[i, j] = sum(text.count(keyword) for keyword in DIMENSION_KEYWORDS[field])
+
+            # Skill ids from the taxonomy (see recommendations.skills)
+            skill_ids = [skill_id for skill_id in career.skill_ids or [] if skill_id in skill_names]
+            skill_rows.append(skill_ids)
+            for skill_id in skill_ids:
+                vocabulary.setdefault(skill_id, len(vocabulary))
+
+            for k, stage in enumerate(career.career_stages or []):
+                self.stage_lower[i, k], self.stage_upper[i, k] = _parse_experience(stage.get('experience'))
+
+        totals = self.demand.sum(axis=1, keepdims=True)
+        self.demand = np.divide(
+            self.demand, totals, out=np.full_like(self.demand, 1.0 / len(SCORE_FIELDS)), where=totals > 0
+        )
+
+        self.vocabulary = vocabulary
+        self.skills = np.zeros((n, len(vocabulary)))
+        for i, skill_ids in enumerate(skill_rows):
+            self.skills[i, [vocabulary[skill_id] for skill_id in skill_ids]] = 1.0
+        self.skill_rows = skill_rows
+        self.skill_names = skill_names
+        self.skill_counts = np.maximum(self.skills.sum(axis=1), 1.0)
+        self.industries = np.array([(c.industry or '').lower() for c in self.careers])
+
+    def score(self, profile, skill_ids=None):
+        """Return ``(total, components)`` arrays with one score in [0, 1] per career"""
+        user_scores = np.array([
+            getattr(profile, field) if getattr(profile, field) is not None else 5
+            for field in SCORE_FIELDS
+        ], dtype=float) / 10.0
+        score_fit = self.demand @ user_scores
+
+        user_skills = np.zeros(len(self.vocabulary))
+        if skill_ids is None:
+            skill_ids = profile_skill_ids(profile)
+        for skill_id in skill_ids:
+            index = self.vocabulary.get(skill_id)
+            if index is not None:
+                user_skills[index] = 1.0
+        skill_fit = (self.skills @ user_skills) / self.skill_counts
+
+        field = profile.primary_career_field or ''
+        industry = FIELD_INDUSTRIES.get(field)
+        if industry is None and field:
+            display = profile.get_primary_career_field_display().lower()
+            field_fit = np.array([bool(i) and i in display for i in self.industries], dtype=float)
+        else:
+            field_fit = (self.industries == industry).astype(float)
+
+        years = EXPERIENCE_YEARS.get(profile.experience_level)
+        if years is None:
+            experience_fit = np.full(len(self.careers), 0.5)
+        else:
+            covered = (self.stage_lower <= years) & (years < self.stage_upper)
+            experience_fit = covered.any(axis=1).astype(float)
+
+        components = {
+            'scores': score_fit,
+            'skills': skill_fit,
+            'field': field_fit,
+            'experience': experience_fit,
+        }
+        total = sum(WEIGHTS[name] * values for name, values in components.items())
+        return total, components
+
+    def rank(self, profile, limit=5):
+        """Top ``limit`` careers for a profile, best first"""
+        if not self.careers:
+            return []
+        user_skill_ids = set(profile_skill_ids(profile))
+        total, components = self.score(profile, user_skill_ids)
+        order = np.argsort(-total, kind='stable')[:limit]
+        years = EXPERIENCE_YEARS.get(profile.experience_level)
+
+        matches = []
+        for i in order:
+            career = self.careers[i]
+            matched = [self.skill_names[s] for s in self.skill_rows[i] if s in user_skill_ids]
+            missing = [self.skill_names[s] for s in self.skill_rows[i] if s not in user_skill_ids]
+            matches.append({
+                'career_path_id': career.id,
+                'name': career.name,
+                'industry': career.industry,
+                'match_percentage': int(round(total[i] * 100)),
+                'score_breakdown': {name: round(float(values[i]), 3) for name, values in components.items()},
+                'matched_skills': matched,
+                'missing_skills': missing,
+                'suggested_stage': self._stage_for(i, years),
+                'growth_outlook': career.growth_outlook,
+            })
+        return matches
+
+    def _stage_for(self, index, years):
+        stages = self.careers[index].career_stages or []
+        if not stages:
+            return None
+        if years is None:
+            return stages[0].get('stage')
+        for k, stage in enumerate(stages):
+            if self.stage_lower[index, k] <= years < self.stage_upper[index, k]:
+                return stage.get('stage')
+        eligible = [k for k in range(len(stages)) if self.stage_lower[index, k] <= years]
+        return stages[eligible[-1] if eligible else 0].get('stage')
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def catalog_version():
+    """Cheap signature that changes whenever a CareerPath row is added, edited or removed"""
+    stats = CareerPath.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    return (stats['count'], stats['updated'])
+
+
+def get_career_matrix():
+    """Process-wide CareerMatrix, rebuilt only when the catalog changes"""
+    global _matrix
+    version = catalog_version()
+    matrix = _matrix
+    if matrix is None or matrix.version != version:
+        with _matrix_lock:
+            if _matrix is None or _matrix.version != version:
+                _matrix = CareerMatrix(CareerPath.objects.all(), version=version)
+            matrix = _matrix
+    return matrix
+
+
+def match_careers(profile, limit=5):
+    """Rank the career catalog against a profile without calling the AI"""
+    return get_career_matrix().rank(profile, limit=limit)
+
+
+def build_local_recommendations(profile, limit=3):
+    """Career-path recommendations from the local engine, in the fallback format"""
+    recommendations = []
+    for position, match in enumerate(match_careers(profile, limit=limit)):
+        description = f"{match['name']} in {match['industry']} is a {match['match_percentage']}% match for your profile."
+        if match['matched_skills']:
+            description += f" You already bring {', '.join(match['matched_skills'])}."
+        recommendations.append({
+            'type': 'career_path',
+            'title': f"Recommended Career Path: {match['name']}",
+            'content': {
+                'description': description,
+                'career_path_id': match['career_path_id'],
+                'suggested_stage': match['suggested_stage'],
+                'next_steps': [f'Develop {skill}' for skill in match['missing_skills']],
+                'growth_outlook': match['growth_outlook'],
+            },
+            'priority': 'high' if position == 0 else 'medium',
+            'confidence': round(match['match_percentage'] / 100, 2),
+        })
+    return recommendations
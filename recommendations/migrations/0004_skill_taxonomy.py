@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_recommendationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('key', models.CharField(help_text='Normalized name used for lookups', max_length=100, unique=True)),
+                ('aliases', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='careerpath',
+            name='skill_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0004_skill_taxonomy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationjob',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
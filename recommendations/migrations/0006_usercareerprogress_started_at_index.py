@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0005_recommendationjob_attempts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usercareerprogress',
+            index=models.Index(fields=['user', '-started_at'], name='recommendat_user_id_d5d65e_idx'),
+        ),
+    ]
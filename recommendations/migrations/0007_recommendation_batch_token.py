@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0006_usercareerprogress_started_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendation',
+            name='batch_token',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
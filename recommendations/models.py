@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -28,6 +30,8 @@ class Recommendation(models.Model):
     is_read = models.BooleanField(default=False)
     is_bookmarked = models.BooleanField(default=False)
     feedback_rating = models.IntegerField(null=True, blank=True, help_text="User feedback (1-5)")
+    # Set on rows inserted together, to read their ids back where INSERT can't return them
+    batch_token = models.UUIDField(null=True, blank=True, editable=False, db_index=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -42,12 +46,25 @@ class Recommendation(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
+class Skill(models.Model):
+    """Canonical skill; careers, profiles and recommendations store skill ids"""
+    name = models.CharField(max_length=100, unique=True)
+    key = models.CharField(max_length=100, unique=True, help_text="Normalized name used for lookups")
+    aliases = models.JSONField(default=list, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return self.name
+
 class CareerPath(models.Model):
     """Represents a career progression path"""
     name = models.CharField(max_length=100)
     industry = models.CharField(max_length=50)
     description = models.TextField()
     required_skills = models.JSONField(default=list)
+    skill_ids = models.JSONField(default=list, blank=True)  # Skill ids of required_skills, in order
     career_stages = models.JSONField(default=list)  # List of career stages with requirements
     average_salary_range = models.JSONField(default=dict)  # Min/max salary by experience level
     growth_outlook = models.CharField(max_length=50, blank=True)
@@ -55,6 +72,20 @@ class CareerPath(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    def resolve_skill_ids(self):
+        """Map the required skills onto the canonical skill taxonomy"""
+        from .skills import resolve_skill_ids
+        self.skill_ids = resolve_skill_ids(self.required_skills)
+        return self.skill_ids
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'required_skills' in update_fields:
+            self.resolve_skill_ids()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'skill_ids'}
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.name} ({self.industry})"
 
@@ -71,6 +102,39 @@ class UserCareerProgress(models.Model):
     
     class Meta:
         unique_together = ['user', 'career_path']
+        indexes = [
+            models.Index(fields=['user', '-started_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.career_path.name} ({self.progress_percentage:.1f}%)"
+
+class RecommendationJob(models.Model):
+    """Tracks a queued recommendation generation request"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendation_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    ai_powered = models.BooleanField(null=True, blank=True)
+    recommendation_ids = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - job {self.id} ({self.status})"
@@ -0,0 +1,259 @@
+"""
+Full-text search over the career catalog.
+
+Each worker keeps an inverted index of every CareerPath (name,
+description, required skills and the stage names in ``career_stages``)
+ranked with BM25, plus a prefix trie of the indexed terms for type-ahead.
+Queries never touch the database. The index follows the catalog
+incrementally: at most every ``CHECK_INTERVAL`` seconds the catalog
+version is compared (see ``matching.catalog_version``) and, when it
+changed, only added, edited or removed career paths are re-indexed.
+"""
+
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .matching import STOP_WORDS, catalog_version
+from .models import CareerPath
+
+DEFAULT_SEARCH_SETTINGS = {
+    'CHECK_INTERVAL': 30,
+    'K1': 1.2,
+    'B': 0.75,
+    # Completions of the last query word that take part in an autocomplete search
+    'PREFIX_EXPANSIONS': 5,
+}
+
+# A term in a name counts three times as much as one in the description
+FIELD_WEIGHTS = {'name': 3, 'required_skills': 2, 'stages': 2, 'description': 1}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9+#/]+')
+
+
+def get_search_settings():
+    return {**DEFAULT_SEARCH_SETTINGS, **getattr(settings, 'CAREER_SEARCH', {})}
+
+
+def analyze(text):
+    """Lowercase word tokens of ``text`` in order, stop words removed"""
+    return [token for token in TOKEN_PATTERN.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def career_fields(career):
+    """The searchable text of a career path, by field"""
+    stages = career.career_stages if isinstance(career.career_stages, list) else []
+    return {
+        'name': career.name,
+        'description': career.description,
+        'required_skills': ' '.join(str(skill) for skill in career.required_skills or []),
+        'stages': ' '.join(str(stage.get('stage', '')) for stage in stages if isinstance(stage, dict)),
+    }
+
+
+class _TrieNode:
+    __slots__ = ('children', 'weight', 'best')
+
+    def __init__(self):
+        self.children = {}
+        # Document frequency when a term ends here, else 0
+        self.weight = 0
+        # Cached top completions below this node, cleared when a term below changes
+        self.best = None
+
+
+class PrefixTrie:
+    """Terms weighted by document frequency, completed by prefix"""
+
+    best_size = 10
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def set_weight(self, term, weight):
+        path = [self.root]
+        for char in term:
+            node = path[-1].children.get(char)
+            if node is None:
+                if weight <= 0:
+                    return
+                node = path[-1].children[char] = _TrieNode()
+            path.append(node)
+        path[-1].weight = weight
+        for node in path:
+            node.best = None
+        # Drop branches that no longer lead to a term
+        for depth in range(len(term), 0, -1):
+            node = path[depth]
+            if node.weight or node.children:
+                break
+            del path[depth - 1].children[term[depth - 1]]
+
+    def _collect(self, node, prefix, limit):
+        heap = []
+        stack = [(node, prefix)]
+        while stack:
+            current, term = stack.pop()
+            if current.weight:
+                item = (current.weight, term)
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+            stack.extend((child, term + char) for char, child in current.children.items())
+        return [term for weight, term in sorted(heap, key=lambda item: (-item[0], item[1]))]
+
+    def complete(self, prefix, limit=10):
+        """The most frequent terms starting with ``prefix``"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        if limit > self.best_size:
+            return self._collect(node, prefix, limit)
+        if node.best is None:
+            node.best = self._collect(node, prefix, self.best_size)
+        return node.best[:limit]
+
+
+class CareerSearchIndex:
+    """BM25 inverted index over career paths, updated one document at a time"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}   # term -> {career id: weighted term frequency}
+        self.documents = {}  # career id -> {'id', 'name', 'industry'}
+        self.terms = {}      # career id -> Counter of weighted term frequencies
+        self.lengths = {}    # career id -> weighted document length
+        self.updated = {}    # career id -> updated_at when indexed
+        self.total_length = 0
+        self.trie = PrefixTrie()
+        self.version = None
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, career):
+        """Index ``career``, replacing any previous version of it"""
+        terms = Counter()
+        for field, text in career_fields(career).items():
+            for token in analyze(text):
+                terms[token] += FIELD_WEIGHTS[field]
+
+        with self.lock:
+            self.remove(career.pk)
+            self.documents[career.pk] = {'id': career.pk, 'name': career.name, 'industry': career.industry}
+            self.terms[career.pk] = terms
+            self.lengths[career.pk] = sum(terms.values())
+            self.updated[career.pk] = career.updated_at
+            self.total_length += self.lengths[career.pk]
+            for term, frequency in terms.items():
+                docs = self.postings.setdefault(term, {})
+                docs[career.pk] = frequency
+                self.trie.set_weight(term, len(docs))
+
+    def remove(self, career_id):
+        with self.lock:
+            terms = self.terms.pop(career_id, None)
+            if terms is None:
+                return
+            self.documents.pop(career_id)
+            self.updated.pop(career_id)
+            self.total_length -= self.lengths.pop(career_id)
+            for term in terms:
+                docs = self.postings[term]
+                del docs[career_id]
+                if not docs:
+                    del self.postings[term]
+                self.trie.set_weight(term, len(docs))
+
+    def sync(self, queryset, version=None):
+        """Re-index the rows of ``queryset`` added or edited since they were indexed,
+        and drop the ones that are gone; returns ``(indexed, removed)``"""
+        current = dict(queryset.values_list('id', 'updated_at'))
+        with self.lock:
+            changed = [pk for pk, updated in current.items() if self.updated.get(pk) != updated]
+            removed = [pk for pk in self.documents if pk not in current]
+        for pk in removed:
+            self.remove(pk)
+        for career in queryset.filter(pk__in=changed).iterator():
+            self.add(career)
+        self.version = version
+        return len(changed), len(removed)
+
+    def _scores(self, weighted_terms):
+        count = len(self.documents)
+        average = self.total_length / count if count else 0
+        scores = {}
+        for term, query_weight in weighted_terms.items():
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for pk, frequency in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[pk] / average)
+                scores[pk] = scores.get(pk, 0.0) + query_weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores
+
+    def _ranked(self, weighted_terms, limit):
+        with self.lock:
+            scores = self._scores(weighted_terms)
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            return [{**self.documents[pk], 'score': round(score, 4)} for pk, score in top]
+
+    def search(self, query, limit=10):
+        """Career paths ranked by BM25 against every word of ``query``"""
+        return self._ranked(Counter(analyze(query)), limit)
+
+    def autocomplete(self, query, limit=10, expansions=5):
+        """Completions of the last word of ``query`` and the careers they lead to.
+
+        Earlier words must match as typed; the last one matches any of its
+        ``expansions`` most frequent completions.
+        """
+        tokens = TOKEN_PATTERN.findall((query or '').lower())
+        if not tokens:
+            return {'terms': [], 'results': []}
+        with self.lock:
+            completions = self.trie.complete(tokens[-1], limit=max(limit, expansions))
+            weighted_terms = Counter(token for token in tokens[:-1] if token not in STOP_WORDS)
+            for term in completions[:expansions]:
+                weighted_terms[term] += 1
+            return {'terms': completions[:limit], 'results': self._ranked(weighted_terms, limit)}
+
+
+_index = None
+_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Process-wide index, synced with the catalog at most every CHECK_INTERVAL seconds"""
+    global _index, _checked_at
+    config = get_search_settings()
+    index = _index
+    if index is not None and time.monotonic() - _checked_at < config['CHECK_INTERVAL']:
+        return index
+
+    version = catalog_version()
+    with _index_lock:
+        if _index is None:
+            _index = CareerSearchIndex(k1=config['K1'], b=config['B'])
+        if _index.version != version:
+            _index.sync(CareerPath.objects.all(), version=version)
+        _checked_at = time.monotonic()
+        return _index
+
+
+def reset_search_index():
+    global _index
+    with _index_lock:
+        _index = None
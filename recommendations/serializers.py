@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from backend.fieldsets import SparseFieldsetMixin
+from .events import EVENT_TARGETS
 from .models import Recommendation, CareerPath, UserCareerProgress
 
-class RecommendationSerializer(serializers.ModelSerializer):
+class RecommendationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Recommendation
         fields = [
@@ -11,17 +13,17 @@ class RecommendationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
-class CareerPathSerializer(serializers.ModelSerializer):
+class CareerPathSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = CareerPath
         fields = [
-            'id', 'name', 'industry', 'description', 'required_skills',
+            'id', 'name', 'industry', 'description', 'required_skills', 'skill_ids',
             'career_stages', 'average_salary_range', 'growth_outlook',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['skill_ids', 'created_at', 'updated_at']
 
-class UserCareerProgressSerializer(serializers.ModelSerializer):
+class UserCareerProgressSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     career_path = CareerPathSerializer(read_only=True)
     
     class Meta:
@@ -30,6 +32,7 @@ class UserCareerProgressSerializer(serializers.ModelSerializer):
             'id', 'career_path', 'current_stage', 'progress_percentage',
             'milestones_achieved', 'started_at', 'last_updated'
         ]
+        expandable_fields = ['career_path']
         read_only_fields = ['started_at', 'last_updated']
 
 class RecommendationFeedbackSerializer(serializers.ModelSerializer):
@@ -37,3 +40,18 @@ class RecommendationFeedbackSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recommendation
         fields = ['feedback_rating', 'is_bookmarked']
+
+class InteractionEventSerializer(serializers.Serializer):
+    """One engagement event, e.g. {'target': 'recommendation', 'id': 7, 'type': 'read'}"""
+    target = serializers.ChoiceField(choices=sorted(EVENT_TARGETS))
+    id = serializers.IntegerField()
+    type = serializers.CharField()
+    value = serializers.JSONField(required=False)
+
+class InteractionEventsSerializer(serializers.Serializer):
+    """A page view's worth of engagement events"""
+    events = serializers.ListField(
+        child=InteractionEventSerializer(),
+        min_length=1,
+        max_length=200
+    )
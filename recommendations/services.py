@@ -0,0 +1,281 @@
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from users.models import UserProfile
+
+from .cache import profile_fingerprint
+from .insights import invalidate_user_insights
+from .matching import build_local_recommendations
+from .models import Recommendation
+from .serializers import RecommendationSerializer
+from .singleflight import coalesce
+
+
+def generate_recommendations_for_user(user, user_profile):
+    """Generate recommendations for a profile and save them.
+
+    Returns ``(created_recommendations, ai_powered)``. Falls back to the
+    mock recommendations when the AI service is unavailable. Concurrent
+    calls for the same user and profile share a single generation.
+    """
+    key = f'{user.pk}:{profile_fingerprint(user_profile)}'
+    (recommendations, ai_powered), _ = coalesce(
+        key,
+        lambda: _generate_and_save(user, user_profile),
+        dump=_dump_generation,
+        load=_load_generation,
+    )
+    return recommendations, ai_powered
+
+
+def _dump_generation(result):
+    recommendations, ai_powered = result
+    return {'ids': [rec.id for rec in recommendations], 'ai_powered': ai_powered}
+
+
+def _load_generation(published):
+    by_id = Recommendation.objects.in_bulk(published['ids'])
+    recommendations = [by_id[pk] for pk in published['ids'] if pk in by_id]
+    return recommendations, published['ai_powered']
+
+
+def _generate_and_save(user, user_profile):
+    try:
+        # Use Gemini AI for recommendations
+        from .ai_service import CareerAdvisorAI
+        
+        ai_advisor = CareerAdvisorAI()
+        ai_recommendations = ai_advisor.generate_career_recommendations(user_profile)
+        
+        # Save AI recommendations and bump the last assessment date together
+        created_recommendations = save_recommendation_batch(
+            user,
+            [build_ai_recommendation(user, rec_data) for rec_data in ai_recommendations],
+            user_profile=user_profile
+        )
+        
+        return created_recommendations, True
+        
+    except Exception as e:
+        # Fallback to mock recommendations if AI fails
+        print(f"AI recommendation failed: {e}")
+        mock_recommendations = fallback_recommendations(user_profile)
+        
+        created_recommendations = save_recommendation_batch(
+            user,
+            [build_mock_recommendation(user, rec_data) for rec_data in mock_recommendations]
+        )
+        
+        return created_recommendations, False
+
+
+def save_recommendation_batch(user, recommendations, user_profile=None):
+    """Insert a batch of unsaved recommendations in a single transaction.
+
+    Uses one INSERT for the batch and, when ``user_profile`` is given, one
+    UPDATE of its ``last_assessment_date`` column. Returns the saved
+    instances with primary keys set.
+    """
+    recommendations = list(recommendations)
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            created = Recommendation.objects.bulk_create(recommendations)
+        else:
+            # MySQL can't return ids from a multi-row INSERT: tag the batch
+            # and read its ids back, which one INSERT allocates in row order
+            token = uuid.uuid4()
+            for recommendation in recommendations:
+                recommendation.batch_token = token
+            created = Recommendation.objects.bulk_create(recommendations)
+            pks = Recommendation.objects.filter(batch_token=token).order_by('pk').values_list('pk', flat=True)
+            for recommendation, pk in zip(created, pks):
+                recommendation.pk = pk
+        if user_profile is not None:
+            touch_last_assessment(user_profile)
+        invalidate_user_insights(user.pk)
+    return created
+
+
+def touch_last_assessment(user_profile):
+    """Set last_assessment_date without a full profile save"""
+    user_profile.last_assessment_date = timezone.now()
+    UserProfile.objects.filter(pk=user_profile.pk).update(
+        last_assessment_date=user_profile.last_assessment_date
+    )
+    invalidate_user_insights(user_profile.user_id)
+
+
+def stream_recommendations_for_user(user, user_profile):
+    """Save and yield recommendations one by one as the AI produces them.
+
+    Yields ``(recommendation, ai_powered)`` pairs. If the AI fails before
+    producing anything the mock recommendations are streamed instead; a
+    failure mid-stream is re-raised after what was already saved, so the
+    caller can report it.
+    """
+    produced = 0
+    try:
+        from .ai_service import CareerAdvisorAI
+        
+        ai_advisor = CareerAdvisorAI()
+        for rec_data in ai_advisor.stream_career_recommendations(user_profile):
+            recommendation = build_ai_recommendation(user, rec_data)
+            recommendation.save()
+            invalidate_user_insights(user.pk)
+            produced += 1
+            yield recommendation, True
+    except Exception as e:
+        print(f"AI recommendation stream failed: {e}")
+        if produced:
+            raise
+        for rec_data in fallback_recommendations(user_profile):
+            recommendation = build_mock_recommendation(user, rec_data)
+            recommendation.save()
+            invalidate_user_insights(user.pk)
+            yield recommendation, False
+    finally:
+        # Update last assessment date for whatever the AI produced, even if
+        # the stream failed or the client went away
+        if produced:
+            touch_last_assessment(user_profile)
+
+
+def build_ai_recommendation(user, rec_data):
+    """Unsaved Recommendation for one item of AI output"""
+    # Ensure content is properly structured
+    content = {
+        'description': rec_data.get('description', ''),
+        'action_steps': rec_data.get('action_steps', []),
+        'timeline': rec_data.get('timeline', ''),
+        'resources': rec_data.get('resources', []),
+        'expected_outcomes': rec_data.get('expected_outcomes', '')
+    }
+    
+    return Recommendation(
+        user=user,
+        recommendation_type=rec_data.get('type', 'career_path'),
+        title=rec_data.get('title', 'Career Recommendation'),
+        content=content,
+        priority=rec_data.get('priority', 'medium'),
+        ai_confidence_score=rec_data.get('confidence', 0.75)
+    )
+
+
+def build_mock_recommendation(user, rec_data):
+    """Unsaved Recommendation for one fallback item"""
+    return Recommendation(
+        user=user,
+        recommendation_type=rec_data['type'],
+        title=rec_data['title'],
+        content=rec_data['content'],
+        priority=rec_data['priority'],
+        ai_confidence_score=rec_data['confidence']
+    )
+
+
+def build_generation_payload(recommendations, ai_powered):
+    """Response body shared by the sync and async generation endpoints"""
+    serializer = RecommendationSerializer(recommendations, many=True)
+    if ai_powered:
+        return {
+            'message': f'Generated {len(recommendations)} AI-powered recommendations',
+            'recommendations': serializer.data,
+            'ai_powered': True
+        }
+    return {
+        'message': f'Generated {len(recommendations)} recommendations (fallback mode)',
+        'recommendations': serializer.data,
+        'ai_powered': False,
+        'note': 'AI service unavailable, using fallback recommendations'
+    }
+
+
+def fallback_recommendations(user_profile):
+    """Recommendations used when the AI is unavailable.
+
+    Prefers the local career matching engine and only falls back to the
+    static mock recommendations when the career catalog is empty.
+    """
+    try:
+        local_recommendations = build_local_recommendations(user_profile)
+    except Exception as e:
+        print(f"Local career matching failed: {e}")
+        local_recommendations = []
+    return local_recommendations or generate_mock_recommendations(user_profile)
+
+def generate_mock_recommendations(user_profile):
+    """Generate mock AI recommendations based on user profile"""
+    recommendations = []
+    
+    # Career path recommendation
+    if user_profile.skills and user_profile.interests:
+        recommendations.append({
+            'type': 'career_path',
+            'title': 'Recommended Career Path: Software Engineering',
+            'content': {
+                'description': 'Based on your technical skills and interests, software engineering offers excellent growth opportunities.',
+                'next_steps': [
+                    'Strengthen programming fundamentals',
+                    'Build portfolio projects',
+                    'Practice system design'
+                ],
+                'timeline': '6-12 months',
+                'resources': [
+                    'Online coding bootcamps',
+                    'Open source contributions',
+                    'Technical interview preparation'
+                ]
+            },
+            'priority': 'high',
+            'confidence': 0.85
+        })
+    
+    # Skill development recommendation
+    if user_profile.technical_skills_score and user_profile.technical_skills_score < 7:
+        recommendations.append({
+            'type': 'skill_development',
+            'title': 'Improve Technical Skills',
+            'content': {
+                'description': 'Your technical skills assessment suggests room for improvement in core areas.',
+                'focus_areas': [
+                    'Programming languages',
+                    'System architecture',
+                    'Database design',
+                    'Testing methodologies'
+                ],
+                'recommended_courses': [
+                    'Advanced Python Programming',
+                    'System Design Fundamentals',
+                    'Database Management'
+                ]
+            },
+            'priority': 'medium',
+            'confidence': 0.75
+        })
+    
+    # Industry insight
+    if user_profile.preferred_industries:
+        recommendations.append({
+            'type': 'industry_insight',
+            'title': 'Technology Industry Trends',
+            'content': {
+                'description': 'Current trends in your preferred industry sectors.',
+                'trends': [
+                    'AI/ML adoption accelerating',
+                    'Remote work becoming standard',
+                    'Cloud-native development growing',
+                    'Cybersecurity skills in high demand'
+                ],
+                'opportunities': [
+                    'AI/ML Engineer positions',
+                    'DevOps and Cloud roles',
+                    'Cybersecurity specialists'
+                ]
+            },
+            'priority': 'low',
+            'confidence': 0.70
+        })
+    
+    return recommendations
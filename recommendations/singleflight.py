@@ -0,0 +1,154 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_SINGLE_FLIGHT_SETTINGS = {
+    'LOCK_TIMEOUT': 120,
+    'WAIT_TIMEOUT': 90,
+    'POLL_INTERVAL': 0.25,
+    'RESULT_TTL': 60,
+}
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time within this process.
+
+    Callers arriving while a call is in flight wait for it and receive the
+    same result (or exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn):
+        """Return ``(result, shared)`` where ``shared`` is True for followers"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self.leaders,
+                'followers': self.followers,
+            }
+
+
+class SharedFlight:
+    """Extends single-flight across worker processes with a lock in a Django cache.
+
+    The lock holds a token naming the leader, and the leader publishes a
+    small token for its result (via ``dump``) under a key scoped to that
+    token, so followers only ever read the result of the leader they waited
+    for; they rebuild it with ``load``. If the leader disappears without
+    publishing, a follower takes over the lock, or runs the call itself once
+    ``WAIT_TIMEOUT`` has passed.
+    """
+
+    prefix = 'ai-flight'
+
+    def __init__(self, alias, config):
+        self.alias = alias
+        self.lock_timeout = config['LOCK_TIMEOUT']
+        self.wait_timeout = config['WAIT_TIMEOUT']
+        self.poll_interval = config['POLL_INTERVAL']
+        self.result_ttl = config['RESULT_TTL']
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _result_key(self, key, token):
+        return f'{self.prefix}:result:{key}:{token}'
+
+    def do(self, key, fn, dump, load):
+        lock_key = f'{self.prefix}:lock:{key}'
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+
+        while not self.backend.add(lock_key, token, timeout=self.lock_timeout):
+            leader = self.backend.get(lock_key)
+            if leader is not None:
+                published = self._wait_for(lock_key, self._result_key(key, leader), leader, deadline)
+                if published is not None:
+                    return load(published), True
+            if time.monotonic() >= deadline:
+                # Leader timed out; do the work without the lock
+                break
+            # Leader vanished without publishing; try to take over
+
+        try:
+            result = fn()
+            self.backend.set(self._result_key(key, token), dump(result), timeout=self.result_ttl)
+            return result, False
+        finally:
+            if self.backend.get(lock_key) == token:
+                self.backend.delete(lock_key)
+
+    def _wait_for(self, lock_key, result_key, leader, deadline):
+        while time.monotonic() < deadline:
+            published = self.backend.get(result_key)
+            if published is not None:
+                return published
+            if self.backend.get(lock_key) != leader:
+                # Released or taken over since we looked - check once more for its result
+                return self.backend.get(result_key)
+            time.sleep(self.poll_interval)
+        return None
+
+
+local_flight = SingleFlight()
+
+
+def coalesce(key, fn, dump, load):
+    """Run ``fn`` once per key across threads and, with a shared cache, across workers.
+
+    Returns ``(result, shared)``.
+    """
+    cache_config = getattr(settings, 'AI_RECOMMENDATION_CACHE', {})
+    if cache_config.get('BACKEND') != 'django':
+        return local_flight.do(key, fn)
+
+    config = {**DEFAULT_SINGLE_FLIGHT_SETTINGS, **getattr(settings, 'AI_SINGLE_FLIGHT', {})}
+    shared = SharedFlight(cache_config.get('ALIAS', 'default'), config)
+    (result, shared_remote), shared_local = local_flight.do(
+        key, lambda: shared.do(key, fn, dump, load)
+    )
+    return result, shared_local or shared_remote
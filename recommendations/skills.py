@@ -0,0 +1,225 @@
+"""
+Canonical skill taxonomy.
+
+Every skill in the career catalog is a ``Skill`` row with a normalized
+``key`` and a list of ``aliases``. Free-text skills (profile skills,
+recommendation skills) are resolved to skill ids by exact key or alias,
+and otherwise by trigram similarity, so "Progamming" and "coding" both
+become the id of "Programming". Career paths, profiles and recommendation
+history store the resulting ids, and matching compares integer ids
+instead of re-tokenizing strings.
+
+The lookup tables live in a process-wide ``SkillTaxonomy``, rebuilt only
+when the ``Skill`` table changes. ``sync_skill_taxonomy`` (also run by
+``populate_career_paths``) registers the catalog's skills and refreshes
+every stored id list.
+"""
+
+import re
+import threading
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import CareerPath, Skill
+
+# Lowest trigram similarity (shared / union of trigrams) accepted for a fuzzy match
+FUZZY_THRESHOLD = 0.45
+
+# Common alternative spellings of catalog skills
+BUILTIN_ALIASES = {
+    'Programming': ['coding', 'software development', 'software engineering'],
+    'Version Control': ['git', 'github', 'source control'],
+    'Excel': ['microsoft excel', 'ms excel', 'spreadsheets'],
+    'SEO/SEM': ['seo', 'sem', 'search engine optimization', 'search engine marketing'],
+    'Data Analysis': ['data analytics', 'data analyst'],
+    'Analytics': ['google analytics', 'web analytics'],
+    'Design Software': ['photoshop', 'illustrator', 'figma', 'adobe creative suite'],
+    'Communication': ['communication skills', 'verbal communication', 'public speaking'],
+    'Customer Service': ['customer support', 'client service'],
+    'Social Media': ['social media marketing', 'smm'],
+    'Problem Solving': ['troubleshooting'],
+    'Writing': ['copywriting', 'technical writing'],
+    'Financial Modeling': ['financial modelling'],
+}
+
+SEPARATORS = re.compile(r'[,;\n]+')
+
+
+def normalize_skill(text):
+    """'SEO/SEM ' -> 'seo sem'; 'Problem-Solving' -> 'problem solving'"""
+    text = (text or '').lower().replace('&', ' and ')
+    return ' '.join(re.findall(r'[a-z0-9+#]+', text))
+
+
+def split_skills(text):
+    """Skill phrases of a comma-separated free-text list"""
+    return [part.strip() for part in SEPARATORS.split(text or '') if part.strip()]
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillTaxonomy:
+    """Exact, alias and trigram lookup from skill text to skill ids"""
+
+    def __init__(self, skills, version=None):
+        self.version = version
+        self.names = {}
+        self.ids = {}   # normalized name or alias -> skill id
+        for skill in skills:
+            self.names[skill.pk] = skill.name
+            self.ids[skill.key] = skill.pk
+            for alias in skill.aliases or []:
+                self.ids.setdefault(normalize_skill(alias), skill.pk)
+        self.ids.pop('', None)
+
+        self.keys = list(self.ids)
+        self.key_trigrams = [trigrams(key) for key in self.keys]
+        self.trigram_index = {}  # trigram -> positions in self.keys
+        for position, grams in enumerate(self.key_trigrams):
+            for gram in grams:
+                self.trigram_index.setdefault(gram, []).append(position)
+
+    def lookup(self, text):
+        """Skill id for ``text``, or None when nothing is similar enough"""
+        key = normalize_skill(text)
+        if not key:
+            return None
+        skill_id = self.ids.get(key)
+        if skill_id is not None:
+            return skill_id
+
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigram_index.get(gram, ()))
+        best, best_score = None, FUZZY_THRESHOLD
+        for position, count in shared.items():
+            score = count / (len(grams) + len(self.key_trigrams[position]) - count)
+            if score >= best_score:
+                best, best_score = position, score
+        return None if best is None else self.ids[self.keys[best]]
+
+    def resolve(self, phrases):
+        """Skill ids of ``phrases`` in first-seen order, duplicates and unknowns dropped"""
+        resolved = []
+        for phrase in phrases or []:
+            skill_id = self.lookup(str(phrase))
+            if skill_id is not None and skill_id not in resolved:
+                resolved.append(skill_id)
+        return resolved
+
+
+_taxonomy = None
+_taxonomy_lock = threading.Lock()
+
+
+def taxonomy_version():
+    stats = Skill.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    return (stats['count'], stats['updated'])
+
+
+def get_skill_taxonomy():
+    """Process-wide SkillTaxonomy, rebuilt only when the Skill table changes"""
+    global _taxonomy
+    version = taxonomy_version()
+    taxonomy = _taxonomy
+    if taxonomy is None or taxonomy.version != version:
+        with _taxonomy_lock:
+            if _taxonomy is None or _taxonomy.version != version:
+                _taxonomy = SkillTaxonomy(Skill.objects.all(), version=version)
+            taxonomy = _taxonomy
+    return taxonomy
+
+
+def resolve_skill_ids(phrases):
+    return get_skill_taxonomy().resolve(phrases)
+
+
+def profile_skill_ids(profile):
+    """The profile's stored skill ids, resolved from its text if never stored"""
+    if profile.skill_ids or not profile.skills:
+        return profile.skill_ids or []
+    return resolve_skill_ids(split_skills(profile.skills))
+
+
+def catalog_skill_names():
+    """Every skill named by the catalog, required skills and stage skills alike"""
+    names = {}
+    for required, stages in CareerPath.objects.values_list('required_skills', 'career_stages'):
+        phrases = list(required or [])
+        for stage in stages or []:
+            if isinstance(stage, dict):
+                phrases.extend(stage.get('skills') or [])
+        for phrase in phrases:
+            key = normalize_skill(str(phrase))
+            if key:
+                names.setdefault(key, str(phrase).strip())
+    return names
+
+
+def _refresh_ids(model, source, resolve, chunk_size, touch=False):
+    """Recompute ``skill_ids`` of every ``model`` row from ``source``; returns rows changed"""
+    changed = 0
+    last_pk = 0
+    update_fields = ['skill_ids', 'updated_at'] if touch else ['skill_ids']
+    while True:
+        rows = list(
+            model.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', source, 'skill_ids')[:chunk_size]
+        )
+        if not rows:
+            return changed
+        last_pk = rows[-1].pk
+        stale = []
+        for row in rows:
+            skill_ids = resolve(getattr(row, source))
+            if skill_ids != row.skill_ids:
+                row.skill_ids = skill_ids
+                if touch:
+                    row.updated_at = timezone.now()
+                stale.append(row)
+        model.objects.bulk_update(stale, update_fields)
+        changed += len(stale)
+
+
+def sync_skill_taxonomy(chunk_size=500):
+    """Register the catalog's skills and aliases, then refresh every stored id list.
+
+    Returns ``{'created', 'careers', 'profiles', 'recommendations'}`` counts.
+    """
+    from assessments.models import CareerRecommendationHistory
+    from users.models import UserProfile
+
+    names = catalog_skill_names()
+    with transaction.atomic():
+        existing = {skill.key: skill for skill in Skill.objects.select_for_update()}
+        created = [
+            Skill(name=name, key=key) for key, name in names.items() if key not in existing
+        ]
+        Skill.objects.bulk_create(created, ignore_conflicts=True)
+
+        alias_keys = [normalize_skill(name) for name in BUILTIN_ALIASES]
+        by_key = {skill.key: skill for skill in Skill.objects.filter(key__in=alias_keys)}
+        for name, aliases in BUILTIN_ALIASES.items():
+            skill = by_key.get(normalize_skill(name))
+            if skill is not None and not set(aliases) <= set(skill.aliases):
+                skill.aliases = sorted(set(skill.aliases) | set(aliases))
+                skill.save(update_fields=['aliases', 'updated_at'])
+
+    taxonomy = get_skill_taxonomy()
+    return {
+        'created': len(created),
+        # Bumping updated_at makes the catalog caches pick up the new ids
+        'careers': _refresh_ids(CareerPath, 'required_skills', taxonomy.resolve, chunk_size, touch=True),
+        'profiles': _refresh_ids(
+            UserProfile, 'skills', lambda text: taxonomy.resolve(split_skills(text)), chunk_size
+        ),
+        'recommendations': _refresh_ids(
+            CareerRecommendationHistory, 'required_skills', taxonomy.resolve, chunk_size
+        ),
+    }
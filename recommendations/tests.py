@@ -1,3 +1,1025 @@
-from django.test import TestCase
+import gzip
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache as default_cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from assessments.models import AssessmentSession, CareerRecommendationHistory
+from backend.fieldsets import parse_fields
+from users.models import UserProfile
+from . import graph as graph_module
+from .cache import (
+    DjangoRecommendationCache, LocalRecommendationCache, profile_fingerprint,
+    get_recommendation_cache, reset_recommendation_cache
+)
+from .catalog import reset_catalog_snapshot
+from .circuit_breaker import CircuitBreaker, get_gemini_breaker, reset_gemini_breaker
+from .gemini_client import GeminiClientRegistry
+from .graph import CareerGraph, RoadmapError
+from .jobs import JobQueueFull, LocalJobRunner, enqueue_recommendation_job, reclaim_stale_jobs
+from .matching import _parse_experience, match_careers, tokenize_skills
+from .models import CareerPath, Recommendation, RecommendationJob, Skill, UserCareerProgress
+from .search import CareerSearchIndex, PrefixTrie, reset_search_index
+from .services import build_ai_recommendation, save_recommendation_batch
+from .singleflight import DEFAULT_SINGLE_FLIGHT_SETTINGS, SharedFlight, SingleFlight
+from .skills import get_skill_taxonomy, normalize_skill, split_skills, sync_skill_taxonomy
+
+
+def make_user(username='alice', **profile_fields):
+    user = User.objects.create_user(username, f'{username}@example.com', 'pw-123456')
+    profile = UserProfile.objects.create(user=user, **profile_fields)
+    return user, profile
+
+
+def make_catalog():
+    """A two-path catalog with its skill taxonomy synced"""
+    from .skills import sync_skill_taxonomy
+
+    developer = CareerPath.objects.create(
+        name='Software Developer', industry='Technology',
+        description='Build and maintain software applications.',
+        required_skills=['Programming', 'Problem Solving', 'Version Control'],
+        career_stages=[
+            {'stage': 'Junior Developer', 'experience': '0-2 years', 'skills': ['Programming', 'Version Control']},
+            {'stage': 'Software Developer', 'experience': '2-5 years', 'skills': ['System Design']},
+            {'stage': 'Senior Developer', 'experience': '5+ years', 'skills': ['Architecture', 'Leadership']},
+        ],
+        growth_outlook='Excellent',
+    )
+    nurse = CareerPath.objects.create(
+        name='Registered Nurse', industry='Healthcare',
+        description='Provide and coordinate patient care.',
+        required_skills=['Patient Care', 'Communication', 'Empathy'],
+        career_stages=[
+            {'stage': 'Registered Nurse', 'experience': '0-2 years', 'skills': ['Patient Care']},
+            {'stage': 'Charge Nurse', 'experience': '2+ years', 'skills': ['Leadership', 'Communication']},
+        ],
+        growth_outlook='Good',
+    )
+    sync_skill_taxonomy()
+    return developer, nurse
+
+
+class ProfileFingerprintTests(TestCase):
+    def test_changes_only_with_prompt_fields(self):
+        _, profile = make_user(skills='python', goals='ship things')
+        before = profile_fingerprint(profile)
+
+        profile.last_assessment_date = None
+        profile.profile_completion = 99
+        self.assertEqual(profile_fingerprint(profile), before)
+
+        profile.skills = 'python, sql'
+        self.assertNotEqual(profile_fingerprint(profile), before)
+
+
+class LocalRecommendationCacheTests(TestCase):
+    def test_hit_returns_a_copy(self):
+        cache = LocalRecommendationCache(ttl=60, max_entries=10)
+        cache.set('k', [{'title': 'A'}])
+
+        value = cache.get('k')
+        value[0]['title'] = 'changed'
+
+        self.assertEqual(cache.get('k'), [{'title': 'A'}])
+        self.assertEqual(cache.stats()['hits'], 2)
+
+    def test_entries_expire(self):
+        cache = LocalRecommendationCache(ttl=10, max_entries=10)
+        with mock.patch('recommendations.cache.time.monotonic', return_value=100.0):
+            cache.set('k', ['v'])
+        with mock.patch('recommendations.cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('k'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LocalRecommendationCache(ttl=60, max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+
+class DjangoRecommendationCacheTests(TestCase):
+    def setUp(self):
+        default_cache.clear()
+
+    def test_round_trip_through_cache_alias(self):
+        cache = DjangoRecommendationCache('default', ttl=60)
+        self.assertIsNone(cache.get('k'))
+        cache.set('k', [{'title': 'A'}])
+
+        self.assertEqual(cache.get('k'), [{'title': 'A'}])
+        self.assertEqual(default_cache.get('ai-recs:k'), [{'title': 'A'}])
+        self.assertEqual(cache.stats()['hit_rate'], 0.5)
+
+    @override_settings(AI_RECOMMENDATION_CACHE={'BACKEND': 'django', 'ALIAS': 'default'})
+    def test_configured_backend(self):
+        reset_recommendation_cache()
+        self.addCleanup(reset_recommendation_cache)
+        self.assertIsInstance(get_recommendation_cache(), DjangoRecommendationCache)
+
+
+class CachedGenerationTests(TestCase):
+    def setUp(self):
+        reset_recommendation_cache()
+        self.addCleanup(reset_recommendation_cache)
+        _, self.profile = make_user(skills='python')
+
+    @mock.patch('recommendations.ai_service.get_gemini_model')
+    def test_unchanged_profile_is_served_from_cache(self, get_model):
+        from .ai_service import CareerAdvisorAI
+
+        get_model.return_value.generate_content.return_value.text = (
+            '{"recommendations": [{"title": "Data Engineer", "description": "d"}]}'
+        )
+        advisor = CareerAdvisorAI()
+        first = advisor.generate_career_recommendations(self.profile)
+        second = advisor.generate_career_recommendations(self.profile)
+
+        self.assertEqual(first, second)
+        self.assertEqual(get_model.return_value.generate_content.call_count, 1)
+
+
+THREAD_JOBS = {'EXECUTOR': 'thread', 'MAX_WORKERS': 1, 'MAX_PENDING': 0}
+
+
+class RecommendationJobTests(TestCase):
+    def setUp(self):
+        self.user, _ = make_user()
+
+    @override_settings(AI_GENERATION_JOBS=THREAD_JOBS)
+    def test_job_is_submitted_only_after_commit(self):
+        runner = mock.Mock(spec=LocalJobRunner)
+        runner.has_capacity.return_value = True
+        with mock.patch('recommendations.jobs._get_runner', return_value=runner):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with transaction.atomic():
+                    job = RecommendationJob.objects.create(user=self.user)
+                    enqueue_recommendation_job(job)
+                    runner.submit.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        runner.submit.assert_called_once_with(job.id)
+
+    @override_settings(AI_GENERATION_JOBS=THREAD_JOBS)
+    def test_full_pool_at_commit_fails_the_job(self):
+        runner = LocalJobRunner(max_workers=1, max_pending=0)
+        self.addCleanup(runner._executor.shutdown)
+        runner._in_use = runner.capacity
+        job = RecommendationJob.objects.create(user=self.user)
+        with mock.patch('recommendations.jobs._get_runner', return_value=runner):
+            with self.assertRaises(JobQueueFull):
+                enqueue_recommendation_job(job)
+
+            runner._in_use = 0
+            with self.captureOnCommitCallbacks() as callbacks:
+                enqueue_recommendation_job(job)
+            runner._in_use = runner.capacity
+            callbacks[0]()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_stale_running_jobs_are_requeued_then_failed(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        retry = RecommendationJob.objects.create(
+            user=self.user, status='running', started_at=long_ago, attempts=1
+        )
+        exhausted = RecommendationJob.objects.create(
+            user=self.user, status='running', started_at=long_ago, attempts=3
+        )
+        fresh = RecommendationJob.objects.create(
+            user=self.user, status='running', started_at=timezone.now(), attempts=1
+        )
+
+        self.assertEqual(reclaim_stale_jobs(stale_after=600, max_attempts=3), (1, 1))
+
+        for job in (retry, exhausted, fresh):
+            job.refresh_from_db()
+        self.assertEqual((retry.status, retry.started_at), ('queued', None))
+        self.assertEqual(exhausted.status, 'failed')
+        self.assertEqual(fresh.status, 'running')
+
+
+def stream_chunks(*texts):
+    return [mock.Mock(text=text) for text in texts]
+
+
+class RecommendationStreamTests(TestCase):
+    def setUp(self):
+        reset_recommendation_cache()
+        self.addCleanup(reset_recommendation_cache)
+        self.user, self.profile = make_user(skills='python')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def events(self, response):
+        body = b''.join(response.streaming_content).decode()
+        return [block.split('\n')[0].removeprefix('event: ') for block in body.strip().split('\n\n')]
+
+    @mock.patch('recommendations.ai_service.get_gemini_model')
+    def test_streams_each_recommendation_then_done(self, get_model):
+        get_model.return_value.generate_content.return_value = stream_chunks(
+            '{"recommendations": [{"title": "A"},', ' {"title": "B"}]}'
+        )
+        response = self.client.post('/api/generate-recommendations/stream/')
+
+        self.assertEqual(self.events(response), ['recommendation', 'recommendation', 'done'])
+        self.profile.refresh_from_db()
+        self.assertIsNotNone(self.profile.last_assessment_date)
+
+    @mock.patch('recommendations.ai_service.get_gemini_model')
+    def test_cut_off_stream_ends_with_error_event(self, get_model):
+        get_model.return_value.generate_content.return_value = stream_chunks(
+            '{"recommendations": [{"title": "A"},', ' {"title": "B", "descr'
+        )
+        response = self.client.post('/api/generate-recommendations/stream/')
+
+        self.assertEqual(self.events(response), ['recommendation', 'error'])
+        self.assertEqual(Recommendation.objects.filter(user=self.user).count(), 1)
+        # Bookkeeping still ran for the recommendation that was saved
+        self.profile.refresh_from_db()
+        self.assertIsNotNone(self.profile.last_assessment_date)
+
+    @mock.patch('recommendations.ai_service.get_gemini_model')
+    def test_malformed_object_ends_with_error_event(self, get_model):
+        get_model.return_value.generate_content.return_value = stream_chunks(
+            '[{"title": "A"}, {"title": B}]'
+        )
+        response = self.client.post('/api/generate-recommendations/stream/')
+
+        self.assertEqual(self.events(response), ['recommendation', 'error'])
+
+
+@mock.patch.dict('os.environ', {'GEMINI_API_KEY': 'test-key'})
+@mock.patch('recommendations.gemini_client.genai')
+class GeminiClientRegistryTests(TestCase):
+    def test_configures_once_and_reuses_the_model(self, genai):
+        registry = GeminiClientRegistry()
+        first = registry.get_model()
+        second = registry.get_model()
+
+        self.assertIs(first, second)
+        genai.configure.assert_called_once_with(api_key='test-key')
+        stats = registry.stats()
+        self.assertEqual((stats['models_created'], stats['reused_calls']), (1, 1))
+
+    def test_failed_warm_up_is_recorded(self, genai):
+        genai.GenerativeModel.return_value.count_tokens.side_effect = RuntimeError('unreachable')
+        registry = GeminiClientRegistry()
+
+        self.assertFalse(registry.warm_up())
+        self.assertEqual(registry.stats()['warm_up_error'], 'unreachable')
+
+    def test_missing_api_key(self, genai):
+        registry = GeminiClientRegistry()
+        with mock.patch.dict('os.environ', {'GEMINI_API_KEY': ''}):
+            with self.assertRaises(ValueError):
+                registry.get_model()
+        genai.configure.assert_not_called()
+
+
+class SingleFlightTests(TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('k', work)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(flight.do('k', work)))
+        follower.start()
+        while flight.stats()['followers'] == 0:
+            time.sleep(0.01)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertCountEqual(results, [('result', False), ('result', True)])
+
+
+class SharedFlightTests(TestCase):
+    def setUp(self):
+        default_cache.clear()
+        self.flight = SharedFlight('default', {**DEFAULT_SINGLE_FLIGHT_SETTINGS, 'POLL_INTERVAL': 0})
+
+    def test_leader_runs_and_releases_the_lock(self):
+        result, shared = self.flight.do('k', lambda: 'fresh', dump=str, load=str)
+
+        self.assertEqual((result, shared), ('fresh', False))
+        self.assertIsNone(default_cache.get('ai-flight:lock:k'))
+
+    def test_follower_ignores_an_earlier_leaders_result(self):
+        default_cache.set('ai-flight:result:k:old-leader', 'stale')
+        default_cache.set('ai-flight:lock:k', 'new-leader')
+
+        def leader_publishes(_):
+            default_cache.set('ai-flight:result:k:new-leader', 'fresh')
+            default_cache.delete('ai-flight:lock:k')
+
+        fn = mock.Mock()
+        with mock.patch('recommendations.singleflight.time.sleep', side_effect=leader_publishes):
+            result, shared = self.flight.do('k', fn, dump=str, load=str)
+
+        self.assertEqual((result, shared), ('fresh', True))
+        fn.assert_not_called()
+
+    def test_follower_takes_over_from_a_vanished_leader(self):
+        default_cache.set('ai-flight:lock:k', 'gone-leader')
+
+        with mock.patch(
+            'recommendations.singleflight.time.sleep',
+            side_effect=lambda _: default_cache.delete('ai-flight:lock:k')
+        ):
+            result, shared = self.flight.do('k', lambda: 'own', dump=str, load=str)
+
+        self.assertEqual((result, shared), ('own', False))
+
+
+class CircuitBreakerTests(TestCase):
+    def make_breaker(self):
+        return CircuitBreaker(
+            'test', latency_budget=1.0, failure_rate=0.5, min_calls=2, window=4, open_seconds=30
+        )
+
+    def test_opens_at_failure_rate_then_lets_one_trial_through(self):
+        breaker = self.make_breaker()
+        breaker.record(True)
+        breaker.record(False)
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+
+        with mock.patch('recommendations.circuit_breaker.time.monotonic', return_value=time.monotonic() + 31):
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record(True)
+            self.assertEqual(breaker.state, 'closed')
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = self.make_breaker()
+        breaker.record(True, latency=5.0)
+        breaker.record(True, latency=5.0)
+
+        self.assertEqual(breaker.state, 'open')
+        self.assertEqual(breaker.stats()['slow_calls'], 2)
+
+
+class GeminiBreakerIntegrationTests(TestCase):
+    def setUp(self):
+        reset_recommendation_cache()
+        reset_gemini_breaker()
+        self.addCleanup(reset_recommendation_cache)
+        self.addCleanup(reset_gemini_breaker)
+        _, self.profile = make_user(skills='python')
+
+    @mock.patch('recommendations.ai_service.get_gemini_model')
+    def test_prompt_failure_does_not_take_the_half_open_trial(self, get_model):
+        from .ai_service import CareerAdvisorAI
+
+        breaker = get_gemini_breaker()
+        breaker._state = 'half_open'
+        advisor = CareerAdvisorAI()
+        with mock.patch.object(advisor, '_build_career_prompt', side_effect=RuntimeError('bad profile')):
+            with self.assertRaises(RuntimeError):
+                advisor.generate_career_recommendations(self.profile)
+
+        self.assertTrue(breaker.allow())
+
+    @override_settings(AI_CIRCUIT_BREAKER={'LATENCY_BUDGET': 1.0, 'STREAM_TIMEOUT': 60.0})
+    @mock.patch('recommendations.ai_service.get_gemini_model')
+    def test_stream_is_timed_to_its_first_chunk(self, get_model):
+        from .ai_service import CareerAdvisorAI
+
+        def chunks():
+            now[0] = 0.5
+            yield from stream_chunks('[{"title": "A"},')
+            now[0] = 30.0
+            yield from stream_chunks(' {"title": "B"}]')
+
+        now = [0.0]
+        get_model.return_value.generate_content.side_effect = lambda *args, **kwargs: chunks()
+        with mock.patch('recommendations.ai_service.time.monotonic', side_effect=lambda: now[0]):
+            with mock.patch.object(CircuitBreaker, 'record') as record:
+                list(CareerAdvisorAI().stream_career_recommendations(self.profile))
+
+        record.assert_called_once_with(True, latency=0.5)
+        _, kwargs = get_model.return_value.generate_content.call_args
+        self.assertEqual(kwargs['request_options'], {'timeout': 60.0})
+
+
+class AIServiceHealthTests(TestCase):
+    def setUp(self):
+        reset_gemini_breaker()
+        self.addCleanup(reset_gemini_breaker)
+        self.client = APIClient()
+
+    def test_anonymous_callers_only_get_the_status(self):
+        self.assertEqual(self.client.get('/api/health/ai/').data, {'status': 'healthy'})
+        user, _ = make_user()
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get('/api/health/ai/').data, {'status': 'healthy'})
+
+    def test_staff_get_the_detailed_stats(self):
+        staff = User.objects.create_user('ops', 'ops@example.com', 'pw-123456', is_staff=True)
+        self.client.force_authenticate(staff)
+        data = self.client.get('/api/health/ai/').data
+
+        self.assertEqual(data['status'], 'healthy')
+        self.assertEqual(data['circuit_breaker']['state'], 'closed')
+        self.assertIn('coalescing', data)
+
+
+class MatchingTests(TestCase):
+    def test_tokenize_and_parse_experience(self):
+        self.assertEqual(tokenize_skills('Basic Programming & Version Control'), {'programming', 'version', 'control'})
+        self.assertEqual(_parse_experience('2-5 years'), (2.0, 5.0))
+        self.assertEqual(_parse_experience('5+ years')[0], 5.0)
+
+    def test_ranks_the_catalog_against_a_profile(self):
+        developer, _ = make_catalog()
+        _, profile = make_user(
+            skills='programming, git', primary_career_field='technology',
+            experience_level='mid', technical_skills_score=9, problem_solving_score=8,
+        )
+
+        matches = match_careers(profile, limit=2)
+
+        self.assertEqual([m['career_path_id'] for m in matches][0], developer.pk)
+        best = matches[0]
+        self.assertEqual(best['matched_skills'], ['Programming', 'Version Control'])
+        self.assertEqual(best['missing_skills'], ['Problem Solving'])
+        self.assertEqual(best['suggested_stage'], 'Senior Developer')
+        self.assertGreater(best['match_percentage'], matches[1]['match_percentage'])
+
+    def test_career_created_after_the_sync_matches_on_skills(self):
+        make_catalog()
+        web = CareerPath.objects.create(
+            name='Web Developer', industry='Technology', description='Build websites.',
+            required_skills=['Coding', 'Version Control'],
+            career_stages=[{'stage': 'Web Developer', 'experience': '0-2 years'}],
+        )
+        _, profile = make_user(skills='programming, git')
+
+        matches = {m['career_path_id']: m for m in match_careers(profile, limit=3)}
+
+        self.assertEqual(matches[web.pk]['matched_skills'], ['Programming', 'Version Control'])
+
+    def test_editing_required_skills_refreshes_skill_ids(self):
+        developer, _ = make_catalog()
+        developer.required_skills = ['Empathy']
+        developer.save(update_fields=['required_skills'])
+
+        developer.refresh_from_db()
+        self.assertEqual(developer.skill_ids, [Skill.objects.get(name='Empathy').pk])
+
+
+class SaveRecommendationBatchTests(TestCase):
+    def setUp(self):
+        self.user, self.profile = make_user()
+        self.other, _ = make_user('bob')
+
+    def batch(self, user, *titles):
+        return [build_ai_recommendation(user, {'title': title}) for title in titles]
+
+    def assert_saved_with_own_ids(self, saved, titles):
+        self.assertEqual(
+            [Recommendation.objects.get(pk=rec.pk).title for rec in saved], list(titles)
+        )
+
+    def test_bulk_insert_sets_ids_and_touches_profile(self):
+        saved = save_recommendation_batch(self.user, self.batch(self.user, 'A', 'B'), user_profile=self.profile)
+
+        self.assert_saved_with_own_ids(saved, ['A', 'B'])
+        self.profile.refresh_from_db()
+        self.assertIsNotNone(self.profile.last_assessment_date)
+
+    def test_backend_without_returning_ids_reads_them_back_by_batch_token(self):
+        with mock.patch.object(
+            type(connection.features), 'can_return_rows_from_bulk_insert',
+            new_callable=mock.PropertyMock, return_value=False
+        ):
+            save_recommendation_batch(self.other, self.batch(self.other, 'X'))
+            # Savepoint, one INSERT, one SELECT of the ids, release
+            with self.assertNumQueries(4):
+                saved = save_recommendation_batch(self.user, self.batch(self.user, 'A', 'B'))
+            # A later insert for the same user doesn't shift the ids
+            save_recommendation_batch(self.user, self.batch(self.user, 'C'))
+
+        self.assert_saved_with_own_ids(saved, ['A', 'B'])
+        self.assertEqual(len({rec.batch_token for rec in saved}), 1)
+
+
+class CareerProgressPaginationTests(TestCase):
+    def setUp(self):
+        self.user, _ = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_cover_rows_tied_on_started_at_once_each(self):
+        progress = [
+            UserCareerProgress.objects.create(
+                user=self.user,
+                career_path=CareerPath.objects.create(name=f'Path {i}', industry='Technology', description='d'),
+            )
+            for i in range(5)
+        ]
+        UserCareerProgress.objects.update(started_at=timezone.now())
+
+        seen = []
+        url = '/api/career-progress/?page_size=2'
+        while url:
+            page = self.client.get(url).data
+            seen.extend(item['id'] for item in page['results'])
+            url = page['next']
+
+        self.assertEqual(seen, sorted((p.pk for p in progress), reverse=True))
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.user, _ = make_user()
+        self.career = CareerPath.objects.create(name='Path', industry='Technology', description='d')
+        self.progress = UserCareerProgress.objects.create(user=self.user, career_path=self.career)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_parse_fields(self):
+        self.assertEqual(
+            parse_fields('id, career_path.name,career_path.industry'),
+            {'id': {}, 'career_path': {'name': {}, 'industry': {}}}
+        )
+
+    def test_fields_select_nested_fields(self):
+        response = self.client.get('/api/career-progress/?fields=id,career_path.name')
+
+        self.assertEqual(response.data['results'], [{'id': self.progress.pk, 'career_path': {'name': 'Path'}}])
+
+    def test_unexpanded_relation_collapses_to_its_key(self):
+        item = self.client.get('/api/career-progress/?expand=').data['results'][0]
+
+        self.assertEqual(item['career_path'], self.career.pk)
+        self.assertIn('progress_percentage', item)
+
+    def test_default_shape_is_unchanged(self):
+        item = self.client.get('/api/career-progress/').data['results'][0]
+
+        self.assertEqual(item['career_path']['name'], 'Path')
+
+
+class InteractionEventTests(TestCase):
+    def setUp(self):
+        self.user, _ = make_user()
+        self.other, _ = make_user('bob')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.mine = [
+            Recommendation.objects.create(user=self.user, title=f'Mine {i}', content={}) for i in range(2)
+        ]
+        self.theirs = Recommendation.objects.create(user=self.other, title='Theirs', content={})
+
+    def test_applies_valid_events_and_reports_the_rest_by_index(self):
+        first, second = self.mine
+        response = self.client.post('/api/events/', {'events': [
+            {'target': 'recommendation', 'id': first.pk, 'type': 'read'},
+            {'target': 'recommendation', 'id': first.pk, 'type': 'rated', 'value': 2},
+            {'target': 'recommendation', 'id': first.pk, 'type': 'rated', 'value': 5},
+            {'target': 'recommendation', 'id': second.pk, 'type': 'rated', 'value': 3},
+            {'target': 'recommendation', 'id': second.pk, 'type': 'rated', 'value': 9},
+            {'target': 'recommendation', 'id': self.theirs.pk, 'type': 'read'},
+            {'target': 'recommendation', 'id': second.pk, 'type': 'saved'},
+        ]}, format='json')
+
+        self.assertEqual(response.data['applied'], 4)
+        self.assertEqual([item['index'] for item in response.data['rejected']], [4, 5, 6])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.theirs.refresh_from_db()
+        self.assertEqual((first.is_read, first.feedback_rating), (True, 5))
+        self.assertEqual((second.is_read, second.feedback_rating), (False, 3))
+        self.assertFalse(self.theirs.is_read)
+
+    def test_career_recommendation_events_update_the_users_history(self):
+        def history(user):
+            session = AssessmentSession.objects.create(user=user)
+            return CareerRecommendationHistory.objects.create(
+                session=session, career_title='Nurse', match_percentage=80, description='Care'
+            )
+
+        mine, theirs = history(self.user), history(self.other)
+        response = self.client.post('/api/events/', {'events': [
+            {'target': 'career_recommendation', 'id': mine.pk, 'type': 'viewed'},
+            {'target': 'career_recommendation', 'id': mine.pk, 'type': 'saved', 'value': True},
+            {'target': 'career_recommendation', 'id': mine.pk, 'type': 'saved', 'value': False},
+            {'target': 'career_recommendation', 'id': mine.pk, 'type': 'notes', 'value': 'Ask about nights'},
+            {'target': 'career_recommendation', 'id': theirs.pk, 'type': 'roadmap_clicked'},
+        ]}, format='json')
+
+        self.assertFalse(response.data['success'])
+        self.assertEqual(response.data['applied'], 4)
+        self.assertEqual([item['index'] for item in response.data['rejected']], [4])
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertTrue(mine.viewed)
+        self.assertFalse(mine.saved_by_user)
+        self.assertEqual(mine.user_notes, 'Ask about nights')
+        self.assertFalse(theirs.clicked_roadmap)
+
+
+@override_settings(USER_INSIGHTS={'SINGLE_PROCESS': True})
+class UserInsightsTests(TestCase):
+    def setUp(self):
+        default_cache.clear()
+        self.user, self.profile = make_user(technical_skills_score=70)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        developer, nurse = make_catalog()
+        UserCareerProgress.objects.create(user=self.user, career_path=developer, progress_percentage=30)
+        UserCareerProgress.objects.create(user=self.user, career_path=nurse, progress_percentage=10)
+        Recommendation.objects.create(user=self.user, title='Read', content={}, is_read=True)
+        Recommendation.objects.create(user=self.user, title='Unread', content={})
+
+    def test_insights_are_read_in_one_query_and_then_cached(self):
+        with self.assertNumQueries(1):
+            insights = self.client.get('/api/insights/').data
+        self.assertEqual(insights['skill_scores']['technical'], 70)
+        self.assertEqual((insights['recommendations_count'], insights['unread_recommendations']), (2, 1))
+        self.assertEqual(
+            [(row['career_path__name'], row['progress_percentage']) for row in insights['career_progress']],
+            [('Software Developer', 30), ('Registered Nurse', 10)]
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/insights/').data, insights)
+
+    def test_user_without_progress_or_recommendations(self):
+        bob, _ = make_user('bob')
+        self.client.force_authenticate(bob)
+        with self.assertNumQueries(1):
+            insights = self.client.get('/api/insights/').data
+        self.assertEqual(insights['career_progress'], [])
+        self.assertEqual((insights['recommendations_count'], insights['unread_recommendations']), (0, 0))
+
+    def test_missing_profile_is_404_and_not_cached(self):
+        stranger = User.objects.create_user('carol', 'carol@example.com', 'pw-123456')
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get('/api/insights/').status_code, 404)
+        UserProfile.objects.create(user=stranger)
+        self.assertEqual(self.client.get('/api/insights/').status_code, 200)
+
+    def test_writes_invalidate_the_cached_insights_on_commit(self):
+        self.client.get('/api/insights/')
+        recommendation = Recommendation.objects.get(title='Unread')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/recommendations/{recommendation.pk}/', {'is_read': True}, format='json')
+
+        self.assertEqual(self.client.get('/api/insights/').data['unread_recommendations'], 0)
+
+
+    def test_insights_computed_before_a_write_are_not_served_after_it(self):
+        from . import insights
+
+        real = insights.compute_user_insights
+
+        def compute_then_write(user):
+            stale = real(user)
+            # A write commits while this reader still holds the old value
+            with self.captureOnCommitCallbacks(execute=True):
+                Recommendation.objects.filter(user=user).update(is_read=True)
+                insights.invalidate_user_insights(user.pk)
+            return stale
+
+        with mock.patch.object(insights, 'compute_user_insights', side_effect=compute_then_write):
+            self.assertEqual(self.client.get('/api/insights/').data['unread_recommendations'], 1)
+
+        self.assertEqual(self.client.get('/api/insights/').data['unread_recommendations'], 0)
+
+    @override_settings(USER_INSIGHTS={})
+    def test_per_process_cache_is_not_used_by_default(self):
+        self.client.get('/api/insights/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/insights/')
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        reset_catalog_snapshot()
+        self.addCleanup(reset_catalog_snapshot)
+        self.user, _ = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.developer, self.nurse = make_catalog()
+
+    def names(self, response):
+        return [item['name'] for item in json.loads(response.content)]
+
+    def test_list_and_industry_filter_are_served_from_the_snapshot(self):
+        self.assertEqual(
+            self.names(self.client.get('/api/career-paths/')), ['Software Developer', 'Registered Nurse']
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(self.client.get('/api/career-paths/?industry=Healthcare')), ['Registered Nurse'])
+            self.assertEqual(self.names(self.client.get('/api/career-paths/?industry=Law')), [])
+            detail = self.client.get(f'/api/career-paths/{self.nurse.pk}/')
+        self.assertEqual(json.loads(detail.content)['name'], 'Registered Nurse')
+
+    def test_matching_etag_gets_304(self):
+        first = self.client.get('/api/career-paths/')
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+
+        again = self.client.get('/api/career-paths/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual((again.status_code, again.content), (304, b''))
+        weak = self.client.get('/api/career-paths/', HTTP_IF_NONE_MATCH=f'W/{first["ETag"]}')
+        self.assertEqual(weak.status_code, 304)
+        other = self.client.get('/api/career-paths/', HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(other.status_code, 200)
+
+    def test_gzip_is_a_separate_representation(self):
+        plain = self.client.get('/api/career-paths/')
+        compressed = self.client.get('/api/career-paths/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(compressed['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(
+            self.client.get('/api/career-paths/', HTTP_IF_NONE_MATCH=plain['ETag'],
+                            HTTP_ACCEPT_ENCODING='gzip').status_code,
+            200
+        )
+
+    @override_settings(CAREER_CATALOG={'CHECK_INTERVAL': 0})
+    def test_catalog_changes_rebuild_the_snapshot(self):
+        before = self.client.get('/api/career-paths/')
+        self.nurse.description = 'Lead patient care.'
+        self.nurse.save()
+
+        after = self.client.get('/api/career-paths/', HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertIn(b'Lead patient care.', after.content)
+
+    def test_sparse_fieldsets_bypass_the_snapshot(self):
+        response = self.client.get('/api/career-paths/?fields=name')
+        self.assertEqual(response.data, [{'name': 'Software Developer'}, {'name': 'Registered Nurse'}])
+
+
+class PrefixTrieTests(TestCase):
+    def test_completions_are_ordered_by_weight_then_term(self):
+        trie = PrefixTrie()
+        for term, weight in [('nurse', 3), ('nursing', 1), ('nutrition', 3), ('data', 5)]:
+            trie.set_weight(term, weight)
+
+        self.assertEqual(trie.complete('nu'), ['nurse', 'nutrition', 'nursing'])
+        self.assertEqual(trie.complete('nu', limit=1), ['nurse'])
+        self.assertEqual(trie.complete('x'), [])
+
+    def test_weight_changes_refresh_cached_completions(self):
+        trie = PrefixTrie()
+        trie.set_weight('nurse', 3)
+        trie.set_weight('nursing', 1)
+        self.assertEqual(trie.complete('nur'), ['nurse', 'nursing'])
+
+        trie.set_weight('nursing', 4)
+        self.assertEqual(trie.complete('nur'), ['nursing', 'nurse'])
+        trie.set_weight('nursing', 0)
+        self.assertEqual(trie.complete('nur'), ['nurse'])
+        self.assertNotIn('i', trie.root.children['n'].children['u'].children['r'].children['s'].children)
+
+
+class CareerSearchTests(TestCase):
+    def setUp(self):
+        reset_search_index()
+        self.addCleanup(reset_search_index)
+        self.user, _ = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.developer, self.nurse = make_catalog()
+
+    def test_bm25_ranks_name_matches_first(self):
+        index = CareerSearchIndex()
+        index.sync(CareerPath.objects.all())
+        CareerPath.objects.create(
+            name='Clinical Educator', industry='Healthcare',
+            description='Teach nurse teams.', required_skills=['Teaching'], career_stages=[]
+        )
+        index.sync(CareerPath.objects.all())
+
+        results = index.search('nurse')
+        self.assertEqual([item['name'] for item in results], ['Registered Nurse', 'Clinical Educator'])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+        self.assertEqual(index.search('the of and'), [])
+
+    def test_sync_reindexes_only_changed_rows_and_drops_deleted_ones(self):
+        index = CareerSearchIndex()
+        self.assertEqual(index.sync(CareerPath.objects.all()), (2, 0))
+        self.assertEqual(index.sync(CareerPath.objects.all()), (0, 0))
+
+        self.developer.name = 'Software Engineer'
+        self.developer.save()
+        self.nurse.delete()
+        self.assertEqual(index.sync(CareerPath.objects.all()), (1, 1))
+
+        self.assertEqual(index.search('nurse'), [])
+        self.assertEqual(index.search('engineer')[0]['name'], 'Software Engineer')
+        self.assertEqual(index.trie.complete('regis'), [])
+
+    def test_search_endpoint(self):
+        response = self.client.get('/api/career-paths/search/?q=patient care')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], self.nurse.pk)
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/career-paths/search/?q=software')
+        self.assertEqual(self.client.get('/api/career-paths/search/?q=').status_code, 400)
+
+    def test_autocomplete_endpoint_completes_the_last_word(self):
+        response = self.client.get('/api/career-paths/autocomplete/?q=softw')
+        self.assertEqual(response.data['terms'], ['software'])
+        self.assertEqual(response.data['results'][0]['name'], 'Software Developer')
+
+        response = self.client.get('/api/career-paths/autocomplete/?q=patient c')
+        self.assertIn('care', response.data['terms'])
+        self.assertEqual(response.data['results'][0]['name'], 'Registered Nurse')
+        self.assertEqual(self.client.get('/api/career-paths/autocomplete/?q=').data['terms'], [])
+
+
+class CareerGraphTests(TestCase):
+    def setUp(self):
+        self.developer, self.nurse = make_catalog()
+        self.graph = CareerGraph(CareerPath.objects.order_by('id'))
+        self.user, self.profile = make_user(
+            current_role='Junior Developer', experience_level='entry',
+            skills='Programming, Version Control, Problem Solving'
+        )
+
+    def route(self, text):
+        return self.graph.roadmap(self.profile, self.graph.resolve_target(text))
+
+    def test_every_stage_is_a_node_with_promotion_and_switch_edges(self):
+        self.assertEqual(len(self.graph), 5)
+        junior = self.graph.resolve_target(career_path_id=self.developer.pk, stage=0)
+        neighbours = dict(self.graph.neighbours(junior))
+        # Promotion: two years of experience plus one missing skill
+        self.assertEqual(neighbours[junior + 1], 2.5)
+        # No switch to a later stage of another path
+        charge_nurse = self.graph.resolve_target(career_path_id=self.nurse.pk, stage=1)
+        self.assertNotIn(charge_nurse, neighbours)
+
+    def test_switches_are_scored_against_a_bounded_candidate_set(self):
+        careers = [
+            CareerPath(
+                pk=i, name=f'Career {i}', industry='Test', description='',
+                required_skills=[f'Skill {i}', 'Teamwork' if i % 10 == 0 else f'Craft {i}'],
+                career_stages=[
+                    {'stage': f'Junior {i}', 'experience': '0-2 years'},
+                    {'stage': f'Senior {i}', 'experience': '2+ years', 'skills': [f'Mastery {i}']},
+                ],
+            )
+            for i in range(1, 201)
+        ]
+        with mock.patch.object(CareerGraph, '_cost', autospec=True, side_effect=CareerGraph._cost) as cost:
+            graph = CareerGraph(careers)
+
+        self.assertEqual(len(graph), 400)
+        self.assertLess(cost.call_count, 400 * (graph_module.MAX_CANDIDATES + 2 * graph_module.MAX_SWITCHES + 1))
+        # Stages sharing a skill are still linked
+        junior_10 = graph.resolve_target(career_path_id=10, stage=0)
+        junior_20 = graph.resolve_target(career_path_id=20, stage=0)
+        self.assertIn(junior_20, dict(graph.neighbours(junior_10)))
+
+    def test_roadmap_follows_promotions_from_the_current_role(self):
+        roadmap = self.route('Senior Developer')
+
+        self.assertEqual(
+            [(step['stage'], step['transition']) for step in roadmap['steps']],
+            [('Junior Developer', 'start'), ('Software Developer', 'promotion'), ('Senior Developer', 'promotion')]
+        )
+        self.assertEqual(roadmap['steps'][2]['new_skills'], ['Architecture', 'Leadership'])
+        self.assertEqual(roadmap['estimated_years'], 6.5)
+
+    def test_roadmap_takes_the_cheapest_switch(self):
+        roadmap = self.route('Charge Nurse')
+
+        self.assertEqual(
+            [step['transition'] for step in roadmap['steps']], ['start', 'promotion', 'switch']
+        )
+        self.assertEqual(roadmap['estimated_years'], sum(step['estimated_years'] for step in roadmap['steps']))
+        # Cheaper than entering nursing directly and working up
+        self.assertLess(roadmap['estimated_years'], 4.5)
+
+    def test_shortest_path_matches_an_exhaustive_search(self):
+        starts = self.graph.starting_points('', 'Patient Care', 0.0)
+        for target in range(len(self.graph)):
+            best = dict(starts)
+            changed = True
+            while changed:
+                changed = False
+                for node, cost in list(best.items()):
+                    for other, weight in self.graph.neighbours(node):
+                        if cost + weight < best.get(other, float('inf')) - 1e-9:
+                            best[other] = cost + weight
+                            changed = True
+            cost, route = self.graph.shortest_path(starts, target)
+            self.assertAlmostEqual(cost, best[target])
+            self.assertEqual(route[-1], target)
+
+    def test_unknown_targets_raise(self):
+        with self.assertRaises(RoadmapError):
+            self.graph.resolve_target('Astronaut')
+        with self.assertRaises(RoadmapError):
+            self.graph.resolve_target(career_path_id=self.nurse.pk, stage=5)
+
+    def test_roadmap_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(f'/api/career-paths/roadmap/?career_path={self.developer.pk}&stage=2')
+        self.assertEqual(response.data['estimated_years'], 6.5)
+        self.assertEqual(client.get('/api/career-paths/roadmap/?target=Nurse').data['steps'][-1]['stage'], 'Registered Nurse')
+        self.assertEqual(client.get('/api/career-paths/roadmap/').status_code, 400)
+        self.assertEqual(client.get('/api/career-paths/roadmap/?career_path=x').status_code, 400)
+        self.assertEqual(client.get('/api/career-paths/roadmap/?target=Astronaut').status_code, 404)
+
+
+class SkillTaxonomyTests(TestCase):
+    def setUp(self):
+        self.developer, self.nurse = make_catalog()
+
+    def skill(self, name):
+        return Skill.objects.get(name=name).pk
+
+    def test_normalize_and_split(self):
+        self.assertEqual(normalize_skill('SEO/SEM '), 'seo sem')
+        self.assertEqual(normalize_skill('Problem-Solving'), 'problem solving')
+        self.assertEqual(normalize_skill('R&D'), 'r and d')
+        self.assertEqual(split_skills('Python, SQL;\n Excel ,'), ['Python', 'SQL', 'Excel'])
+
+    def test_lookup_by_name_alias_and_similarity(self):
+        taxonomy = get_skill_taxonomy()
+        programming = self.skill('Programming')
+
+        self.assertEqual(taxonomy.lookup('programming'), programming)
+        self.assertEqual(taxonomy.lookup('Git'), self.skill('Version Control'))
+        self.assertEqual(taxonomy.lookup('coding'), programming)
+        self.assertEqual(taxonomy.lookup('Progamming'), programming)
+        self.assertIsNone(taxonomy.lookup('Underwater Welding'))
+        self.assertEqual(
+            taxonomy.resolve(['Coding', 'Programming', 'Astrophysics', 'Empathy']),
+            [programming, self.skill('Empathy')]
+        )
+
+    def test_sync_registers_catalog_skills_and_is_idempotent(self):
+        self.assertTrue(Skill.objects.filter(name='System Design').exists())
+        self.assertIn('coding', Skill.objects.get(name='Programming').aliases)
+        self.assertEqual(
+            sync_skill_taxonomy(), {'created': 0, 'careers': 0, 'profiles': 0, 'recommendations': 0}
+        )
+
+        self.developer.refresh_from_db()
+        self.assertEqual(
+            self.developer.skill_ids,
+            [self.skill('Programming'), self.skill('Problem Solving'), self.skill('Version Control')]
+        )
+
+    def test_sync_refreshes_stored_ids_of_new_skills(self):
+        # Saved before the catalog knew about Phlebotomy
+        _, profile = make_user(skills='Phlebotomy, coding')
+        self.assertEqual(profile.skill_ids, [self.skill('Programming')])
+
+        self.nurse.required_skills = [*self.nurse.required_skills, 'Phlebotomy']
+        self.nurse.save()
+        counts = sync_skill_taxonomy()
+
+        self.assertEqual((counts['created'], counts['careers'], counts['profiles']), (1, 1, 1))
+        profile.refresh_from_db()
+        self.assertEqual(profile.skill_ids, [self.skill('Phlebotomy'), self.skill('Programming')])
+
+    def test_taxonomy_is_rebuilt_only_when_skills_change(self):
+        taxonomy = get_skill_taxonomy()
+        self.assertIs(get_skill_taxonomy(), taxonomy)
+
+        Skill.objects.create(name='Phlebotomy', key='phlebotomy')
+        rebuilt = get_skill_taxonomy()
+        self.assertIsNot(rebuilt, taxonomy)
+        self.assertEqual(rebuilt.lookup('phlebotomy'), self.skill('Phlebotomy'))
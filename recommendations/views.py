@@ -1,26 +1,58 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, permission_classes, action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 import json
 
-from .models import Recommendation, CareerPath, UserCareerProgress
+from .models import Recommendation, CareerPath, UserCareerProgress, RecommendationJob
 from .serializers import (
     RecommendationSerializer, CareerPathSerializer, 
-    UserCareerProgressSerializer, RecommendationFeedbackSerializer
+    UserCareerProgressSerializer, RecommendationFeedbackSerializer,
+    InteractionEventsSerializer
 )
+from backend.fieldsets import SparseFieldsetViewMixin, requested_shape
+from backend.pagination import KeysetCursorPagination
 from users.models import UserProfile
+from .cache import get_recommendation_cache
+from .catalog import catalog_response, get_catalog_snapshot
+from .events import apply_interaction_events
+from .insights import get_user_insights_data, invalidate_user_insights
+from .circuit_breaker import get_gemini_breaker
+from .gemini_client import registry as gemini_registry
+from .singleflight import local_flight
+from .graph import RoadmapError, get_career_graph
+from .matching import match_careers
+from .search import get_search_index, get_search_settings
+from .jobs import JobQueueFull, enqueue_recommendation_job, get_job_settings
+from .services import (
+    build_generation_payload, generate_recommendations_for_user,
+    stream_recommendations_for_user
+)
 
-class RecommendationViewSet(viewsets.ModelViewSet):
+class RecommendationViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = RecommendationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         return Recommendation.objects.filter(user=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        invalidate_user_insights(self.request.user.pk)
+    
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_user_insights(self.request.user.pk)
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_user_insights(self.request.user.pk)
     
     @action(detail=True, methods=['patch'])
     def feedback(self, request, pk=None):
@@ -39,10 +71,11 @@ class RecommendationViewSet(viewsets.ModelViewSet):
         """Mark recommendation as read"""
         recommendation = self.get_object()
         recommendation.is_read = True
-        recommendation.save()
+        recommendation.save(update_fields=['is_read', 'updated_at'])
+        invalidate_user_insights(request.user.pk)
         return Response({'status': 'marked as read'})
 
-class CareerPathViewSet(viewsets.ReadOnlyModelViewSet):
+class CareerPathViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = CareerPath.objects.all()
     serializer_class = CareerPathSerializer
     permission_classes = [IsAuthenticated]
@@ -53,16 +86,132 @@ class CareerPathViewSet(viewsets.ReadOnlyModelViewSet):
         if industry:
             queryset = queryset.filter(industry=industry)
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        # Sparse fieldsets are rendered per request; the full shape comes from the snapshot
+        if requested_shape(request) != (None, None):
+            return super().list(request, *args, **kwargs)
+        snapshot = get_catalog_snapshot()
+        industry = request.query_params.get('industry')
+        return catalog_response(request, snapshot.for_industry(industry) if industry else snapshot.all)
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            representation = get_catalog_snapshot().details.get(int(kwargs['pk']))
+        except ValueError:
+            representation = None
+        if representation is None or requested_shape(request) != (None, None):
+            return super().retrieve(request, *args, **kwargs)
+        return catalog_response(request, representation)
+    
+    @action(detail=False, methods=['get'])
+    def matches(self, request):
+        """Rank career paths against the user's profile with the local matching engine"""
+        try:
+            user_profile = UserProfile.objects.get(user=request.user)
+        except UserProfile.DoesNotExist:
+            return Response(
+                {'error': 'User profile not found. Please complete your profile first.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        limit = _limit_param(request, 5)
+        return Response({'matches': match_careers(user_profile, limit=limit)})
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Full-text search of the catalog, ranked with BM25"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Query parameter q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        results = get_search_index().search(query, limit=_limit_param(request, 10))
+        return Response({'query': query, 'count': len(results), 'results': results})
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Type-ahead: completions of the last word typed and the top matching careers"""
+        query = request.query_params.get('q', '')
+        suggestions = get_search_index().autocomplete(
+            query,
+            limit=_limit_param(request, 5),
+            expansions=get_search_settings()['PREFIX_EXPANSIONS']
+        )
+        return Response({'query': query, **suggestions})
+    
+    @action(detail=False, methods=['get'])
+    def roadmap(self, request):
+        """Cheapest sequence of stages from the user's current role and skills to a target role.
+        
+        The target is ``?career_path=<id>&stage=<index>`` or ``?target=<role name>``.
+        """
+        try:
+            user_profile = UserProfile.objects.get(user=request.user)
+        except UserProfile.DoesNotExist:
+            return Response(
+                {'error': 'User profile not found. Please complete your profile first.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        params = request.query_params
+        if not params.get('target') and not params.get('career_path'):
+            return Response(
+                {'error': 'Provide target or career_path'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            career_path_id = int(params['career_path']) if params.get('career_path') else None
+            stage = int(params.get('stage', 0))
+        except ValueError:
+            return Response(
+                {'error': 'career_path and stage must be integers'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        graph = get_career_graph()
+        try:
+            target = graph.resolve_target(params.get('target'), career_path_id, stage)
+            return Response(graph.roadmap(user_profile, target))
+        except RoadmapError as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+def _limit_param(request, default):
+    try:
+        return min(max(int(request.query_params.get('limit', default)), 1), 50)
+    except ValueError:
+        return default
 
-class UserCareerProgressViewSet(viewsets.ModelViewSet):
+class UserCareerProgressViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = UserCareerProgressSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ('-started_at', '-id')
     
     def get_queryset(self):
         return UserCareerProgress.objects.filter(user=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        invalidate_user_insights(self.request.user.pk)
+    
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_user_insights(self.request.user.pk)
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_user_insights(self.request.user.pk)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def record_interaction_events(request):
+    """Apply a batch of engagement events (views, saves, ratings, ...) in one request"""
+    serializer = InteractionEventsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    applied, rejected = apply_interaction_events(request.user, serializer.validated_data['events'])
+    return Response({
+        'success': not rejected,
+        'applied': applied,
+        'rejected': rejected
+    })
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -76,177 +225,127 @@ def generate_ai_recommendations(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
+    if _wants_async(request):
+        return _queue_recommendation_job(request)
+    
+    created_recommendations, ai_powered = generate_recommendations_for_user(
+        request.user, user_profile
+    )
+    return Response(build_generation_payload(created_recommendations, ai_powered))
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ai_recommendations(request):
+    """Stream recommendations as server-sent events while Gemini generates them"""
     try:
-        # Use Gemini AI for recommendations
-        from .ai_service import CareerAdvisorAI
-        
-        ai_advisor = CareerAdvisorAI()
-        ai_recommendations = ai_advisor.generate_career_recommendations(user_profile)
-        
-        # Save AI recommendations to database
-        created_recommendations = []
-        for rec_data in ai_recommendations:
-            # Ensure content is properly structured
-            content = {
-                'description': rec_data.get('description', ''),
-                'action_steps': rec_data.get('action_steps', []),
-                'timeline': rec_data.get('timeline', ''),
-                'resources': rec_data.get('resources', []),
-                'expected_outcomes': rec_data.get('expected_outcomes', '')
-            }
-            
-            recommendation = Recommendation.objects.create(
-                user=request.user,
-                recommendation_type=rec_data.get('type', 'career_path'),
-                title=rec_data.get('title', 'Career Recommendation'),
-                content=content,
-                priority=rec_data.get('priority', 'medium'),
-                ai_confidence_score=rec_data.get('confidence', 0.75)
-            )
-            created_recommendations.append(recommendation)
-        
-        # Update last assessment date
-        user_profile.last_assessment_date = timezone.now()
-        user_profile.save()
-        
-        serializer = RecommendationSerializer(created_recommendations, many=True)
-        return Response({
-            'message': f'Generated {len(created_recommendations)} AI-powered recommendations',
-            'recommendations': serializer.data,
-            'ai_powered': True
-        })
-        
-    except Exception as e:
-        # Fallback to mock recommendations if AI fails
-        print(f"AI recommendation failed: {e}")
-        mock_recommendations = generate_mock_recommendations(user_profile)
-        
-        created_recommendations = []
-        for rec_data in mock_recommendations:
-            recommendation = Recommendation.objects.create(
-                user=request.user,
-                recommendation_type=rec_data['type'],
-                title=rec_data['title'],
-                content=rec_data['content'],
-                priority=rec_data['priority'],
-                ai_confidence_score=rec_data['confidence']
-            )
-            created_recommendations.append(recommendation)
-        
-        serializer = RecommendationSerializer(created_recommendations, many=True)
-        return Response({
-            'message': f'Generated {len(created_recommendations)} recommendations (fallback mode)',
-            'recommendations': serializer.data,
-            'ai_powered': False,
-            'note': 'AI service unavailable, using fallback recommendations'
-        })
+        user_profile = UserProfile.objects.get(user=request.user)
+    except UserProfile.DoesNotExist:
+        return Response(
+            {'error': 'User profile not found. Please complete your profile first.'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    response = StreamingHttpResponse(
+        _recommendation_events(request.user, user_profile),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
 
-def generate_mock_recommendations(user_profile):
-    """Generate mock AI recommendations based on user profile"""
-    recommendations = []
-    
-    # Career path recommendation
-    if user_profile.skills and user_profile.interests:
-        recommendations.append({
-            'type': 'career_path',
-            'title': 'Recommended Career Path: Software Engineering',
-            'content': {
-                'description': 'Based on your technical skills and interests, software engineering offers excellent growth opportunities.',
-                'next_steps': [
-                    'Strengthen programming fundamentals',
-                    'Build portfolio projects',
-                    'Practice system design'
-                ],
-                'timeline': '6-12 months',
-                'resources': [
-                    'Online coding bootcamps',
-                    'Open source contributions',
-                    'Technical interview preparation'
-                ]
-            },
-            'priority': 'high',
-            'confidence': 0.85
+def _recommendation_events(user, user_profile):
+    count = 0
+    ai_powered = True
+    try:
+        for recommendation, ai_powered in stream_recommendations_for_user(user, user_profile):
+            count += 1
+            yield _sse_event('recommendation', RecommendationSerializer(recommendation).data)
+    except Exception:
+        yield _sse_event('error', {
+            'error': 'Recommendation stream was interrupted',
+            'count': count,
+            'ai_powered': ai_powered,
         })
+        return
+    yield _sse_event('done', {'count': count, 'ai_powered': ai_powered})
+
+def _wants_async(request):
+    """Async mode is chosen per request with ?async=true or by default in settings"""
+    flag = request.query_params.get('async')
+    if flag is None:
+        return get_job_settings()['ASYNC_DEFAULT']
+    return flag.lower() in ('1', 'true', 'yes')
+
+def _queue_recommendation_job(request):
+    job = RecommendationJob.objects.create(user=request.user)
+    try:
+        enqueue_recommendation_job(job)
+    except JobQueueFull:
+        job.delete()
+        response = Response(
+            {'error': 'Recommendation service is busy. Please try again shortly.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        response['Retry-After'] = '5'
+        return response
     
-    # Skill development recommendation
-    if user_profile.technical_skills_score and user_profile.technical_skills_score < 7:
-        recommendations.append({
-            'type': 'skill_development',
-            'title': 'Improve Technical Skills',
-            'content': {
-                'description': 'Your technical skills assessment suggests room for improvement in core areas.',
-                'focus_areas': [
-                    'Programming languages',
-                    'System architecture',
-                    'Database design',
-                    'Testing methodologies'
-                ],
-                'recommended_courses': [
-                    'Advanced Python Programming',
-                    'System Design Fundamentals',
-                    'Database Management'
-                ]
-            },
-            'priority': 'medium',
-            'confidence': 0.75
-        })
+    return Response({
+        'job_id': str(job.id),
+        'status': job.status,
+        'status_url': reverse('recommendation_job_status', args=[job.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recommendation_job_status(request, job_id):
+    """Poll an asynchronous recommendation generation job"""
+    job = get_object_or_404(RecommendationJob, id=job_id, user=request.user)
     
-    # Industry insight
-    if user_profile.preferred_industries:
-        recommendations.append({
-            'type': 'industry_insight',
-            'title': 'Technology Industry Trends',
-            'content': {
-                'description': 'Current trends in your preferred industry sectors.',
-                'trends': [
-                    'AI/ML adoption accelerating',
-                    'Remote work becoming standard',
-                    'Cloud-native development growing',
-                    'Cybersecurity skills in high demand'
-                ],
-                'opportunities': [
-                    'AI/ML Engineer positions',
-                    'DevOps and Cloud roles',
-                    'Cybersecurity specialists'
-                ]
-            },
-            'priority': 'low',
-            'confidence': 0.70
-        })
+    payload = {
+        'job_id': str(job.id),
+        'status': job.status,
+        'created_at': job.created_at,
+        'completed_at': job.completed_at,
+    }
+    if job.status == 'completed':
+        # Keep the order in which the recommendations were generated
+        by_id = Recommendation.objects.in_bulk(job.recommendation_ids)
+        recommendations = [by_id[pk] for pk in job.recommendation_ids if pk in by_id]
+        payload.update(build_generation_payload(recommendations, job.ai_powered))
+    elif job.status == 'failed':
+        payload['error'] = job.error
     
-    return recommendations
+    return Response(payload)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_insights(request):
     """Get personalized career insights for the user"""
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        
-        insights = {
-            'profile_completion': user_profile.profile_completion,
-            'skill_scores': {
-                'technical': user_profile.technical_skills_score,
-                'communication': user_profile.communication_score,
-                'leadership': user_profile.leadership_score,
-                'problem_solving': user_profile.problem_solving_score,
-            },
-            'recommendations_count': Recommendation.objects.filter(user=request.user).count(),
-            'unread_recommendations': Recommendation.objects.filter(
-                user=request.user, is_read=False
-            ).count(),
-            'career_progress': list(
-                UserCareerProgress.objects.filter(user=request.user).values(
-                    'career_path__name', 'progress_percentage'
-                )
-            ),
-            'last_activity': user_profile.last_assessment_date,
-        }
-        
-        return Response(insights)
-        
-    except UserProfile.DoesNotExist:
+    insights = get_user_insights_data(request.user)
+    if insights is None:
         return Response(
             {'error': 'User profile not found'}, 
             status=status.HTTP_404_NOT_FOUND
         )
+    return Response(insights)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def ai_service_health(request):
+    """Report AI service health; staff also get breaker, cache and Gemini connection reuse stats"""
+    breaker = get_gemini_breaker().stats()
+    health = 'degraded' if breaker['state'] != 'closed' else 'healthy'
+    if not request.user.is_staff:
+        # Error text and internal counters are for operators only
+        return Response({'status': health})
+    return Response({
+        'status': health,
+        'circuit_breaker': breaker,
+        'cache': get_recommendation_cache().stats(),
+        'gemini_client': gemini_registry.stats(),
+        'coalescing': local_flight.stats(),
+    })
@@ -105,6 +105,7 @@ class UserProfile(models.Model):
     
     # Basic info
     skills = models.TextField(blank=True, help_text="Comma-separated list of skills")
+    skill_ids = models.JSONField(default=list, blank=True, help_text="Skill ids resolved from skills")
     interests = models.TextField(blank=True, help_text="Areas of interest")
     goals = models.TextField(blank=True, help_text="Career goals and aspirations")
     
@@ -225,8 +226,19 @@ class UserProfile(models.Model):
         self.profile_completion = percentage
         return percentage
     
+    def resolve_skill_ids(self):
+        """Map the free-text skills onto the canonical skill taxonomy"""
+        from recommendations.skills import resolve_skill_ids, split_skills
+        self.skill_ids = resolve_skill_ids(split_skills(self.skills))
+        return self.skill_ids
+    
     def save(self, *args, **kwargs):
         self.calculate_completion_percentage()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'skills' in update_fields:
+            self.resolve_skill_ids()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'skill_ids'}
         super().save(*args, **kwargs)
 
     def __str__(self):
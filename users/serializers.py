@@ -9,7 +9,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
         fields = [
-            'id', 'skills', 'interests', 'goals', 'education_level', 
+            'id', 'skills', 'skill_ids', 'interests', 'goals', 'education_level', 
             'field_of_study', 'experience_level', 'current_role',
             'primary_career_field', 'primary_career_field_display',
             'career_stage', 'career_stage_display',
@@ -22,7 +22,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             # Metadata
             'profile_completion', 'last_assessment_date', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['profile_completion', 'created_at', 'updated_at', 
+        read_only_fields = ['skill_ids', 'profile_completion', 'created_at', 'updated_at', 
                           'primary_career_field_display', 'career_stage_display']
 
 class UserProfileCreateSerializer(serializers.ModelSerializer):
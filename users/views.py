@@ -8,6 +8,7 @@ from django.db import transaction
 from rest_framework_simplejwt.tokens import RefreshToken
 import re
 
+from recommendations.insights import invalidate_user_insights
 from .models import UserProfile
 from .serializers import UserProfileSerializer
 
@@ -20,6 +21,15 @@ class UserProfileViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        invalidate_user_insights(self.request.user.pk)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_user_insights(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_user_insights(self.request.user.pk)
 
 
 @api_view(['POST'])